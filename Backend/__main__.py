@@ -1,48 +1,72 @@
-from asyncio import get_event_loop, sleep as asleep
+from asyncio import get_event_loop
 import asyncio
 import logging
 from traceback import format_exc
 from pyrogram import idle
 from Backend import __version__, db
+from Backend.helper.http import http_pool
 from Backend.helper.pinger import ping
+from Backend.helper.jobs import job_manager
+from Backend.helper.loop_monitor import loop_monitor
+from Backend.helper.startup import readiness, startup_timer
+from Backend.helper.storage import shutdown_process_pool
 from Backend.logger import LOGGER
-from Backend.fastapi import server
+from Backend.fastapi import reuseport_socket, server, unix_socket
+from Backend.fastapi.workers import control_socket_path, stream_workers
 from Backend.helper.pyro import restart_notification, setup_bot_commands
 from Backend.pyrofork.bot import Helper, StreamBot
-from Backend.pyrofork.clients import initialize_clients
+from Backend.pyrofork.clients import TokenParser, initialize_clients
 
 loop = get_event_loop()
 
+async def start_streambot():
+    await db.connect()
+    readiness.set("db")
+    await StreamBot.start()
+    StreamBot.username = StreamBot.me.username
+    LOGGER.info(f"Bot Client : [@{StreamBot.username}]")
+
+async def start_helper():
+    await Helper.start()
+    Helper.username = Helper.me.username
+    LOGGER.info(f"Helper Bot Client : [@{Helper.username}]")
+
 async def start_services():
     try:
         LOGGER.info(f"Initializing Telegram-Stremio v-{__version__}")
-        await asleep(1.2)
-        
-        await db.connect()
-        await asleep(1.2)
-        
-        await StreamBot.start()
-        StreamBot.username = StreamBot.me.username
-        LOGGER.info(f"Bot Client : [@{StreamBot.username}]")
-        await asleep(1.2)
 
-        await Helper.start()
-        Helper.username = Helper.me.username
-        LOGGER.info(f"Helper Bot Client : [@{Helper.username}]")
-        await asleep(1.2)
+        loop_monitor.start()
+        await http_pool.start()
 
-        LOGGER.info("Initializing Multi Clients...")
-        await initialize_clients()
-        await asleep(2)
+        # Web server first; requests wait on readiness for the parts they need
+        LOGGER.info('Initializing Telegram-Stremio Web Server...')
+        if stream_workers.enabled:
+            # bound before the workers start, so the first forwarded request finds it
+            sockets = [reuseport_socket(), unix_socket(control_socket_path(stream_workers.port))]
+            stream_workers.start()
+            loop.create_task(server.serve(sockets=sockets))
+        else:
+            loop.create_task(server.serve())
 
-        await setup_bot_commands(StreamBot)
-        await asleep(2)
+        # DB -> StreamBot (plugins need the DB), Helper and MULTI_TOKEN logins run side by side
+        LOGGER.info("Initializing Multi Clients...")
+        await asyncio.gather(
+            startup_timer.phase("db+bot", start_streambot()),
+            startup_timer.phase("helper", start_helper()),
+            startup_timer.phase("multi_clients", initialize_clients(
+                stream_workers.main_tokens(TokenParser.parse_from_env())
+            )),
+        )
+        readiness.set("telegram")
 
-        LOGGER.info('Initializing Telegram-Stremio Web Server...')
-        await restart_notification()
-        loop.create_task(server.serve())
+        await asyncio.gather(
+            startup_timer.phase("bot_commands", setup_bot_commands(StreamBot)),
+            startup_timer.phase("restart_notification", restart_notification()),
+        )
         loop.create_task(ping())
-        
+        loop.create_task(job_manager.resume(StreamBot))
+
+        LOGGER.info(startup_timer.summary())
         LOGGER.info("Telegram-Stremio Started Successfully!")
         await idle()
     except Exception:
@@ -61,7 +85,10 @@ async def stop_services():
         await StreamBot.stop()
         await Helper.stop()
 
+        stream_workers.stop()
         await db.disconnect()
+        await http_pool.close()
+        shutdown_process_pool()
         
         LOGGER.info("Services stopped successfully.")
     except Exception:
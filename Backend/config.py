@@ -25,4 +25,54 @@ class Telegram:
 
     ADMIN_USERNAME = getenv("ADMIN_USERNAME", "fyvio")
     ADMIN_PASSWORD = getenv("ADMIN_PASSWORD", "fyvio")
-    
+
+    LINK_CHECK_CONCURRENCY = int(getenv("LINK_CHECK_CONCURRENCY", "32"))
+    LINK_CHECK_PER_HOST = int(getenv("LINK_CHECK_PER_HOST", "4"))
+    LINK_CHECK_HOST_INTERVAL = float(getenv("LINK_CHECK_HOST_INTERVAL", "0.1"))
+    LINK_CHECK_CACHE_TTL = int(getenv("LINK_CHECK_CACHE_TTL", "3600"))
+    LINK_CHECK_NEGATIVE_TTL = int(getenv("LINK_CHECK_NEGATIVE_TTL", "60"))
+    LINK_CHECK_CACHE_SIZE = int(getenv("LINK_CHECK_CACHE_SIZE", "20000"))
+
+    CPU_WORKERS = int(getenv("CPU_WORKERS", "2"))
+    STREAM_WORKERS = int(getenv("STREAM_WORKERS", "0"))
+    STREAM_FAST_PATH = getenv("STREAM_FAST_PATH", "true").lower() == "true"
+    STREAM_PER_CLIENT = int(getenv("STREAM_PER_CLIENT", "4"))
+    STREAM_GETFILE_SLOTS = int(getenv("STREAM_GETFILE_SLOTS", "8"))
+    STREAM_CLIENT_RATE = float(getenv("STREAM_CLIENT_RATE", "0"))
+    STREAM_PROBE_BYTES = int(getenv("STREAM_PROBE_BYTES", str(2 * 1024 * 1024)))
+    TRUSTED_PROXIES = getenv("TRUSTED_PROXIES", "127.0.0.1,::1")
+    HLS_SEGMENT_SECONDS = float(getenv("HLS_SEGMENT_SECONDS", "6"))
+    HLS_MATROSKA = getenv("HLS_MATROSKA", "false").lower() == "true"
+    FILE_INDEX = getenv("FILE_INDEX", "false").lower() == "true"
+    FILE_INDEX_AT_INGEST = getenv("FILE_INDEX_AT_INGEST", "true").lower() == "true"
+    FILE_INDEX_MEMORY_MB = int(getenv("FILE_INDEX_MEMORY_MB", "64"))
+    FILE_INDEX_MAX_KB = int(getenv("FILE_INDEX_MAX_KB", "1024"))
+    FILE_INDEX_TTL_DAYS = int(getenv("FILE_INDEX_TTL_DAYS", "30"))
+    FILE_INDEX_MISSING_TTL = int(getenv("FILE_INDEX_MISSING_TTL", "1800"))
+    STATS_MAX_AGE = int(getenv("STATS_MAX_AGE", "21600"))
+    LOOP_SLOW_MS = float(getenv("LOOP_SLOW_MS", "250"))
+
+    METRICS_TOKEN = getenv("METRICS_TOKEN", "")
+    PLAYLIST_TOKEN = getenv("PLAYLIST_TOKEN", "")
+
+    JOB_CONCURRENCY = int(getenv("JOB_CONCURRENCY", "16"))
+    JOB_RATE = float(getenv("JOB_RATE", "25"))
+    JOB_YIELD_LOAD = int(getenv("JOB_YIELD_LOAD", "4"))
+    JOB_PROGRESS_INTERVAL = float(getenv("JOB_PROGRESS_INTERVAL", "10"))
+
+    HTTP_TIMEOUT = float(getenv("HTTP_TIMEOUT", "20"))
+    HTTP_MAX_CONNECTIONS = int(getenv("HTTP_MAX_CONNECTIONS", "64"))
+    HTTP_PER_HOST = int(getenv("HTTP_PER_HOST", "8"))
+    HTTP_RETRIES = int(getenv("HTTP_RETRIES", "2"))
+
+    TMDB_RATE = float(getenv("TMDB_RATE", "40"))
+    CINEMETA_RATE = float(getenv("CINEMETA_RATE", "20"))
+    CINEMETA_CACHE_TTL = int(getenv("CINEMETA_CACHE_TTL", "21600"))
+    CINEMETA_CACHE_SIZE = int(getenv("CINEMETA_CACHE_SIZE", "256"))
+    METADATA_NEGATIVE_TTL = float(getenv("METADATA_NEGATIVE_TTL", "300"))
+    LOOKUP_CACHE_SIZE = int(getenv("LOOKUP_CACHE_SIZE", "4096"))
+    TRANSLATE_CACHE_SIZE = int(getenv("TRANSLATE_CACHE_SIZE", "20000"))
+
+    PIXELDRAIN = getenv("PIXELDRAIN", "")
+    PIXELDRAIN_API_BASE = getenv("PIXELDRAIN_API_BASE", "https://pixeldrain.com/api").rstrip("/")
+    PIXELDRAIN_CONCURRENCY = int(getenv("PIXELDRAIN_CONCURRENCY", "4"))
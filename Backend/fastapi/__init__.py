@@ -1,8 +1,36 @@
+import os
+import socket
 import uvicorn
 from Backend.config import Telegram
 from Backend.fastapi.main import app
+from Backend.fastapi.stream_app import StreamApp
 
 
 Port = Telegram.PORT
-config = uvicorn.Config(app=app, host='0.0.0.0', port=Port)
+# /dl is served by the lean ASGI fast path in front of the FastAPI app
+asgi_app = StreamApp(app) if Telegram.STREAM_FAST_PATH else app
+config = uvicorn.Config(app=asgi_app, host='0.0.0.0', port=Port)
 server = uvicorn.Server(config)
+
+
+def reuseport_socket(host: str = "0.0.0.0", port: int = Port) -> socket.socket:
+    """Listening socket shared with the streaming workers; the kernel spreads connections over them."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.setblocking(False)
+    return sock
+
+
+def unix_socket(path: str) -> socket.socket:
+    """Listening unix socket; streaming workers forward non-stream requests to the main process on it."""
+    if os.path.exists(path):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    os.chmod(path, 0o600)
+    sock.listen(2048)
+    sock.setblocking(False)
+    return sock
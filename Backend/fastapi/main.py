@@ -4,9 +4,13 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 from Backend import __version__
-from Backend.fastapi.security.credentials import require_auth
+from Backend.config import Telegram
+from Backend.fastapi.security.credentials import require_auth, require_token_or_auth
+from Backend.helper.startup import ReadinessMiddleware, readiness
 from Backend.fastapi.routes.stream_routes import router as stream_router
 from Backend.fastapi.routes.stremio_routes import router as stremio_router
+from Backend.fastapi.routes.playlist_routes import router as playlist_router
+from Backend.fastapi.routes.hls_routes import router as hls_router
 from Backend.fastapi.routes.template_routes import (
     login_page, login_post, logout, set_theme, dashboard_page,
     media_management_page, edit_media_page, public_status_page, stremio_guide_page
@@ -32,6 +36,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# outermost: the web server is up before Telegram logins finish
+app.add_middleware(ReadinessMiddleware, readiness=readiness)
 
 try:
     app.mount("/static", StaticFiles(directory="Backend/fastapi/static"), name="static")
@@ -41,6 +47,8 @@ except Exception:
 # --- Include existing API routers ---
 app.include_router(stream_router)
 app.include_router(stremio_router)
+app.include_router(playlist_router)
+app.include_router(hls_router)
 
 # --- Public Routes (No Authentication Required) ---
 @app.get("/login", response_class=HTMLResponse)
@@ -118,17 +126,66 @@ async def delete_tv_season(tmdb_id: int, db_index: int, season: int, _: bool = D
 async def get_workloads(_: bool = Depends(require_auth)):
     try:
         from Backend.pyrofork.bot import work_loads
+        loads = work_loads.all_loads()
         return {
             "loads": {
                 f"bot{c + 1}": l
                 for c, (_, l) in enumerate(
-                    sorted(work_loads.items(), key=lambda x: x[1], reverse=True)
+                    sorted(loads.items(), key=lambda x: x[1], reverse=True)
                 )
-            } if work_loads else {}
+            } if loads else {}
         }
     except Exception as e:
         return {"loads": {}}
 
+@app.get("/api/system/stats")
+async def get_library_stats(refresh: bool = False, _: bool = Depends(require_auth)):
+    from Backend import db
+    return await db.stats.get(refresh=refresh)
+
+@app.get("/api/system/loop")
+async def get_loop_lag(_: bool = Depends(require_auth)):
+    from Backend.helper.loop_monitor import loop_monitor
+    return loop_monitor.snapshot()
+
+@app.get("/api/system/streams")
+async def get_stream_scheduler(_: bool = Depends(require_auth)):
+    from Backend.helper.stream_scheduler import stream_scheduler
+    return stream_scheduler.snapshot()
+
+@app.get("/api/system/file-index")
+async def get_file_index(_: bool = Depends(require_auth)):
+    from Backend.helper.file_index import file_index
+    return file_index.snapshot()
+
+@app.get("/api/system/metadata-cache")
+async def get_metadata_cache(_: bool = Depends(require_auth)):
+    from Backend.helper.metadata import cache_stats
+    return cache_stats()
+
+@app.get("/ready")
+async def get_ready():
+    from fastapi.responses import JSONResponse
+    return JSONResponse(readiness.snapshot(), status_code=200 if readiness.is_ready() else 503)
+
+@app.get("/metrics")
+async def get_metrics(_: bool = Depends(require_token_or_auth(Telegram.METRICS_TOKEN))):
+    # Prometheus scrapes with METRICS_TOKEN as bearer token; without one the dashboard login is required
+    from fastapi.responses import PlainTextResponse
+    from Backend.fastapi.workers import stream_workers
+    # workers forward /metrics here; the answer covers every process
+    return PlainTextResponse(await stream_workers.render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/system/jobs")
+async def get_jobs(limit: int = 20, _: bool = Depends(require_auth)):
+    from Backend.helper.jobs import job_manager
+    return {"jobs": await job_manager.list(limit=limit)}
+
+@app.post("/api/system/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str, _: bool = Depends(require_auth)):
+    from Backend.helper.jobs import job_manager
+    return {"cancelled": job_manager.cancel(job_id)}
+
 @app.exception_handler(401)
 async def auth_exception_handler(request: Request, exc):
     return RedirectResponse(url="/login", status_code=302)
\ No newline at end of file
@@ -0,0 +1,119 @@
+import math
+from time import perf_counter
+from typing import Optional, Tuple
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+
+from Backend.config import Telegram
+from Backend.fastapi.routes.stream_routes import STREAM_HEADERS, measured, plan_stream
+from Backend.helper.container_index import SegmentIndex
+from Backend.helper.custom_dl import part_reader, pick_streamer
+from Backend.helper.encrypt import decode_string
+from Backend.helper.exceptions import FIleNotFound
+from Backend.helper.file_index import file_index
+from Backend.helper.stream_scheduler import client_key
+
+router = APIRouter(tags=["HLS"])
+
+# containers whose segments decode on their own after the init section;
+# MP4 sample tables point at absolute file offsets, so its byte ranges don't.
+# Segments are not remuxed: the HLS spec only allows MPEG-TS / fMP4, so Matroska
+# ones are served only when HLS_MATROSKA opts in for ffmpeg based players.
+HLS_CONTAINERS = {"mkv": "video/x-matroska"} if Telegram.HLS_MATROSKA else {}
+
+
+async def segment_index(chat_id: int, msg_id: int) -> Optional[SegmentIndex]:
+    index, tg_connect = pick_streamer()
+    file_id = await tg_connect.get_file_properties(chat_id=chat_id, message_id=msg_id)
+    # keyed by file_unique_id: every bot and every link to the same file share one index
+    entry = await file_index.get(file_id.unique_id, file_id.file_size, part_reader(tg_connect, index, file_id))
+    return entry.segments
+
+
+async def resolve(id: str) -> Tuple[int, int, SegmentIndex]:
+    if not HLS_CONTAINERS:
+        raise HTTPException(
+            status_code=404,
+            detail="HLS needs MPEG-TS or fMP4 segments and this server does not remux; use /dl (HLS_MATROSKA=true serves Matroska segments)"
+        )
+    try:
+        decoded = await decode_string(id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid id")
+    if not decoded.get("msg_id"):
+        raise HTTPException(status_code=400, detail="Missing id")
+    chat_id, msg_id = int(f"-100{decoded['chat_id']}"), int(decoded["msg_id"])
+
+    try:
+        index = await segment_index(chat_id, msg_id)
+    except FIleNotFound:
+        raise HTTPException(status_code=404, detail=FIleNotFound.message)
+    except ConnectionError:
+        raise HTTPException(status_code=503, detail="Telegram read failed", headers={"Retry-After": "5"})
+    if index is None or index.index_range is None:
+        raise HTTPException(status_code=404, detail="No seek index in this file; use /dl")
+    if index.container not in HLS_CONTAINERS:
+        raise HTTPException(status_code=415, detail=f"{index.container} is not segmentable without remuxing; use /dl")
+    return chat_id, msg_id, index
+
+
+def render_playlist(index: SegmentIndex) -> str:
+    ext = index.container
+    durations = [index.segment_duration(n) for n in range(index.count)]
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:6",
+        f"#EXT-X-TARGETDURATION:{math.ceil(max(durations))}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+        f'#EXT-X-MAP:URI="init.{ext}"',
+    ]
+    for n, duration in enumerate(durations):
+        lines += [f"#EXTINF:{duration:.3f},", f"{n}.{ext}"]
+    lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+
+@router.get("/hls/{id}/index.m3u8")
+async def hls_playlist(id: str):
+    _, _, index = await resolve(id)
+    return Response(
+        render_playlist(index),
+        media_type="application/vnd.apple.mpegurl",
+        headers={
+            "Cache-Control": "public, max-age=3600",
+            "Access-Control-Allow-Origin": "*",
+        },
+    )
+
+
+@router.get("/hls/{id}/{segment}")
+async def hls_segment(request: Request, id: str, segment: str):
+    started = perf_counter()
+    chat_id, msg_id, index = await resolve(id)
+
+    stem, _, ext = segment.rpartition(".")
+    if ext != index.container:
+        raise HTTPException(status_code=404, detail="Unknown segment")
+    if stem == "init":
+        start, end = index.init_range()
+    elif stem.isdigit() and int(stem) < index.count:
+        start, end = index.segment_range(int(stem))
+    else:
+        raise HTTPException(status_code=404, detail="Unknown segment")
+
+    # each segment is a fixed byte range planned like any /dl range request
+    client = client_key(request.headers.get("X-Forwarded-For"), request.client.host if request.client else None)
+    plan = await plan_stream(chat_id, msg_id, f"bytes={start}-{end}", client=client)
+
+    # served whole (200) under its own URL, so CDNs can cache every segment separately
+    return StreamingResponse(
+        measured(plan.body(), started),
+        status_code=200,
+        media_type=HLS_CONTAINERS[ext],
+        headers={
+            "Content-Length": plan.headers["Content-Length"],
+            "Cache-Control": STREAM_HEADERS["Cache-Control"],
+            "Access-Control-Allow-Origin": "*",
+        },
+    )
@@ -0,0 +1,28 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from Backend.config import Telegram
+from Backend.fastapi.security.credentials import require_token_or_auth
+from Backend.helper.m3u import iter_m3u
+
+router = APIRouter(tags=["Playlist"])
+
+
+@router.get("/playlist.m3u")
+async def playlist_handler(
+    type: Optional[str] = Query(None, regex="^(movie|tv|series)$"),
+    genre: Optional[str] = Query(None, max_length=100),
+    year: Optional[int] = Query(None, ge=1800, le=2100),
+    _: bool = Depends(require_token_or_auth(Telegram.PLAYLIST_TOKEN)),
+):
+    media_type = "tv" if type == "series" else type
+
+    return StreamingResponse(
+        iter_m3u(media_type=media_type, genre=genre, year=year),
+        media_type="audio/x-mpegurl",
+        headers={
+            "Content-Disposition": 'inline; filename="filmlervediziler.m3u"',
+            "Cache-Control": "no-cache",
+        },
+    )
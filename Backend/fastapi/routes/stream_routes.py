@@ -1,17 +1,19 @@
-import math
 import secrets
 import mimetypes
-from typing import Tuple
+from time import perf_counter
+from typing import AsyncIterator, Dict, NamedTuple, Optional, Tuple
 from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import StreamingResponse
 
+from Backend.config import Telegram
 from Backend.helper.encrypt import decode_string
 from Backend.helper.exceptions import InvalidHash
-from Backend.helper.custom_dl import ByteStreamer
-from Backend.pyrofork.bot import StreamBot, work_loads, multi_clients
+from Backend.helper.custom_dl import ByteStreamer, part_reader, pick_streamer
+from Backend.helper.file_index import file_index, indexable
+from Backend.helper.stream_scheduler import Flow, client_key, stream_scheduler
+from Backend.helper.metrics import STREAM_ACTIVE, STREAM_BYTES, STREAM_LOCAL_BYTES, STREAM_RATE, STREAM_REQUESTS, STREAM_TTFB
 
 router = APIRouter(tags=["Streaming"])
-class_cache = {}
 
 
 def parse_range_header(range_header: str, file_size: int) -> Tuple[int, int]:
@@ -35,58 +37,101 @@ def parse_range_header(range_header: str, file_size: int) -> Tuple[int, int]:
     return from_bytes, until_bytes
 
 
+def plan_parts(from_bytes: int, until_bytes: int, chunk_size: int) -> Tuple[int, int, int, int]:
+    """(offset, first_part_cut, last_part_cut, part_count) of the GetFile parts covering a range."""
+    offset = from_bytes - (from_bytes % chunk_size)
+    part_count = until_bytes // chunk_size - offset // chunk_size + 1
+    return offset, from_bytes - offset, (until_bytes % chunk_size) + 1, part_count
+
+
+async def measured(body, started: float):
+    """Pass chunks through while recording time to first byte, bytes sent and stream rate."""
+    sent = 0
+    first = True
+    STREAM_ACTIVE.inc()
+    try:
+        async for chunk in body:
+            if first:
+                STREAM_TTFB.observe(perf_counter() - started)
+                first = False
+            sent += len(chunk)
+            yield chunk
+    finally:
+        STREAM_ACTIVE.dec()
+        STREAM_BYTES.inc(sent)
+        elapsed = perf_counter() - started
+        if sent and elapsed > 0:
+            STREAM_RATE.observe(sent / elapsed)
+
+
 @router.get("/dl/{id}/{name}")
 @router.head("/dl/{id}/{name}")
 async def stream_handler(request: Request, id: str, name: str):
+    request.state.started = perf_counter()
     decoded_data = await decode_string(id)
     if not decoded_data.get("msg_id"):
         raise HTTPException(status_code=400, detail="Missing id")
 
-    chat_id = f"-100{decoded_data['chat_id']}"
-    message = await StreamBot.get_messages(int(chat_id), int(decoded_data["msg_id"]))
-    file = message.video or message.document
-    file_hash = file.file_unique_id[:6]
-
+    # the streaming client fetches (and caches) the message itself; no separate lookup here
     return await media_streamer(
         request,
-        chat_id=int(chat_id),
+        chat_id=int(f"-100{decoded_data['chat_id']}"),
         id=int(decoded_data["msg_id"]),
-        secure_hash=file_hash
     )
 
 
-async def media_streamer(
-    request: Request,
+class StreamPlan(NamedTuple):
+    """
+    Everything a /dl response needs, resolved before the first byte is sent.
+    `prefix` is the start of the range answered from the file index; `args`
+    plans the GetFile parts for the rest and is None when nothing is left.
+    """
+    status_code: int
+    headers: Dict[str, str]
+    streamer: ByteStreamer
+    args: Optional[tuple]
+    flow: Optional[Flow] = None
+    prefix: Optional[memoryview] = None
+
+    def body(self) -> AsyncIterator[bytes]:
+        if self.prefix is None:
+            return self.streamer.yield_file(*self.args, flow=self.flow)
+        return self.spliced()
+
+    async def spliced(self) -> AsyncIterator[bytes]:
+        yield self.prefix
+        STREAM_LOCAL_BYTES.inc(len(self.prefix))
+        if self.args:
+            async for chunk in self.streamer.yield_file(*self.args, flow=self.flow):
+                yield chunk
+
+
+# identical for every /dl response
+STREAM_HEADERS = {
+    "Accept-Ranges": "bytes",
+    "Cache-Control": "public, max-age=3600, immutable",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Expose-Headers": "Content-Length, Content-Range, Accept-Ranges",
+}
+
+
+async def plan_stream(
     chat_id: int,
     id: int,
-    secure_hash: str,
-) -> StreamingResponse:
-    range_header = request.headers.get("Range", "")
-    index = min(work_loads, key=work_loads.get)
-    faster_client = multi_clients[index]
-
-    tg_connect = class_cache.get(faster_client)
-    if not tg_connect:
-        tg_connect = ByteStreamer(faster_client)
-        class_cache[faster_client] = tg_connect
-
+    range_header: str = "",
+    secure_hash: Optional[str] = None,
+    client: str = "unknown",
+) -> StreamPlan:
+    index, tg_connect = pick_streamer()
     file_id = await tg_connect.get_file_properties(chat_id=chat_id, message_id=id)
-    if file_id.unique_id[:6] != secure_hash:
+    if secure_hash and file_id.unique_id[:6] != secure_hash:
         raise InvalidHash
 
     file_size = file_id.file_size
     from_bytes, until_bytes = parse_range_header(range_header, file_size)
 
     chunk_size = 1024 * 1024
-    offset = from_bytes - (from_bytes % chunk_size)
-    first_part_cut = from_bytes - offset
-    last_part_cut = (until_bytes % chunk_size) + 1
     req_length = until_bytes - from_bytes + 1
-    part_count = math.ceil(until_bytes / chunk_size) - math.floor(offset / chunk_size)
-
-    body = tg_connect.yield_file(
-        file_id, index, offset, first_part_cut, last_part_cut, part_count, chunk_size
-    )
 
     file_name = file_id.file_name or f"{secrets.token_hex(2)}.unknown"
     mime_type = file_id.mime_type or mimetypes.guess_type(file_name)[0] or "application/octet-stream"
@@ -97,21 +142,48 @@ async def media_streamer(
         "Content-Type": mime_type,
         "Content-Length": str(req_length),
         "Content-Disposition": f'inline; filename="{file_name}"',
-        "Accept-Ranges": "bytes",
-        "Cache-Control": "public, max-age=3600, immutable",
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Expose-Headers": "Content-Length, Content-Range, Accept-Ranges",
     }
-    
     if range_header:
         headers["Content-Range"] = f"bytes {from_bytes}-{until_bytes}/{file_size}"
         status_code = 206
     else:
         status_code = 200
-    
+    STREAM_REQUESTS.inc(1, str(status_code))
+
+    # header and Cues / moov reads are answered from the file index, the rest comes from Telegram
+    prefix = None
+    if Telegram.FILE_INDEX and indexable(mime_type):
+        # memory only; a miss is looked up in Mongo, or indexed, in the background
+        cached = file_index.peek(file_id.unique_id)
+        if cached is not None:
+            prefix = cached.local(from_bytes, until_bytes)
+        else:
+            file_index.schedule(file_id.unique_id, file_size, part_reader(tg_connect, index, file_id))
+    if prefix is not None:
+        from_bytes += len(prefix)
+        if from_bytes > until_bytes:
+            return StreamPlan(status_code, headers, tg_connect, None, prefix=prefix)
+
+    return StreamPlan(
+        status_code, headers, tg_connect,
+        (file_id, index, *plan_parts(from_bytes, until_bytes, chunk_size), chunk_size),
+        stream_scheduler.flow(client, until_bytes - from_bytes + 1),
+        prefix,
+    )
+
+
+async def media_streamer(
+    request: Request,
+    chat_id: int,
+    id: int,
+    secure_hash: Optional[str] = None,
+) -> StreamingResponse:
+    started = getattr(request.state, "started", None) or perf_counter()
+    client = client_key(request.headers.get("X-Forwarded-For"), request.client.host if request.client else None)
+    plan = await plan_stream(chat_id, id, request.headers.get("Range", ""), secure_hash, client)
     return StreamingResponse(
-        status_code=status_code,
-        content=body,
-        headers=headers,
-        media_type=mime_type,
-    )
\ No newline at end of file
+        status_code=plan.status_code,
+        content=measured(plan.body(), started),
+        headers={**plan.headers, **STREAM_HEADERS},
+        media_type=plan.headers["Content-Type"],
+    )
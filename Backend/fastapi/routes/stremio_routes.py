@@ -3,7 +3,8 @@ from typing import Optional
 from urllib.parse import unquote
 from Backend.config import Telegram
 from Backend import db, __version__
-import PTN
+from Backend.helper.lazy import lazy_import
+from Backend.helper.metrics import TimedRoute
 from datetime import datetime, timezone, timedelta
 from dateutil.parser import parse as parse_date
 
@@ -13,8 +14,9 @@ BASE_URL = Telegram.BASE_URL
 ADDON_NAME = "TEST"
 ADDON_VERSION = __version__
 PAGE_SIZE = 15
+PTN = lazy_import("PTN")
 
-router = APIRouter(prefix="/stremio", tags=["Stremio Addon"])
+router = APIRouter(prefix="/stremio", tags=["Stremio Addon"], route_class=TimedRoute)
 
 # --- Genres ---
 GENRES = [
@@ -4,10 +4,12 @@ from fastapi.templating import Jinja2Templates
 from Backend.fastapi.security.credentials import verify_credentials, require_auth, is_authenticated, get_current_user
 from Backend.fastapi.themes import get_theme, get_all_themes
 from Backend import db
-from Backend.pyrofork.bot import work_loads, multi_clients, StreamBot
+from Backend.pyrofork.bot import work_loads, StreamBot
 from Backend.helper.pyro import get_readable_time
+from Backend.helper.loop_monitor import loop_monitor
 from Backend import StartTime, __version__
 from time import time
+from asyncio import gather
 
 
 templates = Jinja2Templates(directory="Backend/fastapi/templates")
@@ -57,27 +59,29 @@ async def dashboard_page(request: Request, _: bool = Depends(require_auth)):
     current_user = get_current_user(request)
     
     try:
-        db_stats = await db.get_database_stats()
-        total_movies = sum(stat.get("movie_count", 0) for stat in db_stats)
-        total_tv_shows = sum(stat.get("tv_count", 0) for stat in db_stats)
+        db_stats, library = await gather(db.get_database_stats(), db.stats.get())
+        total_movies = library["movie"]["count"]
+        total_tv_shows = library["tv"]["count"]
+        loads = work_loads.all_loads()
         
         system_stats = {
             "server_status": "running",
             "uptime": get_readable_time(time() - StartTime),
-            "telegram_bot": f"@{StreamBot.username}" if StreamBot and StreamBot.username else "@StreamBot",
-            "connected_bots": len(multi_clients),
+            "telegram_bot": f"@{StreamBot.username}" if getattr(StreamBot, "username", None) else "@StreamBot",
+            "connected_bots": len(loads),
             "loads": {
                 f"bot{c + 1}": l
                 for c, (_, l) in enumerate(
-                    sorted(work_loads.items(), key=lambda x: x[1], reverse=True)
+                    sorted(loads.items(), key=lambda x: x[1], reverse=True)
                 )
-            } if work_loads else {},
+            } if loads else {},
             "version": __version__,
             "movies": total_movies,
             "tv_shows": total_tv_shows,
             "databases": db_stats,
             "total_databases": len(db_stats),
-            "current_db_index": db.current_db_index
+            "current_db_index": db.current_db_index,
+            "loop": loop_monitor.snapshot()
         }
     except Exception as e:
         print(f"Dashboard error: {e}")
@@ -149,9 +153,9 @@ async def public_status_page(request: Request):
     theme = get_theme(theme_name)
     
     try:
-        db_stats = await db.get_database_stats()
-        total_movies = sum(stat.get("movie_count", 0) for stat in db_stats)
-        total_tv_shows = sum(stat.get("tv_count", 0) for stat in db_stats)
+        db_stats, library = await gather(db.get_database_stats(), db.stats.get())
+        total_movies = library["movie"]["count"]
+        total_tv_shows = library["tv"]["count"]
         
         public_stats = {
             "status": "operational",
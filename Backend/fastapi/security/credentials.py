@@ -3,6 +3,7 @@ from fastapi.security import HTTPBearer
 from Backend.config import Telegram
 from typing import Optional
 import hashlib
+import secrets
 
 ADMIN_PASSWORD_HASH = hashlib.sha256(Telegram.ADMIN_PASSWORD.encode()).hexdigest()
 
@@ -26,3 +27,20 @@ def get_current_user(request: Request) -> Optional[str]:
     if is_authenticated(request):
         return request.session.get("username")
     return None
+
+def require_token_or_auth(expected: str):
+    """
+    Dependency for URLs opened by players and scrapers that have no dashboard
+    session: a dashboard session always passes, and with `expected` set a
+    matching ?token= or bearer token does as well.
+    """
+    def dependency(request: Request):
+        if is_authenticated(request):
+            return True
+        if not expected:
+            return require_auth(request)
+        token = request.query_params.get("token") or request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not secrets.compare_digest(token.encode(), expected.encode()):
+            raise HTTPException(status_code=403, detail="Invalid token")
+        return True
+    return dependency
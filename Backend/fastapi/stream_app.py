@@ -0,0 +1,163 @@
+import asyncio
+import json
+from time import perf_counter
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from Backend.fastapi.routes.stream_routes import STREAM_HEADERS, plan_stream
+from Backend.helper.encrypt import decode_string
+from Backend.helper.exceptions import FIleNotFound, InvalidHash
+from Backend.helper.metrics import STREAM_ACTIVE, STREAM_BYTES, STREAM_RATE, STREAM_TTFB
+from Backend.helper.startup import ReadinessMiddleware, readiness
+from Backend.helper.stream_scheduler import client_key
+
+PREFIX = "/dl/"
+
+Headers = List[Tuple[bytes, bytes]]
+
+# encoded once; every response appends these to its per-file headers
+STATIC_HEADERS: Headers = [(k.lower().encode(), v.encode()) for k, v in STREAM_HEADERS.items()]
+PREFLIGHT_HEADERS: Headers = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-methods", b"GET, HEAD, OPTIONS"),
+    (b"access-control-allow-headers", b"*"),
+    (b"access-control-max-age", b"600"),
+]
+
+
+def _latin1(value: str) -> bytes:
+    # file names come straight from Telegram; HTTP/1.1 header values are latin-1
+    return value.encode("latin-1", "replace")
+
+
+def match(path: str) -> Optional[str]:
+    """Returns the encoded id for /dl/{id}/{name}, None for anything the route would not match."""
+    if not path.startswith(PREFIX):
+        return None
+    id, _, name = path[len(PREFIX):].partition("/")
+    if not id or not name or "/" in name:
+        return None
+    return id
+
+
+class StreamApp:
+    """
+    ASGI entry point that serves /dl/{id}/{name} itself and hands every other
+    request to the FastAPI app. Streams skip the session, CORS and routing
+    layers, and chunks go straight to `send` instead of through
+    StreamingResponse. The FastAPI /dl route stays registered as the fallback
+    (STREAM_FAST_PATH=false) and as the baseline in benchmarks/stream_throughput.py.
+    """
+
+    def __init__(self, app, plan=plan_stream):
+        self.app = app
+        self.plan = plan
+        # /dl needs the Telegram clients; same gate the FastAPI app applies
+        self.gated = ReadinessMiddleware(self.serve, readiness)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(PREFIX):
+            method = scope["method"]
+            if method in ("GET", "HEAD") or (method == "OPTIONS" and _header(scope, b"access-control-request-method")):
+                return await self.gated(scope, receive, send)
+        await self.app(scope, receive, send)
+
+    async def serve(self, scope, receive, send):
+        id = match(scope["path"])
+        if id is None:
+            return await self.app(scope, receive, send)
+        if scope["method"] == "OPTIONS":
+            await send({"type": "http.response.start", "status": 204, "headers": PREFLIGHT_HEADERS})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        started = perf_counter()
+        try:
+            decoded = await decode_string(id)
+        except Exception:
+            return await _error(send, 400, "Invalid id")
+        if not decoded.get("msg_id"):
+            return await _error(send, 400, "Missing id")
+
+        range_header = _header(scope, b"range")
+        forwarded = _header(scope, b"x-forwarded-for")
+        peer = scope.get("client")
+        try:
+            plan = await self.plan(
+                int(f"-100{decoded['chat_id']}"),
+                int(decoded["msg_id"]),
+                range_header.decode("latin-1") if range_header else "",
+                client=client_key(forwarded.decode("latin-1") if forwarded else None, peer[0] if peer else None),
+            )
+        except HTTPException as e:
+            return await _error(send, e.status_code, e.detail, e.headers)
+        except FIleNotFound:
+            return await _error(send, 404, FIleNotFound.message)
+        except InvalidHash:
+            return await _error(send, 403, InvalidHash.message)
+
+        headers = [(k.lower().encode(), _latin1(v)) for k, v in plan.headers.items()]
+        headers += STATIC_HEADERS
+        await send({"type": "http.response.start", "status": plan.status_code, "headers": headers})
+        if scope["method"] == "HEAD":
+            # size and type are known from the FileId; no GetFile for HEAD
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await self.stream(plan.body(), receive, send, started)
+
+    @staticmethod
+    async def stream(body, receive, send, started: float) -> None:
+        disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+        # one message dict for the whole response; servers copy the body out during send
+        message = {"type": "http.response.body", "body": b"", "more_body": True}
+        sent = 0
+        STREAM_ACTIVE.inc()
+        try:
+            async for chunk in body:
+                if disconnected.done():
+                    break
+                if not sent:
+                    STREAM_TTFB.observe(perf_counter() - started)
+                message["body"] = chunk
+                await send(message)
+                sent += len(chunk)
+            else:
+                message["body"] = b""
+                message["more_body"] = False
+                await send(message)
+        except OSError:
+            # uvicorn raises ClientDisconnected (an OSError) on send after the peer left
+            pass
+        finally:
+            disconnected.cancel()
+            await body.aclose()
+            STREAM_ACTIVE.dec()
+            STREAM_BYTES.inc(sent)
+            elapsed = perf_counter() - started
+            if sent and elapsed > 0:
+                STREAM_RATE.observe(sent / elapsed)
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+async def _wait_disconnect(receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _error(send, status: int, detail, headers: Optional[dict] = None) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    response_headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"access-control-allow-origin", b"*"),
+    ]
+    response_headers += [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    await send({"type": "http.response.start", "status": status, "headers": response_headers})
+    await send({"type": "http.response.body", "body": body})
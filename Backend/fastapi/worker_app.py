@@ -0,0 +1,114 @@
+from typing import List, Tuple
+
+import httpx
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+from Backend import __version__
+from Backend.config import Telegram
+from Backend.fastapi.routes.hls_routes import router as hls_router
+from Backend.fastapi.routes.stream_routes import router as stream_router
+from Backend.fastapi.stream_app import StreamApp
+from Backend.helper.startup import ReadinessMiddleware, readiness
+from Backend.logger import LOGGER
+
+# paths a streaming worker answers itself; everything else belongs to the main process
+WORKER_PREFIXES = ("/dl/", "/hls/")
+
+HOP_BY_HOP = {
+    b"connection", b"keep-alive", b"proxy-authenticate", b"proxy-authorization",
+    b"te", b"trailers", b"transfer-encoding", b"upgrade",
+}
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class ControlProxy:
+    """
+    Forwards a request to the main process over its unix socket and streams the
+    answer back. Dashboard, API and Stremio requests land on whichever process
+    the kernel picked for the connection; only the main process runs the Helper
+    bot and the control plugins they may need.
+    """
+
+    def __init__(self, socket_path: str):
+        self.client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(uds=socket_path),
+            timeout=httpx.Timeout(60.0, read=None),
+            follow_redirects=False,
+        )
+
+    async def __call__(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+
+        headers = [(k, v) for k, v in scope["headers"] if k.lower() not in HOP_BY_HOP]
+        peer = scope.get("client")
+        if peer:
+            forwarded = b", ".join([v for k, v in headers if k == b"x-forwarded-for"] + [peer[0].encode()])
+            headers = [(k, v) for k, v in headers if k != b"x-forwarded-for"] + [(b"x-forwarded-for", forwarded)]
+
+        target = (scope.get("raw_path") or scope["path"].encode()).decode("latin-1")
+        if scope.get("query_string"):
+            target += "?" + scope["query_string"].decode("latin-1")
+
+        try:
+            request = self.client.build_request(scope["method"], f"http://main{target}", headers=headers, content=bytes(body))
+            response = await self.client.send(request, stream=True)
+        except httpx.HTTPError as e:
+            LOGGER.warning(f"Forwarding {scope['method']} {scope['path']} to the main process failed: {e}")
+            await send({"type": "http.response.start", "status": 502, "headers": [(b"content-type", b"text/plain")]})
+            await send({"type": "http.response.body", "body": b"main process unavailable\n"})
+            return
+
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [(k, v) for k, v in response.headers.raw if k.lower() not in HOP_BY_HOP],
+            })
+            async for chunk in response.aiter_raw():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        except OSError:
+            # the client went away mid-response
+            pass
+        finally:
+            await response.aclose()
+
+
+class WorkerRouter:
+    """/dl and /hls go to the streaming app, every other request to the main process."""
+
+    def __init__(self, app, proxy: ControlProxy):
+        self.app = app
+        self.proxy = proxy
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not scope["path"].startswith(WORKER_PREFIXES):
+            return await self.proxy(scope, receive, send)
+        await self.app(scope, receive, send)
+
+
+def build_worker_app(control_socket: str):
+    """ASGI app of a streaming worker: the /dl and /hls routes with the same gates as the main app."""
+    app = FastAPI(title="Telegram Stremio stream worker", version=__version__, docs_url=None, redoc_url=None, openapi_url=None)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(ReadinessMiddleware, readiness=readiness)
+    app.include_router(stream_router)
+    app.include_router(hls_router)
+
+    routed = WorkerRouter(app, ControlProxy(control_socket))
+    return StreamApp(routed) if Telegram.STREAM_FAST_PATH else routed
@@ -0,0 +1,193 @@
+import asyncio
+import multiprocessing
+import os
+import socket
+import tempfile
+from typing import Dict, List, Optional
+
+from Backend.config import Telegram
+from Backend.logger import LOGGER
+
+# shared load table size; client index == slot, worker fallback clients count down from the end
+SHARED_SLOTS = 128
+# a worker that does not answer in time is left out of that scrape
+METRICS_TIMEOUT = 2.0
+
+
+def control_socket_path(port: int) -> str:
+    """Unix socket of the main process; workers forward everything but /dl and /hls to it."""
+    return os.path.join(tempfile.gettempdir(), f"telegram-stremio-{port}-main.sock")
+
+
+def metrics_socket_path(port: int, index: int) -> str:
+    """Unix socket on which a worker hands its metrics to the main process."""
+    return os.path.join(tempfile.gettempdir(), f"telegram-stremio-{port}-worker-{index}.sock")
+
+
+def owned_tokens(tokens: Dict[int, str], process_index: int, processes: int) -> Dict[int, str]:
+    """MULTI_TOKEN clients are dealt round-robin; process 0 is the main (control) process."""
+    return {i: t for i, t in tokens.items() if i % processes == process_index}
+
+
+class StreamWorkers:
+    """
+    STREAM_WORKERS extra processes sharing the port via SO_REUSEPORT, each
+    logged in with its own share of the MULTI_TOKEN bots. Workers serve /dl and
+    /hls themselves and forward every other request to the main process, which
+    alone runs the control bot, the Helper client (message deletes) and jobs.
+    Active stream counts live in one shared-memory array so load totals and
+    the dashboard cover every process; /metrics in the main process merges
+    the metrics of all processes, labelled by process.
+    """
+
+    def __init__(self, count: int, port: int):
+        if count > 0 and not hasattr(socket, "SO_REUSEPORT"):
+            LOGGER.warning("STREAM_WORKERS needs SO_REUSEPORT (Linux); running single-process.")
+            count = 0
+        self.count = count
+        self.port = port
+        # spawn: forking a process that owns the event loop and client threads is unsafe
+        self._ctx = multiprocessing.get_context("spawn")
+        self.loads = None
+        self._processes: List[multiprocessing.Process] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.count > 0
+
+    @property
+    def processes(self) -> int:
+        return self.count + 1
+
+    def main_tokens(self, tokens: Dict[int, str]) -> Dict[int, str]:
+        return owned_tokens(tokens, 0, self.processes) if self.enabled else tokens
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        from Backend.pyrofork.bot import work_loads
+
+        # one writer per slot (each client index lives in exactly one process), so no lock
+        self.loads = self._ctx.Array("i", [-1] * SHARED_SLOTS, lock=False)
+        work_loads.attach(self.loads)
+        for index in range(1, self.count + 1):
+            process = self._ctx.Process(
+                target=run_worker,
+                args=(index, self.processes, self.port, self.loads),
+                name=f"stream-worker-{index}",
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+        if self._processes:
+            LOGGER.info(f"Started {len(self._processes)} streaming workers on port {self.port}")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+        self._processes.clear()
+        if self.enabled:
+            for path in [control_socket_path(self.port)] + [
+                metrics_socket_path(self.port, i) for i in range(1, self.count + 1)
+            ]:
+                _unlink(path)
+
+    async def _worker_metrics(self, index: int) -> Optional[str]:
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_unix_connection(metrics_socket_path(self.port, index)), METRICS_TIMEOUT
+            )
+            try:
+                return (await asyncio.wait_for(reader.read(), METRICS_TIMEOUT)).decode()
+            finally:
+                writer.close()
+        except (OSError, asyncio.TimeoutError) as e:
+            LOGGER.debug(f"No metrics from streaming worker {index}: {e}")
+            return None
+
+    async def render_metrics(self) -> str:
+        """Metrics of this process, merged with every worker's when there are workers."""
+        from Backend.helper.metrics import merge, registry
+
+        if not self.enabled:
+            return registry.render()
+        workers = await asyncio.gather(*(self._worker_metrics(i) for i in range(1, self.count + 1)))
+        return merge([registry.render("main"), *(text for text in workers if text)])
+
+
+# -------------------------------
+# Worker process
+# -------------------------------
+def run_worker(index: int, processes: int, port: int, loads) -> None:
+    try:
+        asyncio.run(_worker_main(index, processes, port, loads))
+    except KeyboardInterrupt:
+        pass
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def _serve_metrics(index: int, port: int) -> asyncio.AbstractServer:
+    from Backend.helper.metrics import registry
+
+    async def handle(reader, writer):
+        try:
+            writer.write(registry.render(f"worker-{index}").encode())
+            await writer.drain()
+        finally:
+            writer.close()
+
+    path = metrics_socket_path(port, index)
+    _unlink(path)
+    return await asyncio.start_unix_server(handle, path=path)
+
+
+async def _worker_main(index: int, processes: int, port: int, loads) -> None:
+    import uvicorn
+
+    from Backend import db
+    from Backend.fastapi import reuseport_socket
+    from Backend.fastapi.worker_app import build_worker_app
+    from Backend.helper.http import http_pool
+    from Backend.helper.startup import readiness
+    from Backend.pyrofork.bot import multi_clients, work_loads
+    from Backend.pyrofork.clients import TokenParser, initialize_clients
+
+    work_loads.attach(loads)
+    await http_pool.start()
+    # only /dl and /hls run here; the rest goes to the main process, which owns the Helper bot
+    server = uvicorn.Server(uvicorn.Config(app=build_worker_app(control_socket_path(port)), host="0.0.0.0", port=port))
+    serving = asyncio.create_task(server.serve(sockets=[reuseport_socket(port=port)]))
+    metrics_server = await _serve_metrics(index, port)
+
+    await db.connect()
+    readiness.set("db")
+
+    tokens = owned_tokens(TokenParser.parse_from_env(), index, processes)
+    if not tokens:
+        # fewer MULTI_TOKENs than processes: stream through a no-updates session of the main bot
+        tokens = {SHARED_SLOTS - index: Telegram.BOT_TOKEN}
+    await initialize_clients(tokens, with_streambot=False)
+    readiness.set("telegram")
+    LOGGER.info(f"Streaming worker {index} ready with clients {sorted(multi_clients)}")
+
+    try:
+        await serving
+    finally:
+        metrics_server.close()
+        await asyncio.gather(*(c.stop() for c in multi_clients.values()), return_exceptions=True)
+        await db.disconnect()
+        await http_pool.close()
+
+
+stream_workers = StreamWorkers(Telegram.STREAM_WORKERS, Telegram.PORT)
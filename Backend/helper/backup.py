@@ -0,0 +1,147 @@
+import io
+import gzip
+import asyncio
+from typing import Dict, List
+from bson import json_util
+from pymongo import InsertOne, ReplaceOne
+
+from Backend import db
+from Backend.logger import LOGGER
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COLLECTIONS = ("movie", "tv")
+EXPORT_FORMATS = {"ndjson": ".ndjson", "gz": ".ndjson.gz", "zst": ".ndjson.zst"}
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+# -------------------------------
+# Blocking file helpers (run in executor)
+# -------------------------------
+def _open_writer(path: str, fmt: str):
+    if fmt == "gz":
+        return gzip.open(path, "wb", compresslevel=6)
+    if fmt == "zst":
+        if zstandard is None:
+            raise RuntimeError("zstd output requires the 'zstandard' package (install the 'zstd' extra: uv sync --extra zstd).")
+        return zstandard.ZstdCompressor(level=10).stream_writer(open(path, "wb"))
+    return open(path, "wb")
+
+
+def _open_reader(path: str):
+    with open(path, "rb") as f:
+        magic = f.read(4)
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(path, "rb")
+    if magic == ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError("zstd input requires the 'zstandard' package (install the 'zstd' extra: uv sync --extra zstd).")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")))
+    return open(path, "rb")
+
+
+def _write_lines(fh, lines: List[str]) -> None:
+    fh.write(("\n".join(lines) + "\n").encode("utf-8"))
+
+
+def _read_lines(fh, count: int) -> List[bytes]:
+    lines = []
+    while len(lines) < count:
+        line = fh.readline()
+        if not line:
+            break
+        if line.strip():
+            lines.append(line)
+    return lines
+
+
+# -------------------------------
+# Export / Import
+# -------------------------------
+async def export_database(path: str, fmt: str = "ndjson", batch_size: int = 500) -> Dict[str, int]:
+    """
+    Write every movie/tv document of every storage database as one NDJSON line:
+    {"collection": ..., "db_index": ..., "doc": {...}}
+    At most batch_size documents are held in memory at a time.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    loop = asyncio.get_running_loop()
+    fh = await loop.run_in_executor(None, _open_writer, path, fmt)
+    counts = {name: 0 for name in COLLECTIONS}
+
+    try:
+        for collection in COLLECTIONS:
+            lines = []
+            async for db_index, document in db.iter_documents(collection, batch_size=batch_size):
+                lines.append(json_util.dumps(
+                    {"collection": collection, "db_index": db_index, "doc": document},
+                    ensure_ascii=False
+                ))
+                counts[collection] += 1
+                if len(lines) >= batch_size:
+                    await loop.run_in_executor(None, _write_lines, fh, lines)
+                    lines = []
+            if lines:
+                await loop.run_in_executor(None, _write_lines, fh, lines)
+    finally:
+        await loop.run_in_executor(None, fh.close)
+
+    return counts
+
+
+async def import_database(path: str, batch_size: int = 500) -> Dict[str, int]:
+    """
+    Restore an export produced by export_database (plain, gzip or zstd).
+    Documents are upserted by _id into their original storage database,
+    or into the active one if that database no longer exists.
+    """
+    loop = asyncio.get_running_loop()
+    fh = await loop.run_in_executor(None, _open_reader, path)
+    storage_indexes = set(db.storage_indexes())
+    counts = {name: 0 for name in COLLECTIONS}
+
+    try:
+        while True:
+            lines = await loop.run_in_executor(None, _read_lines, fh, batch_size)
+            if not lines:
+                break
+
+            grouped: Dict[tuple, list] = {}
+            for line in lines:
+                record = json_util.loads(line)
+                collection = record.get("collection")
+                document = record.get("doc")
+                if collection not in COLLECTIONS or not document:
+                    continue
+
+                db_index = record.get("db_index")
+                if db_index not in storage_indexes:
+                    db_index = db.current_db_index
+                document["db_index"] = db_index
+
+                if "_id" in document:
+                    op = ReplaceOne({"_id": document["_id"]}, document, upsert=True)
+                else:
+                    op = InsertOne(document)
+                grouped.setdefault((db_index, collection), []).append(op)
+
+            for (db_index, collection), ops in grouped.items():
+                await db.dbs[f"storage_{db_index}"][collection].bulk_write(ops, ordered=False)
+                counts[collection] += len(ops)
+    except Exception as e:
+        LOGGER.error(f"Import failed for {path}: {e}")
+        raise
+    finally:
+        await loop.run_in_executor(None, fh.close)
+
+    if any(counts.values()):
+        await db.stats.mark_stale()
+    return counts
@@ -0,0 +1,366 @@
+import asyncio
+import struct
+import sys
+from array import array
+from typing import Awaitable, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from Backend.logger import LOGGER
+
+# GetFile granularity; every remote read is served from whole, aligned parts
+PART = 1024 * 1024
+# Cues / moov bigger than this are not worth indexing
+MAX_INDEX_BYTES = 32 * 1024 * 1024
+# level-1 elements / top-level boxes looked at before giving up
+MAX_SCAN = 64
+
+FetchPart = Callable[[int], Awaitable[bytes]]
+Keyframes = List[Tuple[int, float]]
+
+
+class RangeReader:
+    """Random access to a remote file through PART-aligned reads; each part is fetched once."""
+
+    def __init__(self, fetch_part: FetchPart, size: int):
+        self.fetch_part = fetch_part
+        self.size = size
+        self.parts: Dict[int, bytes] = {}
+
+    async def _part(self, n: int) -> None:
+        self.parts[n] = await self.fetch_part(n)
+
+    async def read(self, offset: int, length: int) -> bytes:
+        end = min(offset + length, self.size)
+        if offset >= end:
+            return b""
+        first, last = offset // PART, (end - 1) // PART
+        missing = [n for n in range(first, last + 1) if n not in self.parts]
+        if missing:
+            await asyncio.gather(*(self._part(n) for n in missing))
+        data = b"".join(self.parts[n] for n in range(first, last + 1))
+        start = offset - first * PART
+        return data[start:start + end - offset]
+
+
+class SegmentIndex(NamedTuple):
+    """
+    Keyframe-aligned byte ranges of a file. offsets[i] is where segment i
+    starts; everything before offsets[0] (EBML header, tracks, moov, ...) is
+    the init section. Segment i ends where i + 1 starts, the last one at EOF.
+    index_range is the [start, end) span of the Cues / moov players read to seek,
+    None when the file has none.
+    """
+    container: str
+    size: int
+    offsets: List[int]
+    times: List[float]
+    duration: float
+    index_range: Optional[Tuple[int, int]] = None
+
+    @property
+    def count(self) -> int:
+        return len(self.offsets)
+
+    def init_range(self) -> Tuple[int, int]:
+        return 0, self.offsets[0] - 1
+
+    def segment_range(self, n: int) -> Tuple[int, int]:
+        end = self.offsets[n + 1] if n + 1 < self.count else self.size
+        return self.offsets[n], end - 1
+
+    def segment_duration(self, n: int) -> float:
+        end = self.times[n + 1] if n + 1 < self.count else self.duration
+        return max(end - self.times[n], 0.001)
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SegmentIndex":
+        fields = {field: data[field] for field in cls._fields if field in data}
+        if fields.get("index_range"):
+            fields["index_range"] = tuple(fields["index_range"])
+        return cls(**fields)
+
+
+def _segments(
+    container: str, size: int, header_end: int, keyframes: Keyframes, duration: float, target: float,
+    index_range: Optional[Tuple[int, int]] = None,
+) -> SegmentIndex:
+    offsets, times = [header_end], [0.0]
+    for offset, time in sorted(keyframes):
+        if offset > offsets[-1] and time - times[-1] >= target:
+            offsets.append(offset)
+            times.append(time)
+    if duration <= times[-1]:
+        duration = times[-1] + target
+    return SegmentIndex(container, size, offsets, times, duration, index_range)
+
+
+# -------------------------------
+# Matroska
+# -------------------------------
+EBML_HEADER, SEGMENT = 0x1A45DFA3, 0x18538067
+SEEK_HEAD, INFO, CLUSTER, CUES = 0x114D9B74, 0x1549A966, 0x1F43B675, 0x1C53BB6B
+SEEK, SEEK_ID, SEEK_POSITION = 0x4DBB, 0x53AB, 0x53AC
+TIMESTAMP_SCALE, DURATION = 0x2AD7B1, 0x4489
+CUE_POINT, CUE_TIME, CUE_TRACK_POSITIONS, CUE_CLUSTER_POSITION = 0xBB, 0xB3, 0xB7, 0xF1
+
+
+def _vint(data: bytes, pos: int, keep_marker: bool) -> Tuple[Optional[int], int]:
+    first = data[pos]
+    if not first:
+        raise ValueError("invalid EBML vint")
+    length = 9 - first.bit_length()
+    if pos + length > len(data):
+        raise ValueError("truncated EBML vint")
+    value = first if keep_marker else first & ((1 << (8 - length)) - 1)
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return None, length  # unknown size
+    return value, length
+
+
+def _element(data: bytes, pos: int) -> Tuple[int, Optional[int], int]:
+    """(id, payload size or None if unknown, header length) of the element at pos."""
+    eid, id_len = _vint(data, pos, keep_marker=True)
+    size, size_len = _vint(data, pos + id_len, keep_marker=False)
+    return eid, size, id_len + size_len
+
+
+def _children(data: bytes, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+    pos = start
+    while pos < end:
+        eid, size, header = _element(data, pos)
+        if size is None:
+            return
+        yield eid, pos + header, size
+        pos += header + size
+
+
+def _uint(data: bytes, start: int, size: int) -> int:
+    return int.from_bytes(data[start:start + size], "big")
+
+
+async def _index_mkv(reader: RangeReader, target: float) -> Optional[SegmentIndex]:
+    _, size, header = _element(await reader.read(0, 64), 0)
+    pos = header + size
+    eid, segment_size, header = _element(await reader.read(pos, 16), 0)
+    if eid != SEGMENT:
+        return None
+    segment = pos + header
+    segment_end = segment + segment_size if segment_size is not None else reader.size
+
+    scale, duration = 1_000_000, 0.0
+    cues_at = first_cluster = None
+    pos = segment
+    for _ in range(MAX_SCAN):
+        if pos >= segment_end:
+            break
+        eid, size, header = _element(await reader.read(pos, 16), 0)
+        if eid == CLUSTER:
+            first_cluster = pos
+            break
+        if size is None:
+            return None
+        if eid == CUES:
+            cues_at = pos
+        elif eid in (SEEK_HEAD, INFO) and size <= MAX_INDEX_BYTES:
+            body = await reader.read(pos + header, size)
+            for cid, start, length in _children(body, 0, len(body)):
+                if eid == INFO and cid == TIMESTAMP_SCALE:
+                    scale = _uint(body, start, length)
+                elif eid == INFO and cid == DURATION:
+                    duration = struct.unpack(">f" if length == 4 else ">d", body[start:start + length])[0]
+                elif eid == SEEK_HEAD and cid == SEEK:
+                    entry = {sid: _uint(body, s, n) for sid, s, n in _children(body, start, start + length)}
+                    if entry.get(SEEK_ID) == CUES and SEEK_POSITION in entry:
+                        cues_at = segment + entry[SEEK_POSITION]
+        pos += header + size
+
+    if first_cluster is None:
+        return None
+    if cues_at is None:
+        return _segments("mkv", reader.size, first_cluster, [], duration * scale / 1e9, target)
+    eid, size, header = _element(await reader.read(cues_at, 16), 0)
+    if eid != CUES or size is None or size > MAX_INDEX_BYTES:
+        return None
+    cues = await reader.read(cues_at + header, size)
+
+    # cluster offset -> earliest cue time pointing at it
+    points: Dict[int, int] = {}
+    for eid, start, length in _children(cues, 0, len(cues)):
+        if eid != CUE_POINT:
+            continue
+        time, clusters = None, []
+        for cid, cstart, clength in _children(cues, start, start + length):
+            if cid == CUE_TIME:
+                time = _uint(cues, cstart, clength)
+            elif cid == CUE_TRACK_POSITIONS:
+                clusters += [
+                    _uint(cues, s, n) for tid, s, n in _children(cues, cstart, cstart + clength)
+                    if tid == CUE_CLUSTER_POSITION
+                ]
+        if time is None:
+            continue
+        for position in clusters:
+            offset = segment + position
+            if offset >= first_cluster and time < points.get(offset, time + 1):
+                points[offset] = time
+
+    seconds = scale / 1e9
+    keyframes = [(offset, time * seconds) for offset, time in points.items()]
+    return _segments(
+        "mkv", reader.size, first_cluster, keyframes, duration * seconds, target,
+        index_range=(cues_at, cues_at + header + size),
+    )
+
+
+# -------------------------------
+# MP4 / MOV
+# -------------------------------
+def _boxes(data: bytes, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            size, header = struct.unpack_from(">Q", data, pos + 8)[0], 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _child(data: bytes, start: int, end: int, kind: bytes) -> Optional[Tuple[int, int]]:
+    return next(((s, e) for k, s, e in _boxes(data, start, end) if k == kind), None)
+
+
+def _table(data: bytes, start: int, count: int, typecode: str = "I") -> array:
+    values = array(typecode)
+    values.frombytes(data[start:start + count * values.itemsize])
+    if sys.byteorder == "little":
+        values.byteswap()
+    return values
+
+
+def _video_keyframes(moov: bytes) -> Optional[Tuple[Keyframes, float]]:
+    """Byte offset and time of every sync sample of the first video track."""
+    for kind, start, end in _boxes(moov, 0, len(moov)):
+        if kind != b"trak":
+            continue
+        mdia = _child(moov, start, end, b"mdia")
+        hdlr = mdia and _child(moov, *mdia, b"hdlr")
+        if not hdlr or moov[hdlr[0] + 8:hdlr[0] + 12] != b"vide":
+            continue
+        mdhd = _child(moov, *mdia, b"mdhd")
+        minf = _child(moov, *mdia, b"minf")
+        stbl = minf and _child(moov, *minf, b"stbl")
+        if not mdhd or not stbl:
+            return None
+        if moov[mdhd[0]] == 1:
+            timescale, duration = struct.unpack_from(">IQ", moov, mdhd[0] + 20)
+        else:
+            timescale, duration = struct.unpack_from(">II", moov, mdhd[0] + 12)
+
+        boxes = {k: (s, e) for k, s, e in _boxes(moov, *stbl)}
+        if not timescale or b"stts" not in boxes or b"stsc" not in boxes or b"stsz" not in boxes:
+            return None
+
+        def counted(kind: bytes, width: int = 1, typecode: str = "I") -> array:
+            s = boxes[kind][0]
+            return _table(moov, s + 8, struct.unpack_from(">I", moov, s + 4)[0] * width, typecode)
+
+        stts = counted(b"stts", 2)
+        stsc = counted(b"stsc", 3)
+        sync = set(counted(b"stss")) if b"stss" in boxes else None
+        if b"stco" in boxes:
+            chunks = counted(b"stco")
+        elif b"co64" in boxes:
+            chunks = counted(b"co64", 1, "Q")
+        else:
+            return None
+        s = boxes[b"stsz"][0]
+        sample_size, sample_count = struct.unpack_from(">II", moov, s + 4)
+        sizes = None if sample_size else _table(moov, s + 12, sample_count)
+
+        keyframes: Keyframes = []
+        sample = time = 0
+        stts_i, stts_left = 0, stts[0] if stts else 0
+        stsc_i = 0
+        for chunk, offset in enumerate(chunks, start=1):
+            while stsc_i + 3 < len(stsc) and stsc[stsc_i + 3] <= chunk:
+                stsc_i += 3
+            for _ in range(stsc[stsc_i + 1]):
+                if sample >= sample_count:
+                    break
+                sample += 1
+                if sync is None or sample in sync:
+                    keyframes.append((offset, time / timescale))
+                offset += sizes[sample - 1] if sizes is not None else sample_size
+                while stts_left == 0 and stts_i + 2 < len(stts):
+                    stts_i += 2
+                    stts_left = stts[stts_i]
+                if stts_left:
+                    time += stts[stts_i + 1]
+                    stts_left -= 1
+        return keyframes, duration / timescale
+    return None
+
+
+async def _index_mp4(reader: RangeReader, target: float) -> Optional[SegmentIndex]:
+    moov = mdat = None
+    pos = 0
+    for _ in range(MAX_SCAN):
+        if (moov and mdat) or pos + 8 > reader.size:
+            break
+        head = await reader.read(pos, 16)
+        size, kind = struct.unpack_from(">I4s", head)
+        header = 8
+        if size == 1:
+            size, header = struct.unpack_from(">Q", head, 8)[0], 16
+        elif size == 0:
+            size = reader.size - pos
+        if size < header:
+            return None
+        if kind == b"moov":
+            moov = (pos, header, size)
+        elif kind == b"mdat":
+            mdat = pos + header
+        pos += size
+
+    # moov after mdat is indexed too; its init section just lacks the moov
+    if moov is None or mdat is None or moov[2] > MAX_INDEX_BYTES:
+        return None
+    start, header, size = moov
+    parsed = await asyncio.to_thread(_video_keyframes, await reader.read(start + header, size - header))
+    if parsed is None:
+        return None
+    keyframes, duration = parsed
+    return _segments(
+        "mp4", reader.size, mdat, [k for k in keyframes if k[0] >= mdat], duration, target,
+        index_range=(start, start + size),
+    )
+
+
+# -------------------------------
+# Entry point
+# -------------------------------
+async def build_index(reader: RangeReader, target: float = 6.0) -> Optional[SegmentIndex]:
+    """
+    Segment index of an MKV (from its Cues) or MP4 (from the moov sample
+    tables) with segments of at least `target` seconds. Reads only the
+    header and the index region. An MKV without Cues gets a single segment
+    and no index_range; None when the container is not recognised.
+    """
+    try:
+        head = await reader.read(0, 16)
+        if head[:4] == EBML_HEADER.to_bytes(4, "big"):
+            return await _index_mkv(reader, target)
+        if head[4:8] in (b"ftyp", b"moov", b"free", b"skip", b"wide", b"mdat"):
+            return await _index_mp4(reader, target)
+    except (ValueError, IndexError, struct.error) as e:
+        LOGGER.warning(f"Could not index container: {e}")
+    return None
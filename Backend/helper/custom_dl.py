@@ -1,13 +1,18 @@
 import asyncio
+from contextlib import nullcontext
+from time import perf_counter
 from pyrogram import utils, raw
 from pyrogram.errors import AuthBytesInvalid
 from pyrogram.file_id import FileId, FileType, ThumbnailSource
 from pyrogram.session import Session, Auth
-from typing import Dict, Union
+from typing import AsyncGenerator, Dict, Optional, Tuple, Union
 from Backend.logger import LOGGER
+from Backend.helper.container_index import PART, FetchPart
 from Backend.helper.exceptions import FIleNotFound
+from Backend.helper.metrics import FILEID_CACHE, GETFILE_SECONDS
 from Backend.helper.pyro import get_file_ids
-from Backend.pyrofork.bot import work_loads
+from Backend.helper.stream_scheduler import Flow
+from Backend.pyrofork.bot import work_loads, multi_clients
 from pyrogram import Client, utils, raw
 
 
@@ -19,7 +24,10 @@ class ByteStreamer:
         asyncio.create_task(self.clean_cache())
 
     async def get_file_properties(self, chat_id: int, message_id: int) -> FileId:
-        if message_id not in self.__cached_file_ids:
+        if message_id in self.__cached_file_ids:
+            FILEID_CACHE.inc(1, "hit")
+        else:
+            FILEID_CACHE.inc(1, "miss")
             file_id = await get_file_ids(self.client, int(chat_id), int(message_id))
             if not file_id:
                 LOGGER.info('Message with ID %s not found!', message_id)
@@ -27,45 +35,60 @@ class ByteStreamer:
             self.__cached_file_ids[message_id] = file_id
         return self.__cached_file_ids[message_id]
 
-    async def yield_file(self, file_id: FileId, index: int, offset: int, first_part_cut: int, last_part_cut: int, part_count: int, chunk_size: int) -> Union[str, None]: # type: ignore
+    async def yield_file(self, file_id: FileId, index: int, offset: int, first_part_cut: int, last_part_cut: int, part_count: int, chunk_size: int, flow: Optional[Flow] = None) -> AsyncGenerator[memoryview, None]:
         client = self.client
+        if flow:
+            await flow.open()
         work_loads[index] += 1
         LOGGER.debug(f"Starting to yielding file with client {index}.")
-        media_session = await self.generate_media_session(client, file_id)
         current_part = 1
-        location = await self.get_location(file_id)
+        labels = (str(file_id.dc_id), str(index))
         try:
-            r = await media_session.send(raw.functions.upload.GetFile(location=location, offset=offset, limit=chunk_size))
+            media_session = await self.generate_media_session(client, file_id)
+            location = await self.get_location(file_id)
+            r = await self.get_part(media_session, location, offset, chunk_size, flow, labels)
             if isinstance(r, raw.types.upload.File):
                 while True:
-                    chunk = r.bytes
+                    # slices of a memoryview share r.bytes; bytes slicing copied up to 1 MiB per edge part
+                    chunk = memoryview(r.bytes)
+                    r = None
                     if not chunk:
                         break
                     elif part_count == 1:
-                        yield chunk[first_part_cut:last_part_cut]
+                        chunk = chunk[first_part_cut:last_part_cut]
                     elif current_part == 1:
-                        yield chunk[first_part_cut:]
+                        chunk = chunk[first_part_cut:]
                     elif current_part == part_count:
-                        yield chunk[:last_part_cut]
-                    else:
-                        yield chunk
+                        chunk = chunk[:last_part_cut]
+                    yield chunk
+                    if flow:
+                        await flow.sent(len(chunk))
+                    # sent by now; don't keep this part alive while the next GetFile is in flight
+                    chunk = None
 
                     current_part += 1
                     offset += chunk_size
 
                     if current_part > part_count:
                         break
-                    
-                    r = await media_session.send(
-                        raw.functions.upload.GetFile(
-                            location=location, offset=offset, limit=chunk_size
-                        ),
-                    )
+
+                    r = await self.get_part(media_session, location, offset, chunk_size, flow, labels)
         except (TimeoutError, AttributeError):
             pass
         finally:
             LOGGER.debug("Finished yielding file with {current_part} parts.")
             work_loads[index] -= 1
+            if flow:
+                flow.close()
+
+    @staticmethod
+    async def get_part(media_session: Session, location, offset: int, chunk_size: int, flow: Optional[Flow], labels: tuple):
+        # the scheduler decides which stream's part goes next when the bots are saturated
+        async with flow.getfile() if flow else nullcontext():
+            started = perf_counter()
+            r = await media_session.send(raw.functions.upload.GetFile(location=location, offset=offset, limit=chunk_size))
+            GETFILE_SECONDS.observe(perf_counter() - started, *labels)
+        return r
 
     async def generate_media_session(self, client: Client, file_id: FileId) -> Session:
         media_session = client.media_sessions.get(file_id.dc_id, None)
@@ -144,3 +167,30 @@ class ByteStreamer:
             await asyncio.sleep(self.clean_timer)
             self.__cached_file_ids.clear()
             LOGGER.debug("Cleaned the cache")
+
+
+class_cache: Dict[Client, ByteStreamer] = {}
+
+
+def pick_streamer() -> Tuple[int, ByteStreamer]:
+    """Least loaded stream client and its ByteStreamer."""
+    index = min(work_loads, key=work_loads.get)
+    faster_client = multi_clients[index]
+
+    tg_connect = class_cache.get(faster_client)
+    if not tg_connect:
+        tg_connect = ByteStreamer(faster_client)
+        class_cache[faster_client] = tg_connect
+    return index, tg_connect
+
+
+def part_reader(tg_connect: ByteStreamer, index: int, file_id: FileId) -> FetchPart:
+    """Whole PART-aligned reads of one file, for the container indexer."""
+    async def fetch_part(n: int) -> bytes:
+        data = b"".join([chunk async for chunk in tg_connect.yield_file(file_id, index, n * PART, 0, PART, 1, PART)])
+        if len(data) < min(PART, file_id.file_size - n * PART):
+            # yield_file ends quietly on GetFile timeouts; don't index a truncated read
+            raise ConnectionError(f"short read of part {n}")
+        return data
+
+    return fetch_part
@@ -1,16 +1,19 @@
-from asyncio import create_task
+from asyncio import create_task, gather
 from bson import ObjectId
 import motor.motor_asyncio
 from datetime import datetime
 from pydantic import ValidationError
-from pymongo import ASCENDING, DESCENDING
+from pymongo import ASCENDING, DESCENDING, InsertOne, ReplaceOne
+from pymongo.errors import BulkWriteError
 from typing import Dict, List, Optional, Tuple, Any
 
 from Backend.logger import LOGGER
 from Backend.config import Telegram
 import re
 from Backend.helper.encrypt import decode_string, encode_string
+from Backend.helper.metrics import MONGO_METHOD_SECONDS, MongoCommandMetrics, timed_methods
 from Backend.helper.modal import Episode, MovieSchema, QualityDetail, Season, TVShowSchema
+from Backend.helper.stats import LibraryStats, iter_entries
 from Backend.helper.task_manager import delete_message
 
 
@@ -25,6 +28,7 @@ def convert_objectid_to_str(document: Dict[str, Any]) -> Dict[str, Any]:
     return document
 
 
+@timed_methods(MONGO_METHOD_SECONDS, exclude=("connect", "disconnect"))
 class Database:
     def __init__(self, db_name: str = "dbFyvio"):
         self.db_uris = Telegram.DATABASE
@@ -37,12 +41,13 @@ class Database:
         self.dbs: Dict[str, motor.motor_asyncio.AsyncIOMotorDatabase] = {}
 
         self.current_db_index = 1
+        self.stats = LibraryStats(self)
 
     async def connect(self):
         try:
             for index, uri in enumerate(self.db_uris):
-                client = motor.motor_asyncio.AsyncIOMotorClient(uri)
                 db_key = "tracking" if index == 0 else f"storage_{index}"
+                client = motor.motor_asyncio.AsyncIOMotorClient(uri, event_listeners=[MongoCommandMetrics(db_key)])
                 self.clients[db_key] = client
                 self.dbs[db_key] = client[self.db_name]
                 db_type = "Tracking" if index == 0 else f"Storage {index}"
@@ -60,10 +65,26 @@ class Database:
                 self.current_db_index = state["current_index"]
 
             LOGGER.info(f"Active storage DB: storage_{self.current_db_index}")
+            await self.ensure_indexes()
 
         except Exception as e:
             LOGGER.error(f"Database connection error: {e}")
 
+    async def ensure_indexes(self):
+        index_fields = {
+            "movie": ["tmdb_id", "imdb_id", "telegram.id", "telegram.name"],
+            "tv": ["tmdb_id", "imdb_id", "seasons.episodes.telegram.id", "seasons.episodes.telegram.name"],
+        }
+        tasks = [
+            self.dbs[f"storage_{db_index}"][collection_name].create_index(field)
+            for db_index in self.storage_indexes()
+            for collection_name, fields in index_fields.items()
+            for field in fields
+        ]
+        for result in await gather(*tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                LOGGER.warning(f"Index creation failed: {result}")
+
     async def disconnect(self):
         for client in self.clients.values():
             client.close()
@@ -80,6 +101,23 @@ class Database:
     # -------------------------------
     # Helper Methods for Repeated Logic
     # -------------------------------
+    def storage_indexes(self) -> List[int]:
+        return sorted(int(key.split("_")[1]) for key in self.dbs if key.startswith("storage_"))
+
+    async def iter_documents(
+        self,
+        collection_name: str,
+        filter_dict: Optional[dict] = None,
+        projection: Optional[dict] = None,
+        batch_size: int = 500
+    ):
+        for db_index in self.storage_indexes():
+            cursor = self.dbs[f"storage_{db_index}"][collection_name].find(
+                filter_dict or {}, projection, batch_size=batch_size
+            )
+            async for document in cursor:
+                yield db_index, document
+
     def _get_sort_dict(self, sort_params: List[Tuple[str, str]]) -> Dict[str, int]:
         if sort_params:
             sort_field, sort_direction = sort_params[0]
@@ -159,6 +197,28 @@ class Database:
             LOGGER.error(f"Error moving document to {current_db_key}: {e}")
             return False
 
+    async def _find_existing(
+        self, collection_name: str, imdb_id: Optional[str], tmdb_id: Optional[int],
+        title: Optional[str], release_year: Optional[int]
+    ) -> Tuple[Optional[dict], Optional[int]]:
+        for db_index in self.storage_indexes():
+            collection = self.dbs[f"storage_{db_index}"][collection_name]
+            document = None
+
+            if imdb_id:
+                document = await collection.find_one({"imdb_id": imdb_id})
+            if not document and tmdb_id:
+                document = await collection.find_one({"tmdb_id": tmdb_id})
+            if not document and title and release_year:
+                document = await collection.find_one({
+                    "title": title,
+                    "release_year": release_year
+                })
+
+            if document:
+                return document, db_index
+        return None, None
+
     async def _handle_storage_error(self, func, *args, total_storage_dbs: int) -> Optional[Any]:
         next_db_index = (self.current_db_index % total_storage_dbs) + 1
         if next_db_index == 1:
@@ -174,13 +234,9 @@ class Database:
     # Multi Database Method for insert/update/delete/list
     # -------------------------------
 
-    async def insert_media(
-        self, metadata_info: dict,
-        channel: int, msg_id: int, size: str, name: str
-    ) -> Optional[ObjectId]:
-        
+    def build_media(self, metadata_info: dict, quality: QualityDetail):
         if metadata_info['media_type'] == "movie":
-            media = MovieSchema(
+            return MovieSchema(
                 tmdb_id=metadata_info['tmdb_id'],
                 imdb_id=metadata_info['imdb_id'],
                 db_index=self.current_db_index,
@@ -195,48 +251,174 @@ class Database:
                 cast=metadata_info['cast'],
                 runtime=metadata_info['runtime'],
                 media_type=metadata_info['media_type'],
-                telegram=[QualityDetail(
-                    quality=metadata_info['quality'],
-                    id=metadata_info['encoded_string'],
-                    name=name,
-                    size=size
-                )]
+                telegram=[quality]
             )
-            return await self.update_movie(media)
-        else:
-            tv_show = TVShowSchema(
-                tmdb_id=metadata_info['tmdb_id'],
-                imdb_id=metadata_info['imdb_id'],
-                db_index=self.current_db_index,
-                title=metadata_info['title'],
-                genres=metadata_info['genres'],
-                description=metadata_info['description'],
-                rating=metadata_info['rate'],
-                release_year=metadata_info['year'],
-                poster=metadata_info['poster'],
-                backdrop=metadata_info['backdrop'],
-                logo=metadata_info['logo'],
-                cast=metadata_info['cast'],
-                runtime=metadata_info['runtime'],
-                media_type=metadata_info['media_type'],
-                seasons=[Season(
-                    season_number=metadata_info['season_number'],
-                    episodes=[Episode(
-                        episode_number=metadata_info['episode_number'],
-                        title=metadata_info['episode_title'],
-                        episode_backdrop=metadata_info['episode_backdrop'],
-                        overview=metadata_info['episode_overview'],
-                        released=metadata_info['episode_released'],
-                        telegram=[QualityDetail(
-                            quality=metadata_info['quality'],
-                            id=metadata_info['encoded_string'],
-                            name=name,
-                            size=size
-                        )]
-                    )]
+        return TVShowSchema(
+            tmdb_id=metadata_info['tmdb_id'],
+            imdb_id=metadata_info['imdb_id'],
+            db_index=self.current_db_index,
+            title=metadata_info['title'],
+            genres=metadata_info['genres'],
+            description=metadata_info['description'],
+            rating=metadata_info['rate'],
+            release_year=metadata_info['year'],
+            poster=metadata_info['poster'],
+            backdrop=metadata_info['backdrop'],
+            logo=metadata_info['logo'],
+            cast=metadata_info['cast'],
+            runtime=metadata_info['runtime'],
+            media_type=metadata_info['media_type'],
+            seasons=[Season(
+                season_number=metadata_info['season_number'],
+                episodes=[Episode(
+                    episode_number=metadata_info['episode_number'],
+                    title=metadata_info['episode_title'],
+                    episode_backdrop=metadata_info['episode_backdrop'],
+                    overview=metadata_info['episode_overview'],
+                    released=metadata_info['episode_released'],
+                    telegram=[quality]
                 )]
+            )]
+        )
+
+    async def insert_media(
+        self, metadata_info: dict,
+        channel: int, msg_id: int, size: str, name: str
+    ) -> Optional[ObjectId]:
+        media = self.build_media(metadata_info, QualityDetail(
+            quality=metadata_info['quality'],
+            id=metadata_info['encoded_string'],
+            name=name,
+            size=size
+        ))
+        if metadata_info['media_type'] == "movie":
+            return await self.update_movie(media)
+        return await self.update_tv_show(media)
+
+    @staticmethod
+    def _append_links(document: dict, media_dict: dict) -> None:
+        if media_dict["media_type"] == "movie":
+            document.setdefault("telegram", []).extend(media_dict["telegram"])
+            return
+
+        for season in media_dict["seasons"]:
+            existing_season = next(
+                (s for s in document.setdefault("seasons", [])
+                if s["season_number"] == season["season_number"]),
+                None
+            )
+            if not existing_season:
+                document["seasons"].append(season)
+                continue
+
+            for episode in season["episodes"]:
+                existing_episode = next(
+                    (e for e in existing_season["episodes"]
+                    if e["episode_number"] == episode["episode_number"]),
+                    None
+                )
+                if not existing_episode:
+                    existing_season["episodes"].append(episode)
+                else:
+                    existing_episode.setdefault("telegram", []).extend(episode["telegram"])
+
+    async def insert_links(self, entries: List[Tuple[dict, QualityDetail]]) -> Dict[str, int]:
+        """
+        Bulk insert external links: entries are (metadata_info, quality) pairs.
+        Entries are grouped per title, every title is looked up once across the
+        storage databases and all writes go out as one bulk_write per collection.
+        Links are always appended, REPLACE_MODE does not apply to them.
+        """
+        groups: Dict[tuple, List[dict]] = {}
+        counts = {"movie": 0, "tv": 0, "failed": 0}
+
+        for metadata_info, quality in entries:
+            try:
+                media_dict = self.build_media(metadata_info, quality).dict()
+            except ValidationError as e:
+                LOGGER.error(f"Validation error for {quality.name}: {e}")
+                counts["failed"] += 1
+                continue
+            key = (
+                media_dict["media_type"],
+                media_dict["imdb_id"] or media_dict["tmdb_id"] or f"{media_dict['title']}:{media_dict['release_year']}"
             )
-            return await self.update_tv_show(tv_show)
+            groups.setdefault(key, []).append(media_dict)
+
+        # (document, replace): documents that already have a shard are replaced, new ones inserted
+        writes: Dict[Tuple[int, str], List[Tuple[dict, bool]]] = {}
+        stats = {name: {"added": [], "titles": 0, "genres": []} for name in ("movie", "tv")}
+
+        for (media_type, _), media_dicts in groups.items():
+            first = media_dicts[0]
+            existing, existing_db_index = await self._find_existing(
+                media_type, first["imdb_id"], first["tmdb_id"], first["title"], first["release_year"]
+            )
+
+            if existing:
+                for media_dict in media_dicts:
+                    self._append_links(existing, media_dict)
+                existing["updated_on"] = datetime.utcnow()
+                writes.setdefault((existing_db_index, media_type), []).append((existing, True))
+            else:
+                document = first
+                for media_dict in media_dicts[1:]:
+                    self._append_links(document, media_dict)
+                writes.setdefault((self.current_db_index, media_type), []).append((document, False))
+                stats[media_type]["titles"] += 1
+                stats[media_type]["genres"].extend(document.get("genres") or [])
+
+            counts[media_type] += len(media_dicts)
+            for media_dict in media_dicts:
+                stats[media_type]["added"].extend(media_dict.get("telegram") or [])
+                for season in media_dict.get("seasons") or []:
+                    for episode in season["episodes"]:
+                        stats[media_type]["added"].extend(episode["telegram"])
+
+        for (db_index, collection_name), documents in writes.items():
+            await self._write_links(db_index, collection_name, documents)
+
+        for media_type, delta in stats.items():
+            await self.stats.apply(media_type, **delta)
+
+        return counts
+
+    async def _write_links(self, db_index: int, collection_name: str, documents: List[Tuple[dict, bool]]) -> None:
+        """
+        One bulk_write of insert_links. When the shard is full, the documents it
+        rejected move on like in update_movie / update_tv_show: into the active
+        storage DB, switching to the next one if the active DB is the full one.
+        """
+        ops = [ReplaceOne({"_id": d["_id"]}, d) if replace else InsertOne(d) for d, replace in documents]
+        try:
+            await self.dbs[f"storage_{db_index}"][collection_name].bulk_write(ops, ordered=False)
+            return
+        except BulkWriteError as e:
+            error = e
+            rejected = [documents[err["index"]] for err in e.details.get("writeErrors", [])]
+        except Exception as e:
+            error = e
+            rejected = documents
+
+        LOGGER.error(f"Link bulk write failed in storage_{db_index}: {error}")
+        if not any(keyword in str(error).lower() for keyword in ["storage", "quota"]):
+            raise error
+
+        if db_index != self.current_db_index:
+            await self._move_links(collection_name, rejected, db_index)
+        elif await self._handle_storage_error(
+            self._move_links, collection_name, rejected, db_index, total_storage_dbs=len(self.dbs) - 1
+        ) is None:
+            raise error
+
+    async def _move_links(self, collection_name: str, documents: List[Tuple[dict, bool]], from_db_index: int) -> bool:
+        for document, _ in documents:
+            document["db_index"] = self.current_db_index
+        await self._write_links(self.current_db_index, collection_name, [(d, False) for d, _ in documents])
+        moved = [d["_id"] for d, replace in documents if replace]
+        if moved:
+            await self.dbs[f"storage_{from_db_index}"][collection_name].delete_many({"_id": {"$in": moved}})
+        return True
 
     async def update_movie(self, movie_data: MovieSchema) -> Optional[ObjectId]:
         try:
@@ -256,35 +438,19 @@ class Database:
         current_db_key = f"storage_{self.current_db_index}"
         total_storage_dbs = len(self.dbs) - 1
 
-        existing_movie = None
-        existing_db_key = None
-        existing_db_index = None
-
-        for db_index in range(1, total_storage_dbs + 1):
-            db_key = f"storage_{db_index}"
-            movie = None
-
-            if imdb_id:
-                movie = await self.dbs[db_key]["movie"].find_one({"imdb_id": imdb_id})
-            if not movie and tmdb_id:
-                movie = await self.dbs[db_key]["movie"].find_one({"tmdb_id": tmdb_id})
-            if not movie and title and release_year:
-                movie = await self.dbs[db_key]["movie"].find_one({
-                    "title": title,
-                    "release_year": release_year
-                })
-
-            if movie:
-                existing_movie = movie
-                existing_db_key = db_key
-                existing_db_index = db_index
-                break
+        existing_movie, existing_db_index = await self._find_existing(
+            "movie", imdb_id, tmdb_id, title, release_year
+        )
+        existing_db_key = f"storage_{existing_db_index}" if existing_movie else None
 
         # ---------------- INSERT NEW MOVIE ----------------
         if not existing_movie:
             try:
                 movie_dict["db_index"] = self.current_db_index
                 result = await self.dbs[current_db_key]["movie"].insert_one(movie_dict)
+                await self.stats.apply(
+                    "movie", added=movie_dict["telegram"], titles=1, genres=movie_dict.get("genres") or []
+                )
                 return result.inserted_id
             except Exception as e:
                 LOGGER.error(f"Insertion failed in {current_db_key}: {e}")
@@ -295,6 +461,7 @@ class Database:
         # ---------------- UPDATE MOVIE ----------------
         movie_id = existing_movie["_id"]
         existing_qualities = existing_movie.get("telegram", [])
+        to_delete = []
 
         if Telegram.REPLACE_MODE:
             # delete all same-quality entries
@@ -326,6 +493,7 @@ class Database:
         if existing_db_index != self.current_db_index:
             try:
                 if await self._move_document("movie", existing_movie, existing_db_index):
+                    await self.stats.apply("movie", added=[quality_to_update], removed=to_delete)
                     return movie_id
             except Exception as e:
                 LOGGER.error(f"Error moving movie to {current_db_key}: {e}")
@@ -334,6 +502,7 @@ class Database:
 
         try:
             await self.dbs[existing_db_key]["movie"].replace_one({"_id": movie_id}, existing_movie)
+            await self.stats.apply("movie", added=[quality_to_update], removed=to_delete)
             return movie_id
         except Exception as e:
             LOGGER.error(f"Failed to update movie {tmdb_id} in {existing_db_key}: {e}")
@@ -355,35 +524,19 @@ class Database:
         current_db_key = f"storage_{self.current_db_index}"
         total_storage_dbs = len(self.dbs) - 1
 
-        existing_tv = None
-        existing_db_key = None
-        existing_db_index = None
-
-        for db_index in range(1, total_storage_dbs + 1):
-            db_key = f"storage_{db_index}"
-            tv = None
-
-            if imdb_id:
-                tv = await self.dbs[db_key]["tv"].find_one({"imdb_id": imdb_id})
-            if not tv and tmdb_id:
-                tv = await self.dbs[db_key]["tv"].find_one({"tmdb_id": tmdb_id})
-            if not tv and title and release_year:
-                tv = await self.dbs[db_key]["tv"].find_one({
-                    "title": title,
-                    "release_year": release_year
-                })
-
-            if tv:
-                existing_tv = tv
-                existing_db_key = db_key
-                existing_db_index = db_index
-                break
+        existing_tv, existing_db_index = await self._find_existing(
+            "tv", imdb_id, tmdb_id, title, release_year
+        )
+        existing_db_key = f"storage_{existing_db_index}" if existing_tv else None
 
         # ---------------- INSERT NEW TV ----------------
         if not existing_tv:
             try:
                 tv_show_dict["db_index"] = self.current_db_index
                 result = await self.dbs[current_db_key]["tv"].insert_one(tv_show_dict)
+                await self.stats.apply(
+                    "tv", added=list(iter_entries(tv_show_dict)), titles=1, genres=tv_show_dict.get("genres") or []
+                )
                 return result.inserted_id
             except Exception as e:
                 LOGGER.error(f"Insertion failed in {current_db_key}: {e}")
@@ -393,6 +546,7 @@ class Database:
 
         # ---------------- UPDATE TV ----------------
         tv_id = existing_tv["_id"]
+        added, removed = [], []
 
         for season in tv_show_dict["seasons"]:
             existing_season = next(
@@ -403,6 +557,7 @@ class Database:
 
             if not existing_season:
                 existing_tv["seasons"].append(season)
+                added.extend(iter_entries({"seasons": [season]}))
                 continue
 
             for episode in season["episodes"]:
@@ -414,6 +569,7 @@ class Database:
 
                 if not existing_episode:
                     existing_season["episodes"].append(episode)
+                    added.extend(episode["telegram"])
                     continue
 
                 existing_episode.setdefault("telegram", [])
@@ -443,9 +599,11 @@ class Database:
                             if q.get("quality") != target_quality
                         ]
                         existing_episode["telegram"].append(quality)
+                        removed.extend(to_delete)
 
                     else:
                         existing_episode["telegram"].append(quality)
+                    added.append(quality)
 
         existing_tv["updated_on"] = datetime.utcnow()
 
@@ -453,6 +611,7 @@ class Database:
         if existing_db_index != self.current_db_index:
             try:
                 if await self._move_document("tv", existing_tv, existing_db_index):
+                    await self.stats.apply("tv", added=added, removed=removed)
                     return tv_id
             except Exception as e:
                 LOGGER.error(f"Error moving TV show to {current_db_key}: {e}")
@@ -462,6 +621,7 @@ class Database:
 
         try:
             await self.dbs[existing_db_key]["tv"].replace_one({"_id": tv_id}, existing_tv)
+            await self.stats.apply("tv", added=added, removed=removed)
             return tv_id
         except Exception as e:
             LOGGER.error(f"Failed to update TV show {tmdb_id} in {existing_db_key}: {e}")
@@ -666,10 +826,15 @@ class Database:
         else:
             collection_name = "movie"
         collection = self.dbs[db_key][collection_name]
+        # genres and file entries are counted in the stats snapshot; keep their old values to diff
+        tracked = {field: 1 for field in ("genres", "telegram", "seasons") if field in update_data}
+        old = await collection.find_one({"tmdb_id": int(tmdb_id)}, tracked) if tracked else None
 
         try:
             result = await collection.update_one({"tmdb_id": int(tmdb_id)}, {"$set": update_data})
 
+            if result.modified_count > 0:
+                await self._apply_edit_stats(collection_name, old, update_data)
             return result.modified_count > 0
 
         except Exception as e:
@@ -702,6 +867,7 @@ class Database:
                     self.current_db_index = next_db_index
                     await self.update_current_db_index()
                     LOGGER.info(f"Switched to {new_db_key} and document migrated successfully.")
+                    await self._apply_edit_stats(collection_name, old, update_data)
                     return True
 
                 except Exception as migrate_error:
@@ -709,6 +875,22 @@ class Database:
                     return False
             raise
 
+    async def _apply_edit_stats(self, collection_name: str, old: Optional[dict], update_data: Dict[str, Any]) -> None:
+        if not old:
+            return
+        new = {**old, **update_data}
+        old_genres, new_genres = set(old.get("genres") or []), set(new.get("genres") or [])
+        added, removed = [], []
+        if "telegram" in update_data or "seasons" in update_data:
+            old_ids = {entry.get("id") for entry in iter_entries(old)}
+            new_ids = {entry.get("id") for entry in iter_entries(new)}
+            added = [entry for entry in iter_entries(new) if entry.get("id") not in old_ids]
+            removed = [entry for entry in iter_entries(old) if entry.get("id") not in new_ids]
+        await self.stats.apply(
+            collection_name, added=added, removed=removed,
+            genres=new_genres - old_genres, removed_genres=old_genres - new_genres
+        )
+
     async def delete_document(self, media_type: str, tmdb_id: int, db_index: int) -> bool:
         db_key = f"storage_{db_index}"
 
@@ -746,6 +928,10 @@ class Database:
             result = await self.dbs[db_key]["tv"].delete_one({"tmdb_id": tmdb_id})
         
         if result.deleted_count > 0:
+            await self.stats.apply(
+                "movie" if media_type == "Movie" else "tv",
+                removed=list(iter_entries(doc or {})), titles=-1, genres=(doc or {}).get("genres") or []
+            )
             LOGGER.info(f"{media_type} with tmdb_id {tmdb_id} deleted successfully.")
             return True
         LOGGER.info(f"No document found with tmdb_id {tmdb_id}.")
@@ -771,14 +957,16 @@ class Database:
                     LOGGER.error(f"Failed to queue file for deletion: {e}")
                 break
         
-        original_len = len(movie["telegram"])
+        removed = [q for q in movie["telegram"] if q.get("id") == id]
         movie["telegram"] = [q for q in movie["telegram"] if q.get("id") != id]
         
-        if len(movie["telegram"]) == original_len:
+        if not removed:
             return False
         
         movie['updated_on'] = datetime.utcnow()
         result = await self.dbs[db_key]["movie"].replace_one({"tmdb_id": tmdb_id}, movie)
+        if result.modified_count > 0:
+            await self.stats.apply("movie", removed=removed)
         return result.modified_count > 0
 
     async def delete_tv_episode(self, tmdb_id: int, db_index: int, season_number: int, episode_number: int) -> bool:
@@ -805,9 +993,9 @@ class Database:
                                 LOGGER.error(f"Failed to queue file for deletion: {e}")
                         break
                 
-                original_len = len(season["episodes"])
+                removed_eps = [ep for ep in season["episodes"] if ep.get("episode_number") == episode_number]
                 season["episodes"] = [ep for ep in season["episodes"] if ep.get("episode_number") != episode_number]
-                found = original_len > len(season["episodes"])
+                found = bool(removed_eps)
                 break
         
         if not found:
@@ -815,6 +1003,8 @@ class Database:
         
         tv['updated_on'] = datetime.utcnow()
         result = await self.dbs[db_key]["tv"].replace_one({"tmdb_id": tmdb_id}, tv)
+        if result.modified_count > 0:
+            await self.stats.apply("tv", removed=[q for ep in removed_eps for q in ep.get("telegram", [])])
         return result.modified_count > 0
 
     async def delete_tv_season(self, tmdb_id: int, db_index: int, season_number: int) -> bool:
@@ -839,14 +1029,16 @@ class Database:
                             LOGGER.error(f"Failed to queue file for deletion: {e}")
                 break
         
-        original_len = len(tv["seasons"])
+        removed_seasons = [s for s in tv["seasons"] if s.get("season_number") == season_number]
         tv["seasons"] = [s for s in tv["seasons"] if s.get("season_number") != season_number]
         
-        if len(tv["seasons"]) == original_len:
+        if not removed_seasons:
             return False
         
         tv['updated_on'] = datetime.utcnow()
         result = await self.dbs[db_key]["tv"].replace_one({"tmdb_id": tmdb_id}, tv)
+        if result.modified_count > 0:
+            await self.stats.apply("tv", removed=list(iter_entries({"seasons": removed_seasons})))
         return result.modified_count > 0
 
     async def delete_tv_quality(self, tmdb_id: int, db_index: int, season_number: int, episode_number: int, id: str) -> bool:
@@ -874,32 +1066,36 @@ class Database:
                                     LOGGER.error(f"Failed to queue file for deletion: {e}")
                                 break
                         
-                        original_len = len(episode["telegram"])
+                        removed = [q for q in episode["telegram"] if q.get("id") == id]
                         episode["telegram"] = [q for q in episode["telegram"] if q.get("id") != id]
-                        found = original_len > len(episode["telegram"])
+                        found = bool(removed)
                         break
         
         if not found:
             return False
         tv['updated_on'] = datetime.utcnow()
         result = await self.dbs[db_key]["tv"].replace_one({"tmdb_id": tmdb_id}, tv)
+        if result.modified_count > 0:
+            await self.stats.apply("tv", removed=removed)
         return result.modified_count > 0
 
 
     # Get per-DB statistics (movies, tv shows, used size, etc.)
     async def get_database_stats(self):
-        stats = []
-        for key in self.dbs.keys():
-            if key.startswith("storage_"):
-                db = self.dbs[key]
-                movie_count = await db["movie"].count_documents({})
-                tv_count = await db["tv"].count_documents({})
-                db_stats = await db.command("dbstats")
-                stats.append({
-                    "db_name": key,
-                    "movie_count": movie_count,
-                    "tv_count": tv_count,
-                    "storageSize": db_stats.get("storageSize", 0),
-                    "dataSize": db_stats.get("dataSize", 0)
-                })
-        return stats
+        async def shard_stats(db_index):
+            key = f"storage_{db_index}"
+            db = self.dbs[key]
+            movie_count, tv_count, db_stats = await gather(
+                db["movie"].estimated_document_count(),
+                db["tv"].estimated_document_count(),
+                db.command("dbstats")
+            )
+            return {
+                "db_name": key,
+                "movie_count": movie_count,
+                "tv_count": tv_count,
+                "storageSize": db_stats.get("storageSize", 0),
+                "dataSize": db_stats.get("dataSize", 0)
+            }
+
+        return list(await gather(*(shard_stats(i) for i in self.storage_indexes())))
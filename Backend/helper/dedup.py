@@ -0,0 +1,262 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import DeleteMany, UpdateOne
+
+from Backend import db
+from Backend.helper.encrypt import decode_string
+from Backend.helper.jobs import JobContext
+from Backend.helper.media_workers import entry_fingerprint, find_duplicates
+from Backend.helper.stats import ENTRY_ID_FIELD
+from Backend.helper.storage import run_cpu
+from Backend.logger import LOGGER
+
+
+FINGERPRINTS = "fingerprints"
+MESSAGES_PER_CALL = 200
+
+ENTRY_PIPELINES = {
+    "movie": [
+        {"$project": {"title": 1, "tmdb_id": 1, "imdb_id": 1, "updated_on": 1, "telegram": 1}},
+        {"$unwind": {"path": "$telegram", "includeArrayIndex": "t"}},
+        {"$project": {
+            "_id": 0, "doc_id": "$_id", "title": 1, "tmdb_id": 1, "imdb_id": 1, "updated_on": 1, "t": 1,
+            "id": "$telegram.id", "name": "$telegram.name", "size": "$telegram.size",
+        }},
+    ],
+    "tv": [
+        {"$project": {"title": 1, "tmdb_id": 1, "imdb_id": 1, "updated_on": 1, "seasons": 1}},
+        {"$unwind": {"path": "$seasons", "includeArrayIndex": "s"}},
+        {"$unwind": {"path": "$seasons.episodes", "includeArrayIndex": "e"}},
+        {"$unwind": {"path": "$seasons.episodes.telegram", "includeArrayIndex": "t"}},
+        {"$project": {
+            "_id": 0, "doc_id": "$_id", "title": 1, "tmdb_id": 1, "imdb_id": 1, "updated_on": 1,
+            "s": 1, "e": 1, "t": 1,
+            "season_number": "$seasons.season_number",
+            "episode_number": "$seasons.episodes.episode_number",
+            "id": "$seasons.episodes.telegram.id",
+            "name": "$seasons.episodes.telegram.name",
+            "size": "$seasons.episodes.telegram.size",
+        }},
+    ],
+}
+
+
+# Distinct ids of a shard with the name/size needed to fingerprint them, and how often each occurs
+KEY_PIPELINES = {
+    "movie": [
+        {"$project": {"telegram.id": 1, "telegram.name": 1, "telegram.size": 1}},
+        {"$unwind": "$telegram"},
+        {"$replaceRoot": {"newRoot": "$telegram"}},
+    ],
+    "tv": [
+        {"$project": {
+            "seasons.episodes.telegram.id": 1,
+            "seasons.episodes.telegram.name": 1,
+            "seasons.episodes.telegram.size": 1,
+        }},
+        {"$unwind": "$seasons"},
+        {"$unwind": "$seasons.episodes"},
+        {"$unwind": "$seasons.episodes.telegram"},
+        {"$replaceRoot": {"newRoot": "$seasons.episodes.telegram"}},
+    ],
+}
+KEY_GROUP = {"$group": {"_id": "$id", "name": {"$first": "$name"}, "size": {"$first": "$size"}, "n": {"$sum": 1}}}
+
+
+# -------------------------------
+# Flatten
+# -------------------------------
+async def collect_keys() -> Dict[str, dict]:
+    """Every distinct entry id of the library with its name, size and number of occurrences."""
+    async def run(db_index, collection_name):
+        cursor = db.dbs[f"storage_{db_index}"][collection_name].aggregate(
+            KEY_PIPELINES[collection_name] + [KEY_GROUP], allowDiskUse=True
+        )
+        return await cursor.to_list(None)
+
+    results = await asyncio.gather(*(
+        run(i, c) for i in db.storage_indexes() for c in KEY_PIPELINES
+    ))
+    keys: Dict[str, dict] = {}
+    for shard in results:
+        for row in shard:
+            key = keys.setdefault(row["_id"], {"id": row["_id"], "name": row.get("name"), "size": row.get("size"), "n": 0})
+            key["n"] += row["n"]
+    return keys
+
+
+async def collect_entries(ids: List[str]) -> List[dict]:
+    """The file entries with the given ids in every storage database, tagged with their location."""
+    async def run(db_index, collection_name, chunk):
+        cursor = db.dbs[f"storage_{db_index}"][collection_name].aggregate(
+            [{"$match": {ENTRY_ID_FIELD[collection_name]: {"$in": chunk}}}]
+            + ENTRY_PIPELINES[collection_name]
+            + [{"$match": {"id": {"$in": chunk}}}],
+            allowDiskUse=True
+        )
+        entries = await cursor.to_list(None)
+        for entry in entries:
+            entry["db_index"] = db_index
+            entry["collection"] = collection_name
+        return entries
+
+    results = await asyncio.gather(*(
+        run(i, c, ids[start:start + 1000])
+        for start in range(0, len(ids), 1000)
+        for i in db.storage_indexes()
+        for c in ENTRY_PIPELINES
+    ))
+    return [entry for shard in results for entry in shard]
+
+
+# -------------------------------
+# Fingerprints
+# -------------------------------
+async def resolve_fingerprints(
+    client, encoded_ids: Iterable[str], token: Optional[JobContext] = None
+) -> Dict[str, dict]:
+    """
+    Map encoded Telegram ids to {file_unique_id, file_size}.
+    Results are cached in tracking.fingerprints, so only new uploads hit Telegram.
+    A cancelled `token` stops the lookups between Telegram calls.
+    """
+    collection = db.dbs["tracking"][FINGERPRINTS]
+    ids = list(dict.fromkeys(
+        i for i in encoded_ids if i and not str(i).startswith(("http://", "https://"))
+    ))
+    known: Dict[str, dict] = {}
+
+    for start in range(0, len(ids), 1000):
+        async for doc in collection.find({"_id": {"$in": ids[start:start + 1000]}}):
+            known[doc["_id"]] = doc
+
+    by_chat: Dict[int, List[Tuple[int, str]]] = defaultdict(list)
+    for encoded in ids:
+        if encoded in known:
+            continue
+        try:
+            decoded = await decode_string(encoded)
+            by_chat[int(f"-100{decoded['chat_id']}")].append((int(decoded["msg_id"]), encoded))
+        except Exception:
+            continue
+
+    new_docs = []
+    for chat_id, pairs in by_chat.items():
+        for start in range(0, len(pairs), MESSAGES_PER_CALL):
+            chunk = pairs[start:start + MESSAGES_PER_CALL]
+            if token:
+                token.raise_if_cancelled()
+            try:
+                messages = await client.get_messages(chat_id, [msg_id for msg_id, _ in chunk])
+            except Exception as e:
+                LOGGER.warning(f"Fingerprint lookup failed for chat {chat_id}: {e}")
+                continue
+            for (_, encoded), message in zip(chunk, messages):
+                media = None if not message or message.empty else (message.video or message.document)
+                new_docs.append({
+                    "_id": encoded,
+                    "file_unique_id": getattr(media, "file_unique_id", None),
+                    "file_size": getattr(media, "file_size", None),
+                    "checked_at": datetime.utcnow(),
+                })
+
+    if new_docs:
+        await collection.bulk_write(
+            [UpdateOne({"_id": d["_id"]}, {"$set": d}, upsert=True) for d in new_docs], ordered=False
+        )
+        known.update((d["_id"], d) for d in new_docs)
+    return known
+
+
+# -------------------------------
+# Apply
+# -------------------------------
+def _removal_ops(collection_name: str, by_doc: Dict[object, List[dict]]) -> list:
+    """
+    $pull the removed ids out of their documents, then drop the episodes, seasons
+    and documents this left empty. Entries are matched by id, not position, so
+    concurrent edits of the same documents cannot shift what gets removed.
+    """
+    if collection_name == "movie":
+        ops = [
+            UpdateOne({"_id": doc_id}, {"$pull": {"telegram": {"id": {"$in": [e["id"] for e in entries]}}}})
+            for doc_id, entries in by_doc.items()
+        ]
+        ops.append(DeleteMany({"_id": {"$in": list(by_doc)}, "telegram": {"$size": 0}}))
+        return ops
+
+    ops = []
+    for doc_id, entries in by_doc.items():
+        ops.append(UpdateOne(
+            {"_id": doc_id},
+            {"$pull": {"seasons.$[].episodes.$[].telegram": {"id": {"$in": [e["id"] for e in entries]}}}}
+        ))
+        episodes: Dict[object, set] = defaultdict(set)
+        for entry in entries:
+            episodes[entry.get("season_number")].add(entry.get("episode_number"))
+        for season_number, episode_numbers in episodes.items():
+            ops.append(UpdateOne(
+                {"_id": doc_id},
+                {"$pull": {"seasons.$[s].episodes": {
+                    "episode_number": {"$in": list(episode_numbers)}, "telegram": {"$size": 0}
+                }}},
+                array_filters=[{"s.season_number": season_number}]
+            ))
+        ops.append(UpdateOne(
+            {"_id": doc_id},
+            {"$pull": {"seasons": {"season_number": {"$in": list(episodes)}, "episodes": {"$size": 0}}}}
+        ))
+    ops.append(DeleteMany({"_id": {"$in": list(by_doc)}, "seasons": {"$size": 0}}))
+    return ops
+
+
+async def apply_removals(pairs: List[Tuple[dict, dict]]) -> Tuple[int, int]:
+    """Remove the removed side of (removed, kept) pairs; returns (documents_changed, documents_deleted)."""
+    grouped: Dict[Tuple[int, str], Dict[object, List[dict]]] = defaultdict(lambda: defaultdict(list))
+    for removed, kept in pairs:
+        location = (removed["db_index"], removed["collection"], removed["doc_id"])
+        if removed.get("id") == kept.get("id") and location == (kept["db_index"], kept["collection"], kept["doc_id"]):
+            # the same id twice in one title: pulling it by id would take the kept copy too
+            continue
+        grouped[(removed["db_index"], removed["collection"])][removed["doc_id"]].append(removed)
+
+    async def run(db_index, collection_name, by_doc):
+        col = db.dbs[f"storage_{db_index}"][collection_name]
+        # ordered: the empty-episode/season/document cleanup must see the pulls
+        result = await col.bulk_write(_removal_ops(collection_name, by_doc), ordered=True)
+        return len(by_doc), result.deleted_count
+
+    results = await asyncio.gather(*(
+        run(db_index, collection_name, by_doc) for (db_index, collection_name), by_doc in grouped.items()
+    ))
+    if results:
+        await db.stats.mark_stale()
+    return sum(r[0] for r in results), sum(r[1] for r in results)
+
+
+async def find_library_duplicates(client, token: Optional[JobContext] = None) -> List[Tuple[dict, dict]]:
+    """
+    Fingerprint every distinct id first, then load full entries only for the ids
+    that share a fingerprint with another entry. Checks `token` between the steps.
+    """
+    keys = await collect_keys()
+    if token:
+        token.raise_if_cancelled()
+    fingerprints = await resolve_fingerprints(client, keys, token)
+    occurrences: Dict[tuple, int] = defaultdict(int)
+    for key in keys.values():
+        key["fingerprint"] = entry_fingerprint(key, fingerprints)
+        occurrences[key["fingerprint"]] += key["n"]
+
+    ids = [key["id"] for key in keys.values() if key["id"] and occurrences[key["fingerprint"]] > 1]
+    if not ids:
+        return []
+    if token:
+        token.raise_if_cancelled()
+    entries = await collect_entries(ids)
+    if token:
+        token.raise_if_cancelled()
+    return await run_cpu(find_duplicates, entries, fingerprints)
@@ -0,0 +1,262 @@
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from time import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from Backend import db
+from Backend.config import Telegram
+from Backend.helper.container_index import FetchPart, RangeReader, SegmentIndex, build_index
+from Backend.helper.metrics import FILE_INDEX_LOOKUPS
+from Backend.logger import LOGGER
+
+
+FILE_INDEX = "file_index"
+# containers build_index can read; nothing else is looked up or indexed
+INDEXABLE_TYPES = {"video/x-matroska", "video/webm", "video/mp4"}
+# leading bytes kept per file: EBML header + Tracks, or ftyp + moov of a faststart MP4
+HEADER_BYTES = 512 * 1024
+# total bytes kept per file; a Cues / moov that does not fit as well stays remote
+MAX_BYTES = Telegram.FILE_INDEX_MAX_KB * 1024
+# documents expire this long after they were built
+TTL_SECONDS = Telegram.FILE_INDEX_TTL_DAYS * 86400
+# a file found not to be indexed (or failing to index) is not tried again for this long
+MISSING_TTL = Telegram.FILE_INDEX_MISSING_TTL
+
+
+def indexable(mime_type: Optional[str]) -> bool:
+    return (mime_type or "").split(";")[0].strip().lower() in INDEXABLE_TYPES
+
+
+class FileIndex(NamedTuple):
+    """Locally kept byte regions of one file, and its segment index when it has one."""
+    size: int
+    regions: List[Tuple[int, bytes]]
+    segments: Optional[SegmentIndex]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(data) for _, data in self.regions)
+
+    def local(self, from_bytes: int, until_bytes: int) -> Optional[memoryview]:
+        """The kept bytes from from_bytes on (up to until_bytes), if a region holds from_bytes."""
+        for start, data in self.regions:
+            if start <= from_bytes < start + len(data):
+                end = min(until_bytes + 1, start + len(data))
+                return memoryview(data)[from_bytes - start:end - start]
+        return None
+
+
+def _merge(spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        elif end > start:
+            merged.append((start, end))
+    return merged
+
+
+def kept_spans(segments: Optional[SegmentIndex], budget: int = MAX_BYTES) -> List[Tuple[int, int]]:
+    """[start, end) spans worth keeping: the header, plus the seek index if both fit in `budget`."""
+    if segments is None:
+        return []
+    header = [(0, min(segments.offsets[0], HEADER_BYTES, budget))]
+    if segments.index_range:
+        with_index = _merge(header + [segments.index_range])
+        if sum(end - start for start, end in with_index) <= budget:
+            return with_index
+    return _merge(header)
+
+
+class FileIndexStore:
+    """
+    Header and seek-index bytes of streamed files, keyed by file_unique_id.
+    A player opening or seeking an MKV / MP4 reads exactly these ranges first;
+    with them kept here those requests are answered without a GetFile round
+    trip. With `persist` (FILE_INDEX) documents are written to the active
+    storage database, roll over with it when it is full and expire after
+    FILE_INDEX_TTL_DAYS, so every streaming process and restart shares them;
+    without it the index only lives in memory (HLS). The most recently used
+    stay in memory up to `memory_bytes`. /dl only reads memory: a miss is
+    looked up in Mongo, or indexed, in the background.
+    """
+
+    def __init__(self, memory_bytes: int, persist: bool, concurrency: int = 2):
+        self.memory_bytes = memory_bytes
+        self.persist = persist
+        self._memory: "OrderedDict[str, FileIndex]" = OrderedDict()
+        self._memory_used = 0
+        self._missing: Dict[str, float] = {}
+        self._building: Dict[str, asyncio.Task] = {}
+        self._indexes_ready: Optional[asyncio.Task] = None
+        # indexing reads 2-3 parts per file; keep a burst of new files from crowding out playback
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def _remember(self, key: str, entry: FileIndex) -> None:
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_used -= old.nbytes
+        if entry.nbytes > self.memory_bytes:
+            return
+        self._memory[key] = entry
+        self._memory_used += entry.nbytes
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= evicted.nbytes
+
+    def _mark_missing(self, key: str) -> None:
+        now = time()
+        if len(self._missing) >= 10_000:
+            self._missing = {k: until for k, until in self._missing.items() if until > now}
+        self._missing[key] = now + MISSING_TTL
+
+    # -------------------------------
+    # Lookups
+    # -------------------------------
+    def peek(self, key: str) -> Optional[FileIndex]:
+        """The file's index if it is in memory; never waits."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            FILE_INDEX_LOOKUPS.inc(1, "memory")
+            return entry
+        FILE_INDEX_LOOKUPS.inc(1, "missing")
+        return None
+
+    async def stored(self, key: str) -> Optional[FileIndex]:
+        """The file's index from Mongo, if some storage database holds it."""
+        if not self.persist:
+            return None
+        try:
+            docs = await asyncio.gather(*(
+                db.dbs[f"storage_{i}"][FILE_INDEX].find_one({"_id": key}) for i in db.storage_indexes()
+            ))
+        except Exception as e:
+            # streaming goes on without the index while the database is away
+            LOGGER.warning(f"File index lookup failed for {key}: {e}")
+            return None
+        doc = next((d for d in docs if d), None)
+        if doc is None:
+            return None
+
+        entry = FileIndex(
+            doc["size"],
+            [(region["start"], region["data"]) for region in doc["regions"]],
+            SegmentIndex.from_dict(doc["segments"]) if doc.get("segments") else None,
+        )
+        self._remember(key, entry)
+        FILE_INDEX_LOOKUPS.inc(1, "stored")
+        return entry
+
+    async def get(self, key: str, size: int, fetch_part: FetchPart) -> FileIndex:
+        """The file's index, loading or building it now if it is not in memory."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry
+        # shield: a client hanging up must not cancel the shared build
+        return await asyncio.shield(self._start(key, size, fetch_part))
+
+    def schedule(self, key: str, size: int, fetch_part: FetchPart) -> None:
+        """Load or build the index in the background, unless it is known, underway or recently failed."""
+        if key in self._memory or key in self._building or self._missing.get(key, 0) > time():
+            return
+        self._start(key, size, fetch_part)
+
+    def _start(self, key: str, size: int, fetch_part: FetchPart) -> asyncio.Task:
+        task = self._building.get(key)
+        if task is None:
+            task = self._building[key] = asyncio.create_task(self._obtain(key, size, fetch_part))
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return task
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        self._building.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self._mark_missing(key)
+            LOGGER.warning(f"Indexing {key} failed: {task.exception()}")
+
+    async def _obtain(self, key: str, size: int, fetch_part: FetchPart) -> FileIndex:
+        entry = await self.stored(key)
+        if entry is None:
+            entry = await self._build(key, size, fetch_part)
+        return entry
+
+    # -------------------------------
+    # Building
+    # -------------------------------
+    async def _build(self, key: str, size: int, fetch_part: FetchPart) -> FileIndex:
+        async with self._semaphore:
+            reader = RangeReader(fetch_part, size)
+            segments = await build_index(reader, Telegram.HLS_SEGMENT_SECONDS)
+            # the header and the index were just read to build the segments; this mostly reuses those parts
+            regions = [(start, await reader.read(start, end - start)) for start, end in kept_spans(segments)]
+        entry = FileIndex(size, regions, segments)
+
+        if self.persist:
+            await self._store(key, {
+                "size": size,
+                "regions": [{"start": start, "data": data} for start, data in regions],
+                "segments": segments.to_dict() if segments else None,
+                "indexed_at": datetime.utcnow(),
+            })
+        self._missing.pop(key, None)
+        self._remember(key, entry)
+        LOGGER.debug(f"Indexed {key}: {len(regions)} regions, {entry.nbytes} bytes")
+        return entry
+
+    async def _ensure_indexes(self) -> None:
+        results = await asyncio.gather(*(
+            db.dbs[f"storage_{i}"][FILE_INDEX].create_index("indexed_at", expireAfterSeconds=TTL_SECONDS)
+            for i in db.storage_indexes()
+        ), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                LOGGER.warning(f"File index TTL index creation failed: {result}")
+
+    async def _store(self, key: str, document: dict) -> bool:
+        if self._indexes_ready is None:
+            self._indexes_ready = asyncio.create_task(self._ensure_indexes())
+        await asyncio.shield(self._indexes_ready)
+
+        db_key = f"storage_{db.current_db_index}"
+        try:
+            await db.dbs[db_key][FILE_INDEX].replace_one({"_id": key}, document, upsert=True)
+            return True
+        except Exception as e:
+            if not any(keyword in str(e).lower() for keyword in ["storage", "quota"]):
+                LOGGER.warning(f"Could not store the file index of {key} in {db_key}: {e}")
+                return False
+            LOGGER.error(f"File index write failed in {db_key}: {e}")
+            # same rollover as media documents: move on to the next storage database
+            return bool(await db._handle_storage_error(
+                self._store, key, document, total_storage_dbs=len(db.dbs) - 1
+            ))
+
+    async def index_message(self, chat_id: int, msg_id: int) -> None:
+        """Ingest hook: index a newly stored video once the stream clients have room."""
+        from Backend.helper.custom_dl import part_reader, pick_streamer
+        from Backend.helper.jobs import job_manager
+
+        try:
+            await job_manager.budget.wait_for_streams()
+            index, tg_connect = pick_streamer()
+            file_id = await tg_connect.get_file_properties(chat_id=chat_id, message_id=msg_id)
+            if not indexable(file_id.mime_type):
+                return
+            await self.get(file_id.unique_id, file_id.file_size, part_reader(tg_connect, index, file_id))
+        except Exception as e:
+            LOGGER.warning(f"Indexing message {msg_id} failed: {e}")
+
+    def snapshot(self) -> dict:
+        return {
+            "persist": self.persist,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_used,
+            "building": len(self._building),
+            "missing": sum(1 for until in self._missing.values() if until > time()),
+        }
+
+
+file_index = FileIndexStore(memory_bytes=Telegram.FILE_INDEX_MEMORY_MB * 1024 * 1024, persist=Telegram.FILE_INDEX)
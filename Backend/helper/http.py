@@ -0,0 +1,182 @@
+import random
+import asyncio
+import httpx
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from Backend.config import Telegram
+from Backend.helper.lazy import lazy_import
+from Backend.logger import LOGGER
+
+# only themoviedb needs aiohttp; it loads with the first TMDB request
+aiohttp = lazy_import("aiohttp")
+
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+USER_AGENT = "Mozilla/5.0 (compatible; Telegram-Stremio)"
+
+
+class HostSemaphores:
+    """
+    Per-host concurrency limits. A host's semaphore is created on first use and
+    dropped once no request holds or waits for it, so the hosts of arbitrary
+    user links do not pile up.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        # host -> [semaphore, requests holding or waiting for it]
+        self._hosts: Dict[str, List] = {}
+
+    def __len__(self) -> int:
+        return len(self._hosts)
+
+    @asynccontextmanager
+    async def hold(self, host: str) -> AsyncIterator[None]:
+        entry = self._hosts.get(host)
+        if entry is None:
+            entry = self._hosts[host] = [asyncio.Semaphore(self.limit), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._hosts.pop(host, None)
+
+
+class HttpPool:
+    """
+    Shared outbound HTTP layer.
+    One keep-alive httpx client (HTTP/2 when the h2 package is installed) serves
+    every host with a per-host concurrency limit; idempotent requests are retried
+    on connection errors, 429 and 5xx with jittered backoff (Retry-After wins).
+    Libraries that need aiohttp (themoviedb) get one shared session with a DNS cache.
+    Opened in start_services and closed in stop_services; used before start(),
+    the clients are created lazily.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 20.0,
+        max_connections: int = 64,
+        per_host: int = 8,
+        retries: int = 2,
+        dns_ttl: int = 300
+    ):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.retries = retries
+        self.dns_ttl = dns_ttl
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._aiohttp: Optional["aiohttp.ClientSession"] = None
+        self._host_semaphores = HostSemaphores(per_host)
+
+    # ---- Lifecycle ----
+    async def start(self) -> None:
+        # the aiohttp session opens with the first TMDB request
+        self.client
+        LOGGER.info(f"HTTP pool ready (http2={'on' if HTTP2 else 'off'}, per_host={self.per_host})")
+
+    async def close(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        if self._aiohttp is not None and not self._aiohttp.closed:
+            await self._aiohttp.close()
+        self._client = None
+        self._aiohttp = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2,
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60
+                )
+            )
+        return self._client
+
+    @property
+    def aiohttp_session(self) -> "aiohttp.ClientSession":
+        if self._aiohttp is None or self._aiohttp.closed:
+            self._aiohttp = aiohttp.ClientSession(
+                raise_for_status=True,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    limit_per_host=self.per_host,
+                    ttl_dns_cache=self.dns_ttl
+                )
+            )
+        return self._aiohttp
+
+    # ---- Requests ----
+    @staticmethod
+    def _retry_delay(response: Optional[httpx.Response], attempt: int) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), 60.0)
+            except ValueError:
+                pass
+        return min(0.5 * 2 ** attempt, 30) + random.uniform(0, 0.5)
+
+    async def request(self, method: str, url: str, *, retries: Optional[int] = None, **kwargs) -> httpx.Response:
+        """
+        Send a request through the shared client.
+        Retries default to the pool setting for idempotent methods and 0 otherwise;
+        the last response (even a 429/5xx) is returned once retries run out.
+        """
+        method = method.upper()
+        if retries is None:
+            retries = self.retries if method in IDEMPOTENT_METHODS else 0
+        host = urlsplit(url).hostname or ""
+
+        for attempt in range(retries + 1):
+            response = None
+            try:
+                async with self._host_semaphores.hold(host):
+                    response = await self.client.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    return response
+            except httpx.TransportError:
+                if attempt == retries:
+                    raise
+
+            delay = self._retry_delay(response, attempt)
+            LOGGER.debug(f"{method} {url} retry {attempt + 1}/{retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def head(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("HEAD", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("DELETE", url, **kwargs)
+
+
+http_pool = HttpPool(
+    timeout=Telegram.HTTP_TIMEOUT,
+    max_connections=Telegram.HTTP_MAX_CONNECTIONS,
+    per_host=Telegram.HTTP_PER_HOST,
+    retries=Telegram.HTTP_RETRIES
+)
@@ -1,23 +1,19 @@
-import httpx
 import re
 import asyncio
-from typing import Optional, Dict, Any
+from time import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, NamedTuple, Tuple
 
-BASE_URL = "https://v3-cinemeta.strem.io"
-
-_client: Optional[httpx.AsyncClient] = None
-_client_lock = asyncio.Lock()
+from Backend.config import Telegram
+from Backend.helper.http import http_pool
+from Backend.helper.metrics import UPSTREAM_SECONDS
+from Backend.helper.ratelimit import TokenBucket
+from Backend.logger import LOGGER
 
+BASE_URL = "https://v3-cinemeta.strem.io"
 
-async def _get_client() -> httpx.AsyncClient:
-    global _client
-    async with _client_lock:
-        if _client is None or _client.is_closed:
-            _client = httpx.AsyncClient(
-                timeout=15.0,
-                follow_redirects=True
-            )
-        return _client
+# Every Cinemeta request takes a token, whichever caller issues it
+CINEMETA_LIMITER = TokenBucket(Telegram.CINEMETA_RATE)
 
 
 def extract_first_year(year_string) -> int:
@@ -35,11 +31,12 @@ async def search_title(query: str, type: str) -> Optional[Dict[str, Any]]:
     Query Cinemeta search endpoint for a title.
     type = 'tvSeries' or 'movie' (your code uses 'tvSeries' for TV)
     """
-    client = await _get_client()
     cinemeta_type = "series" if type == "tvSeries" else type
     url = f"{BASE_URL}/catalog/{cinemeta_type}/imdb/search={query}.json"
     try:
-        resp = await client.get(url)
+        await CINEMETA_LIMITER.acquire()
+        with UPSTREAM_SECONDS.time("cinemeta_search"):
+            resp = await http_pool.get(url)
         if resp.status_code != 200:
             return None
         data = resp.json()
@@ -57,19 +54,166 @@ async def search_title(query: str, type: str) -> Optional[Dict[str, Any]]:
         return None
 
 
-async def get_detail(imdb_id: str, media_type: str) -> Optional[Dict[str, Any]]:
-    client = await _get_client()
-    cinemeta_type = "series" if media_type in ["tvSeries", "tv"] else "movie"
+# -------------------------------
+# Meta cache
+# -------------------------------
+class CinemetaEntry(NamedTuple):
+    meta: Optional[Dict[str, Any]]
+    episodes: Dict[Tuple[int, int], Dict[str, Any]]     # (season, episode) -> video
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
 
-    try:
-        url = f"{BASE_URL}/meta/{cinemeta_type}/{imdb_id}.json"
-        resp = await client.get(url)
 
+# The parts of a /meta document get_detail and the episode lookups read; the rest is not kept
+META_FIELDS = (
+    "imdb_id", "id", "moviedb_id", "type", "name", "description", "genres", "genre",
+    "year", "releaseInfo", "released", "imdbRating", "poster", "background", "logo",
+    "runtime", "director", "cast",
+)
+VIDEO_FIELDS = ("season", "episode", "title", "thumbnail", "overview", "released")
+
+
+def _trim_meta(meta: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not meta:
+        return None
+    return {field: meta[field] for field in META_FIELDS if field in meta}
+
+
+def _index_videos(meta: Optional[Dict[str, Any]]) -> Dict[Tuple[int, int], Dict[str, Any]]:
+    episodes = {}
+    for video in (meta or {}).get("videos") or []:
+        season, episode = str(video.get("season", "")), str(video.get("episode", ""))
+        if season.isdigit() and episode.isdigit():
+            episodes[(int(season), int(episode))] = {field: video[field] for field in VIDEO_FIELDS if field in video}
+    return episodes
+
+
+class CinemetaCache:
+    """
+    Parsed /meta documents keyed by (type, imdb_id).
+    Each document is downloaded once and indexed by (season, episode); after
+    `ttl` seconds it is revalidated with If-None-Match / If-Modified-Since, so an
+    unchanged show costs a 304 instead of the full (often multi-MB) body.
+    Concurrent lookups of the same id share one request, unknown ids are
+    remembered for `miss_ttl` seconds, and a stale entry is served when
+    revalidation fails. At most `max_entries` documents are kept (LRU), each
+    trimmed to META_FIELDS plus the episode index.
+    """
+
+    def __init__(self, ttl: int = 21600, miss_ttl: int = 600, max_entries: int = 256):
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[Tuple[str, str], CinemetaEntry]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def _fresh(self, entry: CinemetaEntry) -> bool:
+        ttl = self.ttl if entry.meta is not None else self.miss_ttl
+        return time() - entry.fetched_at < ttl
+
+    def _store(self, key: Tuple[str, str], entry: CinemetaEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _fetch(self, key: Tuple[str, str], stale: Optional[CinemetaEntry]) -> Optional[CinemetaEntry]:
+        cinemeta_type, imdb_id = key
+        headers = {}
+        if stale and stale.meta is not None:
+            if stale.etag:
+                headers["If-None-Match"] = stale.etag
+            if stale.last_modified:
+                headers["If-Modified-Since"] = stale.last_modified
+
+        try:
+            await CINEMETA_LIMITER.acquire()
+            with UPSTREAM_SECONDS.time("cinemeta_meta"):
+                resp = await http_pool.get(f"{BASE_URL}/meta/{cinemeta_type}/{imdb_id}.json", headers=headers)
+        except Exception as e:
+            LOGGER.debug(f"Cinemeta {cinemeta_type}/{imdb_id} failed: {e}")
+            return stale
+
+        if resp.status_code == 304 and stale:
+            self.revalidated += 1
+            return stale._replace(fetched_at=time())
+        if resp.status_code == 404:
+            return CinemetaEntry(None, {}, None, None, time())
         if resp.status_code != 200:
-            return None
+            return stale
 
-        data = resp.json()
-        meta = data.get("meta")
+        try:
+            meta = resp.json().get("meta") or None
+        except ValueError:
+            return stale
+        return CinemetaEntry(
+            meta=_trim_meta(meta),
+            episodes=_index_videos(meta) if cinemeta_type == "series" else {},
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+            fetched_at=time()
+        )
+
+    async def get(self, cinemeta_type: str, imdb_id: str) -> Optional[CinemetaEntry]:
+        key = (cinemeta_type, imdb_id)
+        entry = self._entries.get(key)
+        if entry and self._fresh(entry):
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        task = self._inflight.get(key)
+        if task:
+            self.hits += 1
+        else:
+            self.misses += 1
+            # the request runs in its own task: a caller being cancelled must not fail the others
+            task = self._inflight[key] = asyncio.create_task(self._refresh(key, entry))
+            task.add_done_callback(lambda done: self._done(key, done))
+        return await asyncio.shield(task)
+
+    async def _refresh(self, key: Tuple[str, str], stale: Optional[CinemetaEntry]) -> Optional[CinemetaEntry]:
+        result = await self._fetch(key, stale)
+        if result is not None:
+            self._store(key, result)
+        return result
+
+    def _done(self, key: Tuple[str, str], task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # every waiter may have gone away; retrieve the error so it is not logged as lost
+        if not task.cancelled():
+            task.exception()
+
+    def snapshot(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+        }
+
+
+meta_cache = CinemetaCache(
+    ttl=Telegram.CINEMETA_CACHE_TTL,
+    max_entries=Telegram.CINEMETA_CACHE_SIZE
+)
+
+
+# -------------------------------
+# Lookups
+# -------------------------------
+async def get_detail(imdb_id: str, media_type: str) -> Optional[Dict[str, Any]]:
+    cinemeta_type = "series" if media_type in ["tvSeries", "tv"] else "movie"
+
+    try:
+        entry = await meta_cache.get(cinemeta_type, imdb_id)
+        meta = entry.meta if entry else None
         if not meta:
             return None
 
@@ -96,7 +240,7 @@ async def get_detail(imdb_id: str, media_type: str) -> Optional[Dict[str, Any]]:
             "runtime": meta.get("runtime") or 0,
             "director": meta.get("director", []),
             "cast": meta.get("cast", []),
-            "videos": meta.get("videos", [])
+            "videos": list(entry.episodes.values())
         }
 
     except Exception:
@@ -105,27 +249,42 @@ async def get_detail(imdb_id: str, media_type: str) -> Optional[Dict[str, Any]]:
 
 async def get_season(imdb_id: str, season_id: int, episode_id: int) -> Optional[Dict[str, Any]]:
     """
-    Return episode meta for a specific season/episode using Cinemeta series endpoint.
+    Return episode meta for a specific season/episode from the cached series index.
     """
-    client = await _get_client()
     try:
-        url = f"{BASE_URL}/meta/series/{imdb_id}.json"
-        resp = await client.get(url)
-        if resp.status_code != 200:
-            return None
-        data = resp.json()
-        if 'meta' in data and 'videos' in data['meta']:
-            for video in data['meta']['videos']:
-                if (str(video.get('season', '')) == str(season_id) and
-                        str(video.get('episode', '')) == str(episode_id)):
-                    return {
-                        'title': video.get('title', f'Episode {episode_id}'),
-                        'no': str(episode_id),
-                        'season': str(season_id),
-                        'image': video.get('thumbnail', ''),
-                        'plot': video.get('overview', ''),
-                        'released': video.get('released', '')
-                    }
-        return None
+        entry = await meta_cache.get("series", imdb_id)
+        video = entry.episodes.get((int(season_id), int(episode_id))) if entry else None
+        return _episode_entry(video) if video else None
     except Exception:
         return None
+
+
+def _episode_entry(video: Dict[str, Any]) -> Dict[str, Any]:
+    episode_id = video.get('episode', '')
+    return {
+        'title': video.get('title', f'Episode {episode_id}'),
+        'no': str(episode_id),
+        'season': str(video.get('season', '')),
+        'image': video.get('thumbnail', ''),
+        'plot': video.get('overview', ''),
+        'released': video.get('released', '')
+    }
+
+
+async def get_season_episodes(imdb_id: str, season_id: int) -> Dict[int, Dict[str, Any]]:
+    """
+    Return every episode of one season as {episode_number: episode meta}
+    from the cached series index.
+    """
+    try:
+        entry = await meta_cache.get("series", imdb_id)
+        if not entry:
+            return {}
+        season_id = int(season_id)
+        return {
+            episode: _episode_entry(video)
+            for (season, episode), video in entry.episodes.items()
+            if season == season_id
+        }
+    except Exception:
+        return {}
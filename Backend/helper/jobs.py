@@ -0,0 +1,320 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from time import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set
+from uuid import uuid4
+
+from pyrogram import Client
+from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from Backend import db
+from Backend.config import Telegram
+from Backend.logger import LOGGER
+
+
+CANCEL_PREFIX = "jobcancel:"
+ACTIVE_STATUSES = ("running",)
+
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a job once its cancel token is set.
+    Derives from BaseException, like asyncio.CancelledError, so the broad
+    `except Exception` blocks around individual items do not swallow it.
+    """
+
+
+def _set_path(target: Dict[str, Any], path: str, value: Any) -> None:
+    """Apply a dotted $set path to a nested in-memory dict."""
+    *parents, leaf = path.split(".")
+    for key in parents:
+        target = target.setdefault(key, {})
+    target[leaf] = value
+
+
+# -------------------------------
+# Shared budget
+# -------------------------------
+class JobBudget:
+    """
+    Concurrency and request-rate budget shared by every running job.
+    While the stream clients are busy, new slots are held back so maintenance
+    work does not compete with playback; after max_wait seconds one slot is
+    let through anyway so a job never stalls completely.
+    """
+
+    def __init__(self, concurrency: int = 16, rate: float = 25.0, yield_load: int = 4, max_wait: float = 30.0):
+        self.concurrency = concurrency
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.yield_load = yield_load
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._next_slot = 0.0
+
+    @staticmethod
+    def stream_load() -> int:
+        from Backend.pyrofork.bot import work_loads
+        return sum(work_loads.all_loads().values())
+
+    async def wait_for_streams(self, token: Optional["JobContext"] = None) -> None:
+        if self.yield_load <= 0:
+            return
+        waited = 0.0
+        while waited < self.max_wait and self.stream_load() >= self.yield_load:
+            if token:
+                token.raise_if_cancelled()
+            await asyncio.sleep(1)
+            waited += 1
+
+    async def _wait_rate(self) -> None:
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    @asynccontextmanager
+    async def slot(self, token: Optional["JobContext"] = None):
+        await self.wait_for_streams(token)
+        async with self._semaphore:
+            if token:
+                token.raise_if_cancelled()
+            await self._wait_rate()
+            yield
+
+
+# -------------------------------
+# Per-job context
+# -------------------------------
+class JobContext:
+    """
+    Handle passed to a running job: cancel token, checkpoint storage,
+    throttled progress reporting and access to the shared budget.
+    """
+
+    def __init__(self, manager: "JobManager", client: Client, record: Dict[str, Any], resumed: bool = False):
+        self.manager = manager
+        self.client = client
+        self.id: str = record["_id"]
+        self.kind: str = record["kind"]
+        self.chat_id: int = record["chat_id"]
+        self.params: Dict[str, Any] = record.get("params") or {}
+        self.checkpoint: Dict[str, Any] = record.get("checkpoint") or {}
+        self.progress: Dict[str, Any] = record.get("progress") or {}
+        self.resumed = resumed
+        self.message = None
+        self.started = time()
+        self._cancel = asyncio.Event()
+        self._last_report = 0.0
+
+    # ---- Cancellation ----
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    # ---- Budget ----
+    def slot(self):
+        return self.manager.budget.slot(self)
+
+    async def pause_if_busy(self) -> None:
+        self.raise_if_cancelled()
+        await self.manager.budget.wait_for_streams(self)
+
+    # ---- Persistence ----
+    async def save(self, **fields) -> None:
+        """Store checkpoint fields; dotted keys update nested values."""
+        for key, value in fields.items():
+            _set_path(self.checkpoint, key, value)
+        await self.manager.update(self.id, **{f"checkpoint.{k}": v for k, v in fields.items()})
+
+    # ---- Reporting ----
+    @property
+    def cancel_markup(self) -> InlineKeyboardMarkup:
+        return InlineKeyboardMarkup([[InlineKeyboardButton("❌ İptal Et", callback_data=f"{CANCEL_PREFIX}{self.id}")]])
+
+    async def report(self, text: str, done: Optional[int] = None, total: Optional[int] = None, force: bool = False, **kwargs) -> None:
+        """Edit the status message and persist progress at most once per JOB_PROGRESS_INTERVAL."""
+        if done is not None:
+            self.progress["done"] = done
+        if total is not None:
+            self.progress["total"] = total
+
+        now = time()
+        if not force and now - self._last_report < self.manager.progress_interval:
+            return
+        self._last_report = now
+
+        await self.manager.update(self.id, progress=self.progress)
+        if self.message:
+            try:
+                await self.message.edit_text(text, reply_markup=self.cancel_markup, **kwargs)
+            except Exception:
+                pass
+
+    async def finish(self, text: str, **kwargs) -> None:
+        """Replace the status message with the final result, without the cancel button."""
+        if self.message:
+            try:
+                await self.message.edit_text(text, **kwargs)
+            except Exception:
+                pass
+
+
+class JobSpec(NamedTuple):
+    func: Callable[[JobContext], Awaitable[None]]
+    title: str
+    resumable: bool
+
+
+# -------------------------------
+# Manager
+# -------------------------------
+class JobManager:
+    """
+    Runs long owner commands as background jobs recorded in tracking.jobs.
+    At most one job per kind runs at a time. Jobs registered as resumable are
+    restarted with their last checkpoint after a restart, others are marked
+    interrupted.
+    """
+
+    def __init__(self, budget: JobBudget, progress_interval: float = 10.0):
+        self.budget = budget
+        self.progress_interval = progress_interval
+        self._specs: Dict[str, JobSpec] = {}
+        self._running: Dict[str, JobContext] = {}
+        # the loop only keeps weak references to tasks; a running job must not be collected
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def collection(self):
+        return db.dbs["tracking"]["jobs"]
+
+    def register(self, kind: str, title: str, resumable: bool = False):
+        def decorator(func):
+            self._specs[kind] = JobSpec(func, title, resumable)
+            return func
+        return decorator
+
+    async def update(self, job_id: str, **fields) -> None:
+        fields["updated_at"] = datetime.utcnow()
+        try:
+            await self.collection.update_one({"_id": job_id}, {"$set": fields})
+        except Exception as e:
+            LOGGER.warning(f"Job {job_id} state update failed: {e}")
+
+    def running(self, kind: str) -> Optional[JobContext]:
+        return next((ctx for ctx in self._running.values() if ctx.kind == kind), None)
+
+    async def start(self, client: Client, kind: str, chat_id: int, text: str, params: Optional[Dict[str, Any]] = None) -> Optional[JobContext]:
+        """Create and launch a job; returns None if one of the same kind is already running."""
+        if kind not in self._specs:
+            raise KeyError(f"Unknown job kind: {kind}")
+        if self.running(kind):
+            return None
+
+        now = datetime.utcnow()
+        record = {
+            "_id": uuid4().hex[:12],
+            "kind": kind,
+            "status": "running",
+            "chat_id": chat_id,
+            "params": params or {},
+            "checkpoint": {},
+            "progress": {},
+            "started_at": now,
+            "updated_at": now,
+        }
+        await self.collection.insert_one(record)
+        return await self._launch(client, record, text)
+
+    async def _launch(self, client: Client, record: Dict[str, Any], text: str, resumed: bool = False) -> JobContext:
+        ctx = JobContext(self, client, record, resumed=resumed)
+        self._running[ctx.id] = ctx
+        try:
+            ctx.message = await client.send_message(ctx.chat_id, text, reply_markup=ctx.cancel_markup)
+        except Exception as e:
+            LOGGER.warning(f"Job {ctx.id} status message failed: {e}")
+        task = asyncio.create_task(self._run(ctx))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return ctx
+
+    async def _run(self, ctx: JobContext) -> None:
+        spec = self._specs[ctx.kind]
+        status, error = "done", None
+        try:
+            await spec.func(ctx)
+            if ctx.cancelled:
+                raise JobCancelled(ctx.id)
+        except (JobCancelled, asyncio.CancelledError) as e:
+            # task cancellation at shutdown leaves the job "running" so it can resume
+            if isinstance(e, asyncio.CancelledError) and not ctx.cancelled:
+                self._running.pop(ctx.id, None)
+                raise
+            status = "cancelled"
+            await ctx.finish(f"⛔ {spec.title} iptal edildi.")
+        except Exception as e:
+            status, error = "failed", str(e)
+            LOGGER.exception(f"Job {ctx.kind} ({ctx.id}) failed: {e}")
+            await ctx.finish(f"❌ {spec.title} hata ile durdu: {e}")
+        finally:
+            self._running.pop(ctx.id, None)
+
+        await self.update(ctx.id, status=status, error=error, progress=ctx.progress, finished_at=datetime.utcnow())
+
+    def cancel(self, job_id: str) -> bool:
+        ctx = self._running.get(job_id)
+        if not ctx:
+            return False
+        ctx.cancel()
+        return True
+
+    async def list(self, limit: int = 20) -> List[Dict[str, Any]]:
+        jobs = await self.collection.find(
+            {"kind": {"$exists": True}}, {"checkpoint": 0}
+        ).sort("started_at", -1).limit(limit).to_list(None)
+        for job in jobs:
+            ctx = self._running.get(job["_id"])
+            job["active"] = ctx is not None
+            if ctx:
+                job["progress"] = ctx.progress
+        return jobs
+
+    async def resume(self, client: Client) -> None:
+        """Restart resumable jobs left running by the previous process."""
+        async for record in self.collection.find({"kind": {"$exists": True}, "status": {"$in": ACTIVE_STATUSES}}):
+            spec = self._specs.get(record["kind"])
+            if record["_id"] in self._running:
+                continue
+            if spec and spec.resumable and not self.running(record["kind"]):
+                LOGGER.info(f"Resuming job {record['kind']} ({record['_id']}).")
+                await self._launch(client, record, f"♻️ {spec.title} kaldığı yerden devam ediyor.", resumed=True)
+                continue
+
+            await self.update(record["_id"], status="interrupted", finished_at=datetime.utcnow())
+            title = spec.title if spec else record["kind"]
+            try:
+                await client.send_message(record["chat_id"], f"⚠️ {title} yeniden başlatma nedeniyle yarıda kaldı.")
+            except Exception:
+                pass
+
+
+job_manager = JobManager(
+    JobBudget(
+        concurrency=Telegram.JOB_CONCURRENCY,
+        rate=Telegram.JOB_RATE,
+        yield_load=Telegram.JOB_YIELD_LOAD
+    ),
+    progress_interval=Telegram.JOB_PROGRESS_INTERVAL
+)
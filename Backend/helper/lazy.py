@@ -0,0 +1,51 @@
+import importlib
+import sys
+from types import ModuleType
+from typing import Any, Callable
+
+
+class LazyModule(ModuleType):
+    """
+    Stand-in for a module that is imported on first attribute access.
+    The real import goes through importlib (and its import lock), so first use
+    from worker threads is safe; afterwards its namespace is copied in and
+    attribute lookups no longer reach __getattr__.
+    """
+
+    def __getattr__(self, item: str) -> Any:
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, item)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Return `name` as a module that is only imported when first used.
+    Heavy dependencies (psutil, deep_translator, PTN, aiohttp) are then paid for
+    by the first command that needs them instead of by every cold start.
+    An already-imported module is returned as is.
+    """
+    return sys.modules.get(name) or LazyModule(name)
+
+
+class LazyObject:
+    """Proxy that builds its target with `factory` on first attribute access."""
+
+    __slots__ = ("_factory", "_target")
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_target", None)
+
+    def _resolve(self) -> Any:
+        target = object.__getattribute__(self, "_target")
+        if target is None:
+            target = object.__getattribute__(self, "_factory")()
+            object.__setattr__(self, "_target", target)
+        return target
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._resolve(), item)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        setattr(self._resolve(), key, value)
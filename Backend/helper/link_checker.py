@@ -0,0 +1,151 @@
+import re
+import asyncio
+import httpx
+from time import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+from Backend.config import Telegram
+from Backend.helper.http import HostSemaphores, http_pool
+from Backend.logger import LOGGER
+
+
+MIN_LINK_SIZE = 5 * 1024 * 1024
+
+
+class LinkProbe(NamedTuple):
+    url: str
+    status: Optional[int]
+    size: Optional[int]
+    filename: Optional[str]
+    checked_at: float
+
+    @property
+    def is_dead(self) -> bool:
+        return self.size is None or self.size < MIN_LINK_SIZE
+
+
+def filename_from_headers(headers: httpx.Headers) -> Optional[str]:
+    cd = headers.get("Content-Disposition")
+    if cd:
+        m = re.search(r'filename="(.+?)"', cd)
+        if m:
+            return m.group(1)
+    return None
+
+
+class LinkChecker:
+    """
+    HEAD-probes external links over the shared HTTP pool.
+    Identical URLs are probed once, live results are cached for cache_ttl
+    seconds and dead ones only for negative_ttl, so a host that was briefly
+    down is asked again on the next run. At most `max_entries` results are
+    kept (least recently used go first). Every host gets its own concurrency
+    slot count and minimum request interval while it has requests.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 32,
+        per_host: int = 4,
+        host_interval: float = 0.1,
+        cache_ttl: int = 3600,
+        negative_ttl: int = 60,
+        max_entries: int = 20000
+    ):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.host_interval = host_interval
+        self.cache_ttl = cache_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._host_semaphores = HostSemaphores(per_host)
+        self._host_next_slot: Dict[str, float] = {}
+        self._cache: "OrderedDict[str, LinkProbe]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def _wait_host_slot(self, host: str) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if len(self._host_next_slot) > 1024:
+            # slots in the past no longer delay anyone
+            self._host_next_slot = {h: t for h, t in self._host_next_slot.items() if t > now}
+        slot = max(now, self._host_next_slot.get(host, 0.0))
+        self._host_next_slot[host] = slot + self.host_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _fetch(self, url: str) -> LinkProbe:
+        host = urlsplit(url).hostname or ""
+        async with self._semaphore, self._host_semaphores.hold(host):
+            await self._wait_host_slot(host)
+            try:
+                # dead-link detection wants the first answer, not a retried one
+                r = await http_pool.head(url, retries=0)
+                size = r.headers.get("Content-Length")
+                return LinkProbe(
+                    url=url,
+                    status=r.status_code,
+                    size=int(size) if size and size.isdigit() else None,
+                    filename=filename_from_headers(r.headers),
+                    checked_at=time()
+                )
+            except Exception as e:
+                LOGGER.debug(f"HEAD failed for {url}: {e}")
+                return LinkProbe(url=url, status=None, size=None, filename=None, checked_at=time())
+
+    async def probe(self, url: str) -> LinkProbe:
+        cached = self._cache.get(url)
+        if cached:
+            if time() - cached.checked_at < (self.negative_ttl if cached.is_dead else self.cache_ttl):
+                self._cache.move_to_end(url)
+                return cached
+            del self._cache[url]
+
+        task = self._inflight.get(url)
+        if task is None:
+            # own task: a cancelled caller must not cancel the probe other callers share
+            task = self._inflight[url] = asyncio.create_task(self._fetch_and_cache(url))
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return await asyncio.shield(task)
+
+    async def _fetch_and_cache(self, url: str) -> LinkProbe:
+        result = await self._fetch(url)
+        self._cache[url] = result
+        self._cache.move_to_end(url)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return result
+
+    async def probe_many(
+        self,
+        urls: Iterable[str],
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, LinkProbe]:
+        unique = list(dict.fromkeys(urls))
+        total = len(unique)
+        done = 0
+        results: Dict[str, LinkProbe] = {}
+
+        async def run(url):
+            nonlocal done
+            results[url] = await self.probe(url)
+            done += 1
+            if on_progress:
+                on_progress(done, total)
+
+        await asyncio.gather(*(run(url) for url in unique))
+        return results
+
+
+link_checker = LinkChecker(
+    concurrency=Telegram.LINK_CHECK_CONCURRENCY,
+    per_host=Telegram.LINK_CHECK_PER_HOST,
+    host_interval=Telegram.LINK_CHECK_HOST_INTERVAL,
+    cache_ttl=Telegram.LINK_CHECK_CACHE_TTL,
+    negative_ttl=Telegram.LINK_CHECK_NEGATIVE_TTL,
+    max_entries=Telegram.LINK_CHECK_CACHE_SIZE
+)
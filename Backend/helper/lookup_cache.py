@@ -0,0 +1,119 @@
+import asyncio
+from collections import OrderedDict
+from time import perf_counter, time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from Backend.helper.metrics import LOOKUP_CACHE, UPSTREAM_SECONDS
+
+
+def _is_not_found(error: BaseException) -> bool:
+    # aiohttp (themoviedb) exposes .status, httpx errors carry .response.status_code
+    status = getattr(error, "status", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status == 404
+
+
+class LookupCache:
+    """
+    Single-flight cache for upstream lookups.
+    Concurrent calls with the same key share one in-flight request, run in its
+    own task so no caller's cancellation reaches the others. Found results are
+    kept up to `max_entries` (least recently used go first), empty results and
+    404s only for `negative_ttl` seconds. Errors other than 404 are not cached.
+    """
+
+    def __init__(self, name: str, negative_ttl: float = 300, max_entries: int = 4096):
+        self.name = name
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        self._values: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._negative: Dict[Hashable, Tuple[float, Optional[BaseException]]] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.negative_hits = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._values
+
+    def _negative_entry(self, key: Hashable):
+        entry = self._negative.get(key)
+        if entry and time() - entry[0] >= self.negative_ttl:
+            del self._negative[key]
+            return None
+        return entry
+
+    async def get(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        if key in self._values:
+            self.hits += 1
+            LOOKUP_CACHE.inc(1, self.name, "hit")
+            self._values.move_to_end(key)
+            return self._values[key]
+
+        negative = self._negative_entry(key)
+        if negative:
+            self.negative_hits += 1
+            LOOKUP_CACHE.inc(1, self.name, "negative")
+            if negative[1] is not None:
+                raise negative[1]
+            return None
+
+        task = self._inflight.get(key)
+        if task:
+            self.coalesced += 1
+            LOOKUP_CACHE.inc(1, self.name, "coalesced")
+        else:
+            self.misses += 1
+            LOOKUP_CACHE.inc(1, self.name, "miss")
+            task = self._inflight[key] = asyncio.create_task(self._load(key, factory))
+            task.add_done_callback(lambda done: self._done(key, done))
+        # shield: a cancelled caller stops waiting, the shared request goes on for the rest
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        started = perf_counter()
+        try:
+            value = await factory()
+        except Exception as e:
+            if _is_not_found(e):
+                self._remember_negative(key, e)
+            raise
+        finally:
+            UPSTREAM_SECONDS.observe(perf_counter() - started, self.name)
+
+        if value is None:
+            self._remember_negative(key, None)
+        else:
+            self._values[key] = value
+            while len(self._values) > self.max_entries:
+                self._values.popitem(last=False)
+        return value
+
+    def _remember_negative(self, key: Hashable, error: Optional[BaseException]) -> None:
+        now = time()
+        if len(self._negative) >= self.max_entries:
+            self._negative = {k: v for k, v in self._negative.items() if now - v[0] < self.negative_ttl}
+        self._negative[key] = (now, error)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # every caller may have been cancelled; retrieve the error so it is not logged as lost
+        if not task.cancelled():
+            task.exception()
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced + self.negative_hits
+        return {
+            "entries": len(self._values),
+            "negative": len(self._negative),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "negative_hits": self.negative_hits,
+            "hit_rate": round((lookups - self.misses) / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,183 @@
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+import traceback
+from collections import Counter, deque
+from datetime import datetime
+from time import monotonic
+from typing import Any, Dict, List, Optional, Tuple
+
+from Backend.config import Telegram
+from Backend.logger import LOGGER
+from Backend.helper.metrics import registry
+
+LOOP_LAG = registry.histogram(
+    "event_loop_lag_seconds", "Event loop wake-up delay",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+LOOP_STALLS = registry.counter("event_loop_stalls_total", "Loop stalls caught by the watchdog")
+
+STACK_DEPTH = 25
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: a task sleeps for interval seconds and records
+    how late it wakes up. Sustained lag means something is blocking the loop.
+
+    A watchdog thread watches the same heartbeat; once the loop has not come
+    back for slow_ms it captures the loop thread's stack (sys._current_frames),
+    so the blocking call itself is recorded, not just its duration.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.5,
+        window: int = 240,
+        warn_ms: float = 500.0,
+        slow_ms: float = 250.0,
+        keep: int = 20
+    ):
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self.slow_ms = slow_ms
+        self.samples = deque(maxlen=window)
+        self.stalls = deque(maxlen=keep)
+        self.offenders: Counter = Counter()
+        self._task: Optional[asyncio.Task] = None
+
+        self._heartbeat = monotonic()
+        self._loop_thread: Optional[int] = None
+        self._stall: Optional[Dict[str, Any]] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._loop_thread = threading.get_ident()
+            self._heartbeat = monotonic()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        if self.slow_ms > 0 and (self._watchdog is None or not self._watchdog.is_alive()):
+            self._stop.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self._heartbeat = monotonic()
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+            self.samples.append(lag_ms)
+            LOOP_LAG.observe(lag_ms / 1000)
+
+            stall, self._stall = self._stall, None
+            if stall is not None:
+                stall["blocked_ms"] = round(lag_ms, 1)
+            if lag_ms >= self.warn_ms:
+                where = f" in {stall['where']}" if stall else ""
+                LOGGER.warning(f"Event loop blocked for {lag_ms:.0f} ms{where}")
+
+    # ---- Watchdog (runs in its own thread) ----
+    def _watch(self) -> None:
+        limit = self.interval + self.slow_ms / 1000
+        while not self._stop.wait(min(self.slow_ms / 1000 / 2, 0.1)):
+            if self._stall is not None or monotonic() - self._heartbeat < limit:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            self._record(frame, (monotonic() - self._heartbeat - self.interval) * 1000)
+
+    def _record(self, frame, blocked_ms: float) -> None:
+        stack = traceback.extract_stack(frame)[-STACK_DEPTH:]
+        where = self._blame(stack)
+        stall = {
+            "at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "blocked_ms": round(blocked_ms, 1),
+            "where": where,
+            "stack": traceback.format_list(stack),
+        }
+        self.stalls.append(stall)
+        self.offenders[where] += 1
+        self._stall = stall
+        LOOP_STALLS.inc()
+
+    @staticmethod
+    def _blame(stack: traceback.StackSummary) -> str:
+        # innermost frame that belongs to this project, else the innermost frame
+        for entry in reversed(stack):
+            if "/Backend/" in entry.filename.replace("\\", "/"):
+                return f"{entry.filename.split('Backend', 1)[-1].lstrip('/')}:{entry.lineno} {entry.name}"
+        if not stack:
+            return "?"
+        entry = stack[-1]
+        return f"{entry.filename}:{entry.lineno} {entry.name}"
+
+    def snapshot(self) -> Dict[str, Any]:
+        if not self.samples:
+            lag = {"last_ms": 0.0, "avg_ms": 0.0, "max_ms": 0.0}
+        else:
+            lag = {
+                "last_ms": round(self.samples[-1], 1),
+                "avg_ms": round(sum(self.samples) / len(self.samples), 1),
+                "max_ms": round(max(self.samples), 1),
+            }
+        return {
+            **lag,
+            "stalls": sum(self.offenders.values()),
+            "offenders": self.offenders.most_common(10),
+            "recent": list(self.stalls)[-5:],
+        }
+
+
+# -------------------------------
+# On-demand profiler
+# -------------------------------
+_profile_lock = asyncio.Lock()
+
+
+async def profile_loop(seconds: float, limit: int = 40) -> Tuple[str, bytes]:
+    """
+    cProfile everything the event loop runs for `seconds`.
+    Returns (top functions by cumulative time as text, marshalled stats for
+    snakeviz / pstats). Only one profile can run at a time.
+    """
+    async with _profile_lock:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    out.write("\n")
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(limit)
+
+    profiler.create_stats()
+    return out.getvalue(), marshal.dumps(profiler.stats)
+
+
+def format_stalls(stalls: List[Dict[str, Any]]) -> str:
+    return "\n\n".join(
+        f"{s['at']} | {s['blocked_ms']} ms | {s['where']}\n" + "".join(s["stack"])
+        for s in stalls
+    )
+
+
+loop_monitor = LoopLagMonitor(slow_ms=Telegram.LOOP_SLOW_MS)
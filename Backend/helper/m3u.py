@@ -0,0 +1,140 @@
+import re
+from typing import AsyncIterator, Optional
+
+from Backend import db
+from Backend.config import Telegram
+
+
+MOVIE_PROJECTION = {"poster": 1, "genres": 1, "telegram.id": 1, "telegram.name": 1}
+TV_PROJECTION = {
+    "poster": 1,
+    "seasons.episodes.episode_backdrop": 1,
+    "seasons.episodes.telegram.id": 1,
+    "seasons.episodes.telegram.name": 1,
+}
+
+DECADE_GROUPS = {
+    1950: "1950’ler Filmleri",
+    1960: "1960’lar Filmleri",
+    1970: "1970’ler Filmleri",
+    1980: "1980’ler Filmleri",
+    1990: "1990’lar Filmleri",
+    2000: "2000’ler Filmleri",
+    2010: "2010’lar Filmleri",
+    2020: "2020’ler Filmleri",
+}
+
+PLATFORM_GROUPS = [
+    (("dsnp",), "Disney Dizileri"),
+    (("nf",), "Netflix Dizileri"),
+    (("exxen",), "Exxen Dizileri"),
+    (("tabii",), "Tabii Dizileri"),
+    (("hbo", "hbomax", "blutv"), "Hbo Dizileri"),
+    (("amzn",), "Amazon Dizileri"),
+    (("gain",), "Gain Dizileri"),
+    (("tod",), "Tod Dizileri"),
+]
+
+
+def build_url(file_id: str) -> str:
+    if file_id.startswith(("http://", "https://")):
+        return file_id
+    return f"{Telegram.BASE_URL}/dl/{file_id}/video.mkv"
+
+
+def movie_year_group(name: str) -> str:
+    year_match = re.search(r"\b(19\d{2}|20\d{2})\b", name)
+    if not year_match:
+        return "Filmler"
+    year = int(year_match.group(1))
+    if year < 1950:
+        return "1940’lar ve Öncesi Filmleri"
+    return DECADE_GROUPS.get(year - year % 10, "Filmler")
+
+
+def series_platform_group(name: str) -> str:
+    name_low = name.lower()
+    for keys, group in PLATFORM_GROUPS:
+        if any(key in name_low for key in keys):
+            return group
+    return "Diziler"
+
+
+def m3u_entry(name: str, logo: str, group: str, url: str) -> str:
+    return (
+        f'#EXTINF:-1 tvg-name="{name}" tvg-logo="{logo}" group-title="{group}",{name}\n'
+        f"{url}\n"
+    )
+
+
+def _build_filter(genre: Optional[str], year: Optional[int]) -> dict:
+    filter_dict = {}
+    if genre:
+        filter_dict["genres"] = genre
+    if year:
+        filter_dict["release_year"] = year
+    return filter_dict
+
+
+async def iter_movie_entries(genre: Optional[str] = None, year: Optional[int] = None) -> AsyncIterator[str]:
+    async for _, movie in db.iter_documents("movie", _build_filter(genre, year), MOVIE_PROJECTION):
+        logo = movie.get("poster", "")
+        genres = movie.get("genres") or []
+
+        for tg in movie.get("telegram") or []:
+            file_id = tg.get("id")
+            name = tg.get("name")
+            if not file_id or not name:
+                continue
+
+            url = build_url(file_id)
+            yield m3u_entry(name, logo, movie_year_group(name), url)
+            for g in genres:
+                yield m3u_entry(name, logo, f"{g} Filmleri", url)
+
+
+async def iter_tv_entries(genre: Optional[str] = None, year: Optional[int] = None) -> AsyncIterator[str]:
+    async for _, tv in db.iter_documents("tv", _build_filter(genre, year), TV_PROJECTION):
+        logo_tv = tv.get("poster", "")
+
+        for season in tv.get("seasons") or []:
+            for ep in season.get("episodes") or []:
+                logo = ep.get("episode_backdrop") or logo_tv
+                for tg in ep.get("telegram") or []:
+                    file_id = tg.get("id")
+                    name = tg.get("name")
+                    if not file_id or not name:
+                        continue
+                    yield m3u_entry(name, logo, series_platform_group(name), build_url(file_id))
+
+
+async def iter_m3u(
+    media_type: Optional[str] = None,
+    genre: Optional[str] = None,
+    year: Optional[int] = None,
+    chunk_size: int = 64 * 1024
+) -> AsyncIterator[str]:
+    """
+    Stream the playlist from every storage database in pieces of ~chunk_size characters.
+    media_type = None (both), 'movie' or 'tv'
+    """
+    buffer = ["#EXTM3U\n"]
+    buffered = len(buffer[0])
+
+    sources = []
+    if media_type in (None, "movie"):
+        sources.append(iter_movie_entries(genre, year))
+    if media_type in (None, "tv"):
+        sources.append(iter_tv_entries(genre, year))
+
+    for source in sources:
+        async for entry in source:
+            buffer.append(entry)
+            buffered += len(entry)
+            if buffered >= chunk_size:
+                yield "".join(buffer)
+                buffer.clear()
+                buffered = 0
+
+    if buffer:
+        yield "".join(buffer)
@@ -0,0 +1,178 @@
+"""
+Pure CPU passes used by the maintenance plugins.
+The per-document passes are cheap and run inline, one batch at a time;
+find_duplicates runs in the storage process pool, so keep imports here light.
+"""
+import re
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+
+GENRE_MAP = {
+    "Action": "Aksiyon", "Film-Noir": "Kara Film", "Game-Show": "Oyun Gösterisi", "Short": "Kısa",
+    "Sci-Fi": "Bilim Kurgu", "Sport": "Spor", "Adventure": "Macera", "Animation": "Animasyon",
+    "Biography": "Biyografi", "Comedy": "Komedi", "Crime": "Suç", "Documentary": "Belgesel",
+    "Drama": "Dram", "Family": "Aile", "News": "Haberler", "Fantasy": "Fantastik",
+    "History": "Tarih", "Horror": "Korku", "Music": "Müzik", "Musical": "Müzikal",
+    "Mystery": "Gizem", "Romance": "Romantik", "Science Fiction": "Bilim Kurgu",
+    "TV Movie": "TV Filmi", "Thriller": "Gerilim", "War": "Savaş", "Western": "Vahşi Batı",
+    "Action & Adventure": "Aksiyon ve Macera", "Kids": "Çocuklar", "Reality": "Gerçeklik",
+    "Reality-TV": "Gerçeklik", "Sci-Fi & Fantasy": "Bilim Kurgu ve Fantazi", "Soap": "Pembe Dizi",
+    "War & Politics": "Savaş ve Politika", "Bilim-Kurgu": "Bilim Kurgu",
+    "Aksiyon & Macera": "Aksiyon ve Macera", "Savaş & Politik": "Savaş ve Politika",
+    "Bilim Kurgu & Fantazi": "Bilim Kurgu ve Fantazi", "Talk": "Talk-Show"
+}
+
+PLATFORM_MAP = {
+    "MAX": "Max", "Hbomax": "Max", "TABİİ": "Tabii", "NF": "Netflix", "DSNP": "Disney",
+    "Tod": "Tod", "Blutv": "Max", "Tv+": "Tv+", "Exxen": "Exxen",
+    "Gain": "Gain", "HBO": "Max", "Tabii": "Tabii", "AMZN": "Amazon",
+}
+
+
+def _is_link(tid) -> bool:
+    return str(tid).lower().startswith(("http://", "https://"))
+
+
+def _iter_entries(doc):
+    yield from doc.get("telegram", [])
+    for season in doc.get("seasons", []):
+        for ep in season.get("episodes", []):
+            yield from ep.get("telegram", [])
+
+
+# -------------------------------
+# /tur
+# -------------------------------
+def genre_updates(docs: List[dict]) -> List[Tuple[object, list]]:
+    updates = []
+    for doc in docs:
+        genres = doc.get("genres", [])
+        new_genres = [GENRE_MAP.get(g, g) for g in genres]
+        if new_genres != genres:
+            updates.append((doc["_id"], new_genres))
+    return updates
+
+
+# -------------------------------
+# /platformekle
+# -------------------------------
+def platform_updates(docs: List[dict]) -> List[Tuple[object, list]]:
+    keys = [(key.lower(), val) for key, val in PLATFORM_MAP.items()]
+    updates = []
+    for doc in docs:
+        platforms = list(doc.get("platform", []))
+        updated = False
+        for t in _iter_entries(doc):
+            name_field = t.get("name", "").lower()
+            for key, val in keys:
+                if key in name_field and val not in platforms:
+                    platforms.append(val)
+                    updated = True
+        if updated:
+            updates.append((doc["_id"], platforms))
+    return updates
+
+
+# -------------------------------
+# /aynivideolarisil
+# -------------------------------
+def normalize_name(name) -> str:
+    name = str(name or "").lower()
+    name = re.sub(r"\.(mkv|mp4|avi|m4v|mov|webm|ts)$", "", name)
+    return " ".join(re.findall(r"[a-z0-9ğüşöçı]+", name))
+
+
+PIXELDRAIN_URL = re.compile(r"https?://pixeldrain\.com/(?:u|api/file)/([A-Za-z0-9]+)")
+
+
+def normalize_url(url: str) -> str:
+    url = str(url).strip()
+    m = PIXELDRAIN_URL.match(url)
+    if m:
+        return f"pixeldrain:{m.group(1)}"
+    return re.sub(r"^https?://", "", url).rstrip("/").lower()
+
+
+def entry_fingerprint(entry: dict, fingerprints: Dict[str, dict]) -> tuple:
+    """file_unique_id for Telegram files, the normalized URL for links, (name, size) otherwise."""
+    tid = entry.get("id") or ""
+    if _is_link(tid):
+        return ("url", normalize_url(tid))
+    fp = fingerprints.get(tid)
+    if fp and fp.get("file_unique_id"):
+        return ("tg", fp["file_unique_id"])
+    size = fp.get("file_size") if fp else None
+    return ("name", normalize_name(entry.get("name")), size or entry.get("size"))
+
+
+def find_duplicates(entries: List[dict], fingerprints: Dict[str, dict]) -> List[Tuple[dict, dict]]:
+    """
+    Group flattened entries from every storage database by fingerprint and return
+    (removed, kept) pairs. The kept copy is a Telegram file if there is one,
+    then the one in the most recently updated title, then the last one added.
+    """
+    groups: Dict[tuple, List[dict]] = {}
+    for entry in entries:
+        groups.setdefault(entry_fingerprint(entry, fingerprints), []).append(entry)
+
+    def rank(entry):
+        return (
+            not _is_link(entry.get("id", "")),
+            entry.get("updated_on") or datetime.min,
+            entry.get("db_index", 0),
+            entry.get("t", 0),
+        )
+
+    pairs = []
+    for items in groups.values():
+        if len(items) < 2:
+            continue
+        keep = max(items, key=rank)
+        pairs.extend((item, keep) for item in items if item is not keep)
+    return pairs
+
+
+# -------------------------------
+# /linklerisil
+# -------------------------------
+def strip_link_updates(docs: List[dict], col_name: str):
+    """Return (updates [(id, field, value)], delete_ids, removed_entries)."""
+    updates, deletes, total_removed = [], [], 0
+
+    for doc in docs:
+        if col_name == "movie":
+            telegram = doc.get("telegram", [])
+            kept = [t for t in telegram if not _is_link(t.get("id", ""))]
+            removed = len(telegram) - len(kept)
+            if removed:
+                total_removed += removed
+                if kept:
+                    updates.append((doc["_id"], "telegram", kept))
+                else:
+                    deletes.append(doc["_id"])
+            continue
+
+        seasons = doc.get("seasons", [])
+        doc_updated = False
+        for season in seasons:
+            new_episodes = []
+            for ep in season.get("episodes", []):
+                telegram = ep.get("telegram", [])
+                kept = [t for t in telegram if not _is_link(t.get("id", ""))]
+                total_removed += len(telegram) - len(kept)
+                if kept:
+                    if len(kept) != len(telegram):
+                        doc_updated = True
+                    ep["telegram"] = kept
+                    new_episodes.append(ep)
+                else:
+                    doc_updated = True
+            season["episodes"] = new_episodes
+
+        if not any(s.get("episodes") for s in seasons):
+            deletes.append(doc["_id"])
+        elif doc_updated:
+            updates.append((doc["_id"], "seasons", seasons))
+
+    return updates, deletes, total_removed
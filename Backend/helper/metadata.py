@@ -1,28 +1,57 @@
 import asyncio
-import PTN
 import re
+import threading
+from collections import OrderedDict
 from datetime import datetime, timezone
 
-from deep_translator import GoogleTranslator
-from Backend.helper.imdb import get_detail, get_season, search_title
-from themoviedb import aioTMDb
+from Backend.helper.http import http_pool
+from Backend.helper.imdb import CINEMETA_LIMITER, get_detail, get_season, get_season_episodes, meta_cache, search_title
+from Backend.helper.lookup_cache import LookupCache
+from Backend.helper.lazy import LazyObject, lazy_import
+from Backend.helper.ratelimit import TokenBucket
 from Backend.config import Telegram
 import Backend
 from Backend.logger import LOGGER
 from Backend.helper.encrypt import encode_string
 
+# PTN, deep_translator and themoviedb load on the first lookup, not at plugin import
+PTN = lazy_import("PTN")
+deep_translator = lazy_import("deep_translator")
+
 # -------------------------------------------------
 # CONFIG
 # -------------------------------------------------
-tmdb = aioTMDb(key=Telegram.TMDB_API, language="en-US", region="US")
+def _make_tmdb():
+    from themoviedb import aioTMDb
+
+    class PooledTMDb(aioTMDb):
+        """aioTMDb on the shared aiohttp session instead of a new session per request."""
+
+        @property
+        def session(self):
+            return http_pool.aiohttp_session
+
+        @session.setter
+        def session(self, session):
+            pass
+
+    return PooledTMDb(key=Telegram.TMDB_API, language="en-US", region="US")
 
-IMDB_CACHE = {}
-TMDB_SEARCH_CACHE = {}
-TMDB_DETAILS_CACHE = {}
-EPISODE_CACHE = {}
-TRANSLATE_CACHE = {}
+tmdb = LazyObject(_make_tmdb)
+
+# single-flight: concurrent identical lookups share one upstream request
+IMDB_CACHE = LookupCache("imdb_search", Telegram.METADATA_NEGATIVE_TTL, Telegram.LOOKUP_CACHE_SIZE)
+TMDB_SEARCH_CACHE = LookupCache("tmdb_search", Telegram.METADATA_NEGATIVE_TTL, Telegram.LOOKUP_CACHE_SIZE)
+TMDB_DETAILS_CACHE = LookupCache("tmdb_details", Telegram.METADATA_NEGATIVE_TTL, Telegram.LOOKUP_CACHE_SIZE)
+EPISODE_CACHE = LookupCache("tmdb_episode", Telegram.METADATA_NEGATIVE_TTL, Telegram.LOOKUP_CACHE_SIZE)
+SEASON_CACHE = LookupCache("tmdb_season", Telegram.METADATA_NEGATIVE_TTL, Telegram.LOOKUP_CACHE_SIZE)
+LOOKUP_CACHES = (IMDB_CACHE, TMDB_SEARCH_CACHE, TMDB_DETAILS_CACHE, EPISODE_CACHE, SEASON_CACHE)
+# least recently used translations go first; filled from worker threads, hence the lock
+TRANSLATE_CACHE: "OrderedDict[str, str]" = OrderedDict()
+TRANSLATE_LOCK = threading.Lock()
 
 API_SEMAPHORE = asyncio.Semaphore(12)
+TMDB_LIMITER = TokenBucket(Telegram.TMDB_RATE)
 
 # -------------------------------------------------
 # GENRE NORMALIZATION
@@ -131,47 +160,55 @@ def to_iso_datetime(date_value):
     except Exception:
         return ""
 
-def translate_text_safe(text):
+def translate_text(text):
+    """Turkish translation of text; raises when the translator fails (failures are not cached)."""
     if not text or not str(text).strip():
         return ""
-    if text in TRANSLATE_CACHE:
-        return TRANSLATE_CACHE[text]
+    with TRANSLATE_LOCK:
+        if text in TRANSLATE_CACHE:
+            TRANSLATE_CACHE.move_to_end(text)
+            return TRANSLATE_CACHE[text]
+    tr = deep_translator.GoogleTranslator(source="en", target="tr").translate(text)
+    with TRANSLATE_LOCK:
+        TRANSLATE_CACHE[text] = tr
+        while len(TRANSLATE_CACHE) > Telegram.TRANSLATE_CACHE_SIZE:
+            TRANSLATE_CACHE.popitem(last=False)
+    return tr
+
+def translate_text_safe(text):
     try:
-        tr = GoogleTranslator(source="en", target="tr").translate(text)
+        return translate_text(text)
     except Exception:
-        tr = text
-    TRANSLATE_CACHE[text] = tr
-    return tr
+        # a later call may succeed
+        return text
 
 # -------------------------------------------------
 # SAFE SEARCH
 # -------------------------------------------------
 async def safe_imdb_search(title, type_):
-    key = f"{type_}:{title}"
-    if key in IMDB_CACHE:
-        return IMDB_CACHE[key]
-    try:
+    async def lookup():
         async with API_SEMAPHORE:
             res = await search_title(title, type_)
-        imdb_id = res["id"] if res else None
-        IMDB_CACHE[key] = imdb_id
-        return imdb_id
+        return res["id"] if res else None
+
+    try:
+        return await IMDB_CACHE.get(f"{type_}:{title}", lookup)
     except Exception:
         return None
 
 async def safe_tmdb_search(title, type_, year=None):
-    key = f"{type_}:{title}:{year}"
-    if key in TMDB_SEARCH_CACHE:
-        return TMDB_SEARCH_CACHE[key]
-    try:
+    async def lookup():
         async with API_SEMAPHORE:
+            await TMDB_LIMITER.acquire()
             res = (
                 await tmdb.search().movies(title, year=year)
                 if type_ == "movie"
                 else await tmdb.search().tv(title)
             )
-        TMDB_SEARCH_CACHE[key] = res[0] if res else None
-        return TMDB_SEARCH_CACHE[key]
+        return res[0] if res else None
+
+    try:
+        return await TMDB_SEARCH_CACHE.get(f"{type_}:{title}:{year}", lookup)
     except Exception:
         return None
 
@@ -179,37 +216,54 @@ async def safe_tmdb_search(title, type_, year=None):
 # TMDB FETCHERS
 # -------------------------------------------------
 async def _tmdb_tv_details(tid):
-    if tid in TMDB_DETAILS_CACHE:
-        return TMDB_DETAILS_CACHE[tid]
-    async with API_SEMAPHORE:
-        d = await tmdb.tv(tid).details(
-            append_to_response="external_ids,credits"
-        )
-        d.images = await tmdb.tv(tid).images()
-    TMDB_DETAILS_CACHE[tid] = d
-    return d
+    async def lookup():
+        async with API_SEMAPHORE:
+            await TMDB_LIMITER.acquire(2)
+            d = await tmdb.tv(tid).details(
+                append_to_response="external_ids,credits"
+            )
+            d.images = await tmdb.tv(tid).images()
+        return d
+
+    return await TMDB_DETAILS_CACHE.get(("tv", tid), lookup)
 
 async def _tmdb_episode_details(tid, s, e):
-    key = (tid, s, e)
-    if key in EPISODE_CACHE:
-        return EPISODE_CACHE[key]
-    async with API_SEMAPHORE:
-        d = await tmdb.episode(tid, s, e).details(
-            append_to_response="images"
-        )
-    EPISODE_CACHE[key] = d
-    return d
+    async def lookup():
+        async with API_SEMAPHORE:
+            await TMDB_LIMITER.acquire()
+            return await tmdb.episode(tid, s, e).details(
+                append_to_response="images"
+            )
+
+    return await EPISODE_CACHE.get((tid, s, e), lookup)
 
 async def _tmdb_movie_details(mid):
-    if mid in TMDB_DETAILS_CACHE:
-        return TMDB_DETAILS_CACHE[mid]
-    async with API_SEMAPHORE:
-        d = await tmdb.movie(mid).details(
-            append_to_response="external_ids,credits"
-        )
-        d.images = await tmdb.movie(mid).images()
-    TMDB_DETAILS_CACHE[mid] = d
-    return d
+    async def lookup():
+        async with API_SEMAPHORE:
+            await TMDB_LIMITER.acquire(2)
+            d = await tmdb.movie(mid).details(
+                append_to_response="external_ids,credits"
+            )
+            d.images = await tmdb.movie(mid).images()
+        return d
+
+    return await TMDB_DETAILS_CACHE.get(("movie", mid), lookup)
+
+async def _tmdb_season_details(tid, s):
+    async def lookup():
+        async with API_SEMAPHORE:
+            await TMDB_LIMITER.acquire()
+            return await tmdb.season(tid, s).details()
+
+    return await SEASON_CACHE.get((tid, s), lookup)
+
+def cache_stats():
+    """Counters of every lookup cache, the Cinemeta meta cache and the rate limiters."""
+    return {
+        "caches": {c.name: c.snapshot() for c in LOOKUP_CACHES},
+        "cinemeta": meta_cache.snapshot(),
+        "limiters": {"tmdb": TMDB_LIMITER.snapshot(), "cinemeta": CINEMETA_LIMITER.snapshot()},
+    }
 
 # -------------------------------------------------
 # MAIN ENTRY
@@ -260,8 +314,11 @@ async def fetch_tv_metadata(title, season, episode, encoded, year, quality, defa
             ep = await get_season(imdb_id, season, episode)
             images = format_imdb_images(imdb_id)
 
-            # Bölüm başlığını çeviriyoruz
-            episode_title = translate_text_safe(ep.get("title", ""))
+            # Bölüm başlığını, açıklamayı ve bölüm özetini çeviriyoruz (thread'de; loop'u bloklamasın)
+            episode_title, description, episode_overview = await asyncio.gather(*(
+                asyncio.to_thread(translate_text_safe, t)
+                for t in (ep.get("title", ""), imdb.get("plot", ""), ep.get("plot", ""))
+            ))
 
             return {
                 "tmdb_id": imdb.get("moviedb_id"),
@@ -270,7 +327,7 @@ async def fetch_tv_metadata(title, season, episode, encoded, year, quality, defa
                 "year": imdb.get("releaseDetailed", {}).get("year", 0),
                 "released": to_iso_datetime(imdb.get("releaseDetailed", {}).get("date")),
                 "rate": imdb.get("rating", {}).get("star", 0),
-                "description": translate_text_safe(imdb.get("plot", "")),
+                "description": description,
                 "poster": images["poster"],
                 "backdrop": images["backdrop"],
                 "logo": images["logo"],
@@ -282,7 +339,7 @@ async def fetch_tv_metadata(title, season, episode, encoded, year, quality, defa
                 "episode_number": episode,
                 "episode_title": episode_title,  # Çevrilmiş başlık
                 "episode_backdrop": ep.get("image", ""),
-                "episode_overview": translate_text_safe(ep.get("plot", "")),
+                "episode_overview": episode_overview,
                 "episode_released": to_iso_datetime(ep.get("released")),
                 "quality": quality,
                 "encoded_string": encoded,
@@ -301,8 +358,11 @@ async def fetch_tv_metadata(title, season, episode, encoded, year, quality, defa
 
     still = ep.still_path if ep else None
 
-    # TMDB'den alınan bölüm başlığını çeviriyoruz
-    episode_title = translate_text_safe(ep.name) if ep else ""
+    # TMDB'den alınan bölüm başlığını, açıklamayı ve bölüm özetini çeviriyoruz
+    episode_title, description, episode_overview = await asyncio.gather(*(
+        asyncio.to_thread(translate_text_safe, t)
+        for t in (ep.name if ep else "", tv.overview, ep.overview if ep else "")
+    ))
 
     return {
         "tmdb_id": tv.id,
@@ -311,7 +371,7 @@ async def fetch_tv_metadata(title, season, episode, encoded, year, quality, defa
         "year": tv.first_air_date.year if tv.first_air_date else 0,
         "released": to_iso_datetime(tv.first_air_date),
         "rate": tv.vote_average or 0,
-        "description": translate_text_safe(tv.overview),
+        "description": description,
         "poster": format_tmdb_image(tv.poster_path),
         "backdrop": format_tmdb_image(tv.backdrop_path, "original"),
         "logo": get_tmdb_logo(tv.images),
@@ -323,12 +383,54 @@ async def fetch_tv_metadata(title, season, episode, encoded, year, quality, defa
         "episode_number": episode,
         "episode_title": episode_title,  # Çevrilmiş başlık
         "episode_backdrop": format_tmdb_image(still, "original") if still else "",
-        "episode_overview": translate_text_safe(ep.overview) if ep else "",
+        "episode_overview": episode_overview,
         "episode_released": to_iso_datetime(ep.air_date) if ep else "",
         "quality": quality,
         "encoded_string": encoded,
     }
 
+# -------------------------------------------------
+# SEASON EPISODES
+# -------------------------------------------------
+async def fetch_season_episodes(imdb_id, tmdb_id, season):
+    """
+    Episode fields for a whole season in one upstream request:
+    {episode_number: {episode_title, episode_overview, episode_released, episode_backdrop}}.
+    Cinemeta is tried first when an IMDb id is known, TMDB otherwise.
+    Texts are translated off the event loop.
+    """
+    raw = {}
+    if imdb_id:
+        for number, ep in (await get_season_episodes(imdb_id, season)).items():
+            raw[number] = (ep.get("title", ""), ep.get("plot", ""), ep.get("released"), ep.get("image", ""))
+
+    if not raw and tmdb_id:
+        try:
+            details = await _tmdb_season_details(int(tmdb_id), season)
+        except Exception:
+            details = None
+        for ep in getattr(details, "episodes", None) or []:
+            raw[ep.episode_number] = (
+                ep.name or "",
+                ep.overview or "",
+                ep.air_date,
+                format_tmdb_image(ep.still_path, "original") if ep.still_path else "",
+            )
+
+    texts = list(dict.fromkeys(t for title, overview, _, _ in raw.values() for t in (title, overview) if t))
+    translated = await asyncio.gather(*(asyncio.to_thread(translate_text_safe, t) for t in texts))
+    tr = dict(zip(texts, translated))
+
+    return {
+        number: {
+            "episode_title": tr.get(title, ""),
+            "episode_overview": tr.get(overview, ""),
+            "episode_released": to_iso_datetime(released),
+            "episode_backdrop": backdrop,
+        }
+        for number, (title, overview, released, backdrop) in raw.items()
+    }
+
 # -------------------------------------------------
 # MOVIE METADATA
 # -------------------------------------------------
@@ -343,6 +445,7 @@ async def fetch_movie_metadata(title, encoded, year, quality, default_id):
         try:
             imdb = await get_detail(imdb_id, "movie")
             images = format_imdb_images(imdb_id)
+            description = await asyncio.to_thread(translate_text_safe, imdb.get("plot", ""))
 
             return {
                 "tmdb_id": imdb.get("moviedb_id"),
@@ -351,7 +454,7 @@ async def fetch_movie_metadata(title, encoded, year, quality, default_id):
                 "year": imdb.get("releaseDetailed", {}).get("year", 0),
                 "released": to_iso_datetime(imdb.get("releaseDetailed", {}).get("date")),
                 "rate": imdb.get("rating", {}).get("star", 0),
-                "description": translate_text_safe(imdb.get("plot", "")),
+                "description": description,
                 "poster": images["poster"],
                 "backdrop": images["backdrop"],
                 "logo": images["logo"],
@@ -372,6 +475,7 @@ async def fetch_movie_metadata(title, encoded, year, quality, default_id):
         tmdb_id = res.id
 
     movie = await _tmdb_movie_details(tmdb_id)
+    description = await asyncio.to_thread(translate_text_safe, movie.overview)
 
     return {
         "tmdb_id": movie.id,
@@ -380,7 +484,7 @@ async def fetch_movie_metadata(title, encoded, year, quality, default_id):
         "year": movie.release_date.year if movie.release_date else 0,
         "released": to_iso_datetime(movie.release_date),
         "rate": movie.vote_average or 0,
-        "description": translate_text_safe(movie.overview),
+        "description": description,
         "poster": format_tmdb_image(movie.poster_path),
         "backdrop": format_tmdb_image(movie.backdrop_path, "original"),
         "logo": get_tmdb_logo(movie.images),
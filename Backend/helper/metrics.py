@@ -0,0 +1,310 @@
+"""
+Minimal in-process Prometheus registry (text exposition format 0.0.4).
+Recording is a dict lookup plus a few additions, so it stays on under full
+load; label tuples are created once per distinct series. Observations can
+come from executor threads (pymongo command events), hence the per-metric lock.
+"""
+import functools
+import inspect
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi.routing import APIRoute
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RATE_BUCKETS = tuple(float(2 ** i) * 1024 * 64 for i in range(0, 12))    # 64 KiB/s .. 128 MiB/s
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, *labels) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in list(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Set directly, or backed by a callable read at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), function: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._function = function
+
+    def set(self, value: float, *labels) -> None:
+        self._values[labels] = value
+
+    def inc(self, amount: float = 1, *labels) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount: float = 1, *labels) -> None:
+        self.inc(-amount, *labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        if self._function is not None:
+            try:
+                lines.append(f"{self.name} {_number(self._function())}")
+            except Exception:
+                pass
+        for labels, value in list(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per series: [bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple, List] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, *labels) -> "_Timer":
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, total) in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(perf_counter() - self.start, *self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), function=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self, process: str = "") -> str:
+        """Text exposition; with `process`, every sample is labelled process="<process>"."""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        if process:
+            lines = [_with_label(line, f'process="{_escape(process)}"') for line in lines]
+        return "\n".join(lines) + "\n"
+
+
+def _with_label(line: str, label: str) -> str:
+    if line.startswith("#"):
+        return line
+    series, value = line.rsplit(" ", 1)
+    if series.endswith("}"):
+        return f"{series[:-1]},{label}}} {value}"
+    return f"{series}{{{label}}} {value}"
+
+
+def merge(texts: Iterable[str]) -> str:
+    """
+    Join expositions of several processes into one: each family keeps one
+    HELP/TYPE header followed by the samples of every process.
+    """
+    families: Dict[str, Tuple[List[str], List[str]]] = {}
+    current: Optional[Tuple[List[str], List[str]]] = None
+    for text in texts:
+        for line in text.splitlines():
+            if line.startswith(("# HELP ", "# TYPE ")):
+                header, samples = current = families.setdefault(line.split(" ", 3)[2], ([], []))
+                if line not in header:
+                    header.append(line)
+            elif line and current is not None:
+                current[1].append(line)
+    lines = [line for header, samples in families.values() for line in header + samples]
+    return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+# -------------------------------
+# Metrics
+# -------------------------------
+STREAM_ACTIVE = registry.gauge("stream_active", "Streams currently being served")
+STREAM_REQUESTS = registry.counter("stream_requests_total", "Stream requests by status code", ("status",))
+STREAM_TTFB = registry.histogram("stream_ttfb_seconds", "Request start to first body chunk")
+STREAM_BYTES = registry.counter("stream_bytes_total", "Bytes sent to stream clients")
+STREAM_RATE = registry.histogram("stream_bytes_per_second", "Average rate of each finished stream", buckets=RATE_BUCKETS)
+STREAM_QUEUE_SECONDS = registry.histogram("stream_queue_seconds", "Wait for a stream slot or a GetFile slot", ("stage", "kind"))
+STREAM_QUEUED = registry.gauge("stream_queued", "Streams and parts waiting in the scheduler", ("stage",))
+
+GETFILE_SECONDS = registry.histogram("telegram_getfile_seconds", "upload.GetFile latency", ("dc", "client"))
+FILEID_CACHE = registry.counter("fileid_cache_total", "FileId cache lookups", ("result",))
+FILE_INDEX_LOOKUPS = registry.counter("file_index_total", "File index lookups", ("result",))
+STREAM_LOCAL_BYTES = registry.counter("stream_local_bytes_total", "Stream bytes answered from the file index")
+
+MONGO_METHOD_SECONDS = registry.histogram("mongo_method_seconds", "Database method latency", ("method",))
+MONGO_COMMAND_SECONDS = registry.histogram("mongo_command_seconds", "Mongo command latency per shard", ("shard", "command"))
+MONGO_COMMAND_FAILURES = registry.counter("mongo_command_failures_total", "Failed Mongo commands per shard", ("shard", "command"))
+
+INGEST_QUEUE = registry.gauge("ingest_queue_depth", "Files waiting in the receiver queue")
+INGEST_SECONDS = registry.histogram("ingest_insert_seconds", "insert_media latency in the receiver")
+
+UPSTREAM_SECONDS = registry.histogram("metadata_upstream_seconds", "Metadata upstream lookup latency", ("api",))
+LOOKUP_CACHE = registry.counter("metadata_cache_total", "Metadata lookup cache results", ("cache", "result"))
+
+ROUTE_SECONDS = registry.histogram("http_route_seconds", "Route handler latency", ("method", "route", "status"))
+
+
+# -------------------------------
+# Helpers
+# -------------------------------
+def timed_methods(histogram: Histogram, exclude: Iterable[str] = ()):
+    """Class decorator: time every public coroutine method into histogram{method=name}."""
+    skip = set(exclude)
+
+    def wrap(name, func):
+        @functools.wraps(func)
+        async def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(perf_counter() - start, name)
+        return timed
+
+    def decorate(cls):
+        for name, func in list(vars(cls).items()):
+            if name.startswith("_") or name in skip or not inspect.iscoroutinefunction(func):
+                continue
+            setattr(cls, name, wrap(name, func))
+        return cls
+
+    return decorate
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo CommandListener feeding mongo_command_seconds for one shard."""
+
+    def __init__(self, shard: str):
+        self.shard = shard
+
+    def started(self, event) -> None:
+        pass
+
+    def succeeded(self, event) -> None:
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1e6, self.shard, event.command_name)
+
+    def failed(self, event) -> None:
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1e6, self.shard, event.command_name)
+        MONGO_COMMAND_FAILURES.inc(1, self.shard, event.command_name)
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that records handler latency into http_route_seconds{method, route, status}."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        route = self.path
+
+        async def timed_handler(request):
+            start = perf_counter()
+            status = "500"
+            try:
+                response = await handler(request)
+                status = str(response.status_code)
+                return response
+            except Exception as e:
+                status = str(getattr(e, "status_code", 500))
+                raise
+            finally:
+                ROUTE_SECONDS.observe(perf_counter() - start, request.method, route, status)
+
+        return timed_handler
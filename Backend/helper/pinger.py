@@ -1,7 +1,8 @@
 import asyncio
 import traceback
-import aiohttp
+import httpx
 from Backend.config import Telegram  
+from Backend.helper.http import http_pool
 from Backend.logger import LOGGER
 
 async def ping():
@@ -12,12 +13,9 @@ async def ping():
     while True:
         await asyncio.sleep(sleep_time)
         try:
-            async with aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=10)
-            ) as session:
-                async with session.get(manifest_url) as resp:
-                    LOGGER.info(f"Pinged manifest URL — Status: {resp.status}")
-        except asyncio.TimeoutError:
+            resp = await http_pool.get(manifest_url, timeout=10, retries=0)
+            LOGGER.info(f"Pinged manifest URL — Status: {resp.status_code}")
+        except httpx.TimeoutException:
             LOGGER.warning("Timeout: Could not connect to manifest URL.")
         except Exception:
             LOGGER.error("Ping failed:\n" + traceback.format_exc())
@@ -0,0 +1,223 @@
+import asyncio
+import httpx
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from pymongo import DeleteMany, UpdateOne
+
+from Backend import db
+from Backend.config import Telegram
+from Backend.helper.http import http_pool
+from Backend.helper.jobs import JobContext
+from Backend.helper.media_workers import PIXELDRAIN_URL
+from Backend.helper.storage import aggregate_all
+from Backend.logger import LOGGER
+
+
+def file_id_from_url(url: str) -> Optional[str]:
+    m = PIXELDRAIN_URL.match(str(url or "").strip())
+    return m.group(1) if m else None
+
+
+class PixelDrainError(Exception):
+    pass
+
+
+# -------------------------------
+# Client
+# -------------------------------
+class PixelDrainClient:
+    """
+    Async PixelDrain API client on the shared HTTP pool.
+    At most `concurrency` requests are in flight; 429 and 5xx responses are
+    retried by the pool with jittered backoff, honoring Retry-After.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://pixeldrain.com/api",
+        concurrency: int = 4,
+        retries: int = 4
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.retries = retries
+
+        self._auth = httpx.BasicAuth("", api_key or "")
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        async with self._semaphore:
+            return await http_pool.request(
+                method, f"{self.base_url}{path}", retries=self.retries, auth=self._auth, **kwargs
+            )
+
+    # ---- Listing ----
+    async def _fetch_page(self, page: int) -> List[Dict[str, Any]]:
+        r = await self._request("GET", "/user/files", params={"page": page})
+        if r.status_code != 200:
+            # only an empty page ends the listing; a failed one would drop every file after it
+            raise PixelDrainError(f"File listing failed on page {page}: HTTP {r.status_code}")
+        return r.json().get("files", []) or []
+
+    async def list_files(self, max_pages: int = 100) -> List[Dict[str, Any]]:
+        """
+        Fetch pages `concurrency` at a time until a page is empty or brings no
+        new ids (the API may ignore paging and return everything on each page).
+        Raises PixelDrainError if any page fails, never returning a partial list.
+        """
+        files: Dict[str, Dict[str, Any]] = {}
+        page = 1
+        while page <= max_pages:
+            window = range(page, min(page + self.concurrency, max_pages + 1))
+            results = await asyncio.gather(*(self._fetch_page(p) for p in window))
+
+            finished = False
+            for data in results:
+                before = len(files)
+                for f in data:
+                    if f.get("id"):
+                        files[f["id"]] = f
+                if not data or len(files) == before:
+                    finished = True
+                    break
+            if finished:
+                break
+            page += len(window)
+
+        return list(files.values())
+
+    # ---- Deleting ----
+    async def delete_file(self, file_id: str) -> bool:
+        try:
+            r = await self._request("DELETE", f"/file/{file_id}")
+        except Exception as e:
+            LOGGER.warning(f"PixelDrain delete failed for {file_id}: {e}")
+            return False
+        return r.status_code in (200, 204, 404)
+
+    async def delete_many(
+        self,
+        file_ids: Iterable[str],
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        token: Optional[JobContext] = None
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Delete in parallel (bounded by the client semaphore); returns (deleted, failed).
+        With a job `token` every delete also takes a job budget slot and a cancel stops the rest.
+        """
+        ids = list(dict.fromkeys(file_ids))
+        deleted: List[str] = []
+        failed: List[str] = []
+
+        async def run(file_id):
+            async with token.slot() if token else nullcontext():
+                ok = await self.delete_file(file_id)
+            (deleted if ok else failed).append(file_id)
+            if on_progress:
+                on_progress(len(deleted) + len(failed), len(ids))
+
+        await asyncio.gather(*(run(i) for i in ids))
+        return deleted, failed
+
+
+pixeldrain = PixelDrainClient(
+    Telegram.PIXELDRAIN,
+    base_url=Telegram.PIXELDRAIN_API_BASE,
+    concurrency=Telegram.PIXELDRAIN_CONCURRENCY
+)
+
+
+# -------------------------------
+# Sync against stored links
+# -------------------------------
+LINK_PIPELINES = {
+    "movie": [
+        {"$match": {"telegram.id": {"$regex": "pixeldrain\\.com"}}},
+        {"$unwind": "$telegram"},
+        {"$match": {"telegram.id": {"$regex": "pixeldrain\\.com"}}},
+        {"$project": {"_id": 0, "url": "$telegram.id", "name": "$telegram.name", "title": 1}},
+    ],
+    "tv": [
+        {"$match": {"seasons.episodes.telegram.id": {"$regex": "pixeldrain\\.com"}}},
+        {"$unwind": "$seasons"},
+        {"$unwind": "$seasons.episodes"},
+        {"$unwind": "$seasons.episodes.telegram"},
+        {"$match": {"seasons.episodes.telegram.id": {"$regex": "pixeldrain\\.com"}}},
+        {"$project": {"_id": 0, "url": "$seasons.episodes.telegram.id", "name": "$seasons.episodes.telegram.name", "title": 1}},
+    ],
+}
+
+
+class SyncReport(NamedTuple):
+    total: int
+    new: int
+    gone: int
+    orphans: List[Dict[str, Any]]           # on PixelDrain, not linked from any document
+    missing: List[Dict[str, Any]]           # linked from a document, gone from PixelDrain
+
+
+async def linked_files() -> Dict[str, List[Dict[str, Any]]]:
+    """{pixeldrain file id: [link entries]} across every storage database."""
+    rows = await asyncio.gather(*(aggregate_all(col, pipeline) for col, pipeline in LINK_PIPELINES.items()))
+    linked: Dict[str, List[Dict[str, Any]]] = {}
+    for row in (r for shard in rows for r in shard):
+        file_id = file_id_from_url(row.get("url"))
+        if file_id:
+            linked.setdefault(file_id, []).append(row)
+    return linked
+
+
+async def sync_pixeldrain(client: PixelDrainClient = pixeldrain) -> SyncReport:
+    """
+    Reconcile the account's files with the links stored in Mongo.
+    The last seen file list lives in tracking.pixeldrain; only new, vanished
+    or re-linked files are written on each run.
+    """
+    collection = db.dbs["tracking"]["pixeldrain"]
+    files, linked, previous = await asyncio.gather(
+        client.list_files(),
+        linked_files(),
+        collection.find({}, {"referenced": 1}).to_list(None),
+    )
+    previous = {doc["_id"]: doc.get("referenced") for doc in previous}
+    current = {f["id"]: f for f in files}
+
+    now = datetime.utcnow()
+    ops = []
+    for file_id, f in current.items():
+        referenced = file_id in linked
+        if file_id in previous and previous[file_id] == referenced:
+            continue
+        ops.append(UpdateOne(
+            {"_id": file_id},
+            {"$set": {
+                "name": f.get("name"),
+                "size": f.get("size", 0),
+                "date_upload": f.get("date_upload"),
+                "referenced": referenced,
+                "synced_at": now,
+            }},
+            upsert=True
+        ))
+
+    gone = [file_id for file_id in previous if file_id not in current]
+    if gone:
+        ops.append(DeleteMany({"_id": {"$in": gone}}))
+    if ops:
+        await collection.bulk_write(ops, ordered=False)
+
+    return SyncReport(
+        total=len(current),
+        new=sum(1 for file_id in current if file_id not in previous),
+        gone=len(gone),
+        orphans=[f for file_id, f in current.items() if file_id not in linked],
+        missing=[
+            {"id": file_id, **entry}
+            for file_id, entries in linked.items() if file_id not in current
+            for entry in entries
+        ],
+    )
@@ -0,0 +1,37 @@
+import asyncio
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Async token bucket: refills `rate` tokens per second up to `burst`.
+    Callers reserve tokens up front and sleep off any deficit, so concurrent
+    waiters are served in arrival order without a lock.
+    A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.burst
+        self._updated: Optional[float] = None
+        self.waits = 0
+        self.waited = 0.0
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        if self.rate <= 0:
+            return
+        now = asyncio.get_running_loop().time()
+        if self._updated is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+        self._tokens -= tokens
+        if self._tokens < 0:
+            delay = -self._tokens / self.rate
+            self.waits += 1
+            self.waited += delay
+            await asyncio.sleep(delay)
+
+    def snapshot(self) -> dict:
+        return {"rate": self.rate, "waits": self.waits, "waited_s": round(self.waited, 2)}
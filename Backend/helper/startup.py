@@ -0,0 +1,111 @@
+import asyncio
+import json
+from time import perf_counter
+from typing import Awaitable, Dict, Iterable, List, Optional, Tuple
+
+from Backend.logger import LOGGER
+
+# path prefix -> components it needs; first match wins, unmatched paths need nothing
+GATED_PATHS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("/dl/", ("telegram",)),
+    ("/hls/", ("telegram",)),
+    ("/stremio/manifest.json", ()),
+    ("/stremio/", ("db",)),
+    ("/api/", ("db",)),
+    ("/media/", ("db",)),
+    ("/playlist", ("db",)),
+    ("/status", ("db",)),
+]
+OPEN_PATHS = ("/login", "/logout", "/static", "/ready", "/metrics", "/set-theme")
+
+
+class Readiness:
+    """
+    Named readiness flags set by start_services as each part comes up.
+    The web server starts before Telegram logins finish; requests that need a
+    component that is not ready yet wait up to `timeout` seconds, then get 503.
+    """
+
+    def __init__(self, components: Iterable[str] = ("db", "telegram"), timeout: float = 30.0):
+        self.timeout = timeout
+        self._events: Dict[str, asyncio.Event] = {name: asyncio.Event() for name in components}
+
+    def set(self, name: str) -> None:
+        self._events[name].set()
+
+    def is_ready(self, name: Optional[str] = None) -> bool:
+        if name is None:
+            return all(event.is_set() for event in self._events.values())
+        return self._events[name].is_set()
+
+    async def wait(self, names: Iterable[str], timeout: Optional[float] = None) -> bool:
+        pending = [self._events[n].wait() for n in names if not self._events[n].is_set()]
+        if not pending:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.gather(*pending), timeout or self.timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def snapshot(self) -> Dict[str, bool]:
+        return {name: event.is_set() for name, event in self._events.items()}
+
+
+class StartupTimer:
+    """Runs startup phases and records how long each took."""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    async def phase(self, name: str, awaitable: Awaitable):
+        start = perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.phases[name] = perf_counter() - start
+            LOGGER.info(f"Startup phase '{name}' took {self.phases[name]:.2f}s")
+
+    def summary(self) -> str:
+        parts = ", ".join(f"{name} {took:.2f}s" for name, took in self.phases.items())
+        return f"Startup finished in {perf_counter() - self.started:.2f}s ({parts})"
+
+
+def required_components(path: str) -> Tuple[str, ...]:
+    if path.startswith(OPEN_PATHS):
+        return ()
+    for prefix, components in GATED_PATHS:
+        if path.startswith(prefix):
+            return components
+    return ("db",) if path == "/" else ()
+
+
+class ReadinessMiddleware:
+    """ASGI middleware holding requests until the components they need are up."""
+
+    def __init__(self, app, readiness: Readiness):
+        self.app = app
+        self.readiness = readiness
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not self.readiness.is_ready():
+            needed = required_components(scope["path"])
+            if needed and not await self.readiness.wait(needed):
+                body = json.dumps({"detail": "Starting up", "ready": self.readiness.snapshot()}).encode()
+                await send({
+                    "type": "http.response.start",
+                    "status": 503,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode()),
+                        (b"retry-after", b"5"),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+        await self.app(scope, receive, send)
+
+
+readiness = Readiness()
+startup_timer = StartupTimer()
@@ -0,0 +1,350 @@
+import asyncio
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from Backend.config import Telegram
+from Backend.logger import LOGGER
+
+
+COLLECTIONS = ("movie", "tv")
+SNAPSHOT_ID = "library"
+ENTRIES = "stats_entries"
+REBUILD_BATCH = 1000
+
+# Unwinds every file entry of a collection into "$e"
+ENTRY_STAGES = {
+    "movie": [
+        {"$project": {"e": "$telegram"}},
+        {"$unwind": "$e"},
+    ],
+    "tv": [
+        {"$project": {"s": "$seasons"}},
+        {"$unwind": "$s"},
+        {"$unwind": "$s.episodes"},
+        {"$unwind": "$s.episodes.telegram"},
+        {"$project": {"e": "$s.episodes.telegram"}},
+    ],
+}
+
+# Occurrences of each entry id in a shard, with one quality; streamed into the tracking set on a rebuild
+OCCURRENCE_STAGES = [
+    {"$group": {"_id": "$e.id", "n": {"$sum": 1}, "quality": {"$first": "$e.quality"}}},
+]
+
+# Indexed path of the entry ids, to narrow id lookups before unwinding
+ENTRY_ID_FIELD = {"movie": "telegram.id", "tv": "seasons.episodes.telegram.id"}
+
+# Entry counts of the tracking set, per collection, quality and kind
+ENTRY_COUNT_PIPELINE = [
+    {"$match": {"n": {"$gt": 0}}},
+    {"$group": {"_id": {"type": "$type", "quality": "$quality", "link": "$link"}, "c": {"$sum": 1}}},
+]
+
+GENRE_PIPELINE = [
+    {"$unwind": "$genres"},
+    {"$group": {"_id": "$genres", "n": {"$sum": 1}}},
+]
+
+
+def _key(value: Any) -> str:
+    # MongoDB field names cannot contain "." or start with "$"
+    return str(value or "Unknown").replace(".", "_").lstrip("$") or "Unknown"
+
+
+def _is_link(entry_id: Any) -> bool:
+    return str(entry_id or "").startswith(("http://", "https://"))
+
+
+def iter_entries(document: dict) -> Iterable[dict]:
+    yield from document.get("telegram", [])
+    for season in document.get("seasons", []):
+        for episode in season.get("episodes", []):
+            yield from episode.get("telegram", [])
+
+
+def _empty_section() -> Dict[str, Any]:
+    return {"count": 0, "links": 0, "telegram": 0, "quality": {}, "genres": {}}
+
+
+def _entry_paths(media_type: str, quality: str, link: bool) -> tuple:
+    """Snapshot paths one file entry counts towards; shared by compute() and apply()."""
+    return (
+        f"{media_type}.{'links' if link else 'telegram'}",
+        f"{media_type}.quality.{quality}.{'Link' if link else 'Telegram'}",
+    )
+
+
+def entry_deltas(media_type: str, entries: Iterable[dict], sign: int = 1) -> Dict[str, int]:
+    """Snapshot paths to $inc for file entries, each one counted once."""
+    inc: Dict[str, int] = {}
+    for entry in entries:
+        for path in _entry_paths(media_type, _key(entry.get("quality")), _is_link(entry.get("id"))):
+            inc[path] = inc.get(path, 0) + sign
+    return inc
+
+
+def _entry_key(media_type: str, entry_id: Any) -> str:
+    return f"{media_type}:{entry_id}"
+
+
+def _set_on_insert(media_type: str, entry_id: Any, quality: Any) -> Dict[str, Any]:
+    return {"type": media_type, "quality": _key(quality), "link": _is_link(entry_id)}
+
+
+def _add_to_section(section: Dict[str, Any], inc: Dict[str, int]) -> None:
+    for path, value in inc.items():
+        keys = path.split(".")[1:]
+        node = section
+        for key in keys[:-1]:
+            node = node.setdefault(key, {"Link": 0, "Telegram": 0} if node is section["quality"] else {})
+        node[keys[-1]] = node.get(keys[-1], 0) + value
+
+
+class LibraryStats:
+    """
+    Library-wide statistics kept as one snapshot document in tracking.stats.
+    A file entry is counted once per collection however many titles or storage
+    databases hold its id: tracking.stats_entries keeps every entry id with the
+    number of times the library holds it, and entry counts are $group-ed from
+    that set on the server. Ingest and single deletes $inc the set and the
+    snapshot with a few round trips to the tracking database. Bulk maintenance
+    jobs mark the snapshot stale; the next read then rebuilds the set from the
+    storage databases in the background. Title and genre counts are always
+    aggregated per storage database.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def collection(self):
+        return self.database.dbs["tracking"]["stats"]
+
+    @property
+    def entries(self):
+        return self.database.dbs["tracking"][ENTRIES]
+
+    # -------------------------------
+    # Full rebuild
+    # -------------------------------
+    async def _aggregate(self, db_index: int, collection_name: str, pipeline: List[dict]) -> List[dict]:
+        cursor = self.database.dbs[f"storage_{db_index}"][collection_name].aggregate(pipeline, allowDiskUse=True)
+        return await cursor.to_list(None)
+
+    async def _collection_stats(self, collection_name: str) -> Dict[str, Any]:
+        indexes = self.database.storage_indexes()
+        counts, genres = await asyncio.gather(
+            asyncio.gather(*(
+                self.database.dbs[f"storage_{i}"][collection_name].count_documents({}) for i in indexes
+            )),
+            asyncio.gather(*(self._aggregate(i, collection_name, GENRE_PIPELINE) for i in indexes)),
+        )
+
+        section = _empty_section()
+        section["count"] = sum(counts)
+        for shard in genres:
+            for row in shard:
+                genre = _key(row["_id"])
+                section["genres"][genre] = section["genres"].get(genre, 0) + row["n"]
+        return section
+
+    async def _entry_counts(self) -> Dict[str, Dict[str, int]]:
+        """Snapshot paths of the entry counts, per collection, from the tracking set."""
+        rows = await self.entries.aggregate(ENTRY_COUNT_PIPELINE).to_list(None)
+        inc: Dict[str, Dict[str, int]] = {c: {} for c in COLLECTIONS}
+        for row in rows:
+            media_type = row["_id"]["type"]
+            if media_type not in inc:
+                continue
+            for path in _entry_paths(media_type, row["_id"]["quality"], row["_id"]["link"]):
+                inc[media_type][path] = inc[media_type].get(path, 0) + row["c"]
+        return inc
+
+    async def rebuild_entries(self) -> None:
+        """
+        Refill the tracking set from the storage databases. Each shard groups its
+        entries by id on the server; the rows are streamed in batches into a fresh
+        collection that then replaces the set.
+        """
+        staging = self.database.dbs["tracking"][f"{ENTRIES}_rebuild"]
+        await staging.drop()
+        for media_type in COLLECTIONS:
+            for db_index in self.database.storage_indexes():
+                cursor = self.database.dbs[f"storage_{db_index}"][media_type].aggregate(
+                    ENTRY_STAGES[media_type] + OCCURRENCE_STAGES, allowDiskUse=True
+                )
+                ops = []
+                async for row in cursor:
+                    ops.append(UpdateOne(
+                        {"_id": _entry_key(media_type, row["_id"])},
+                        {"$inc": {"n": row["n"]}, "$setOnInsert": _set_on_insert(media_type, row["_id"], row["quality"])},
+                        upsert=True,
+                    ))
+                    if len(ops) >= REBUILD_BATCH:
+                        await staging.bulk_write(ops, ordered=False)
+                        ops = []
+                if ops:
+                    await staging.bulk_write(ops, ordered=False)
+
+        if await staging.estimated_document_count():
+            await staging.rename(ENTRIES, dropTarget=True)
+        else:
+            await self.entries.delete_many({})
+
+    async def compute(self, rebuild_entries: bool = False) -> Dict[str, Any]:
+        """Recount the snapshot; with `rebuild_entries` (or no set yet) the tracking set is rebuilt first."""
+        previous = await self.collection.find_one({"_id": SNAPSHOT_ID}, {"entries_at": 1})
+        entries_at = (previous or {}).get("entries_at")
+        if rebuild_entries or entries_at is None:
+            entries_at = datetime.utcnow()
+            await self.rebuild_entries()
+
+        (movie, tv), entry_counts = await asyncio.gather(
+            asyncio.gather(*(self._collection_stats(c) for c in COLLECTIONS)),
+            self._entry_counts(),
+        )
+        _add_to_section(movie, entry_counts["movie"])
+        _add_to_section(tv, entry_counts["tv"])
+
+        now = datetime.utcnow()
+        snapshot = {
+            "_id": SNAPSHOT_ID,
+            "movie": movie,
+            "tv": tv,
+            "stale": False,
+            "computed_at": now,
+            "updated_at": now,
+            "entries_at": entries_at,
+        }
+        await self.collection.replace_one({"_id": SNAPSHOT_ID}, snapshot, upsert=True)
+        return snapshot
+
+    def refresh_in_background(self, rebuild_entries: bool = False) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._safe_compute(rebuild_entries))
+
+    async def _safe_compute(self, rebuild_entries: bool) -> None:
+        try:
+            await self.compute(rebuild_entries)
+        except Exception as e:
+            LOGGER.error(f"Library stats rebuild failed: {e}")
+
+    async def get(self, refresh: bool = False) -> Dict[str, Any]:
+        """Return the snapshot, rebuilding it inline only if it does not exist yet or on `refresh`."""
+        snapshot = None if refresh else await self.collection.find_one({"_id": SNAPSHOT_ID})
+        if not snapshot:
+            return await self.compute(rebuild_entries=True)
+
+        age = (datetime.utcnow() - snapshot.get("computed_at", datetime.min)).total_seconds()
+        if snapshot.get("stale") or "entries_at" not in snapshot:
+            self.refresh_in_background(rebuild_entries=True)
+        elif age > Telegram.STATS_MAX_AGE:
+            self.refresh_in_background()
+        return snapshot
+
+    # -------------------------------
+    # Incremental updates
+    # -------------------------------
+    async def _occurrences(self, media_type: str, delta: Counter, entries: Dict[Any, dict]) -> Counter:
+        """$inc the tracking set by `delta` and return how often the library holds each id afterwards."""
+        keys = {_entry_key(media_type, entry_id): entry_id for entry_id in delta}
+        await self.entries.bulk_write([
+            UpdateOne(
+                {"_id": key},
+                {
+                    "$inc": {"n": delta[entry_id]},
+                    "$setOnInsert": _set_on_insert(media_type, entry_id, entries[entry_id].get("quality")),
+                },
+                upsert=True,
+            )
+            for key, entry_id in keys.items()
+        ], ordered=False)
+        docs = await self.entries.find({"_id": {"$in": list(keys)}}, {"n": 1}).to_list(None)
+        await self.entries.delete_many({"_id": {"$in": list(keys)}, "n": {"$lte": 0}})
+        return Counter({keys[doc["_id"]]: doc["n"] for doc in docs})
+
+    async def _entry_changes(
+        self, media_type: str, added: List[dict], removed: List[dict]
+    ) -> Optional[Dict[str, int]]:
+        """
+        Net entry deltas of a write that has already happened. An id only counts
+        when it is new to the library or gone from it, like in compute(); None
+        if the tracking set could not be updated.
+        """
+        delta = Counter(entry.get("id") for entry in added)
+        delta.subtract(entry.get("id") for entry in removed)
+        delta = Counter({entry_id: n for entry_id, n in delta.items() if n})
+        if not delta:
+            return {}
+
+        # an added entry carries the quality a new id is counted under, a removed one that of a gone id
+        vanished = {entry.get("id"): entry for entry in removed}
+        appeared = {entry.get("id"): entry for entry in added}
+        try:
+            after = await self._occurrences(media_type, delta, {**vanished, **appeared})
+        except Exception as e:
+            LOGGER.error(f"Library stats lookup failed: {e}")
+            return None
+
+        new, gone = [], []
+        for entry_id, n in delta.items():
+            before = after[entry_id] - n
+            if before <= 0 < after[entry_id]:
+                new.append(appeared[entry_id])
+            elif after[entry_id] <= 0 < before:
+                gone.append(vanished.get(entry_id) or appeared[entry_id])
+
+        inc = entry_deltas(media_type, new)
+        for path, value in entry_deltas(media_type, gone, -1).items():
+            inc[path] = inc.get(path, 0) + value
+        return inc
+
+    async def apply(
+        self,
+        media_type: str,
+        added: Iterable[dict] = (),
+        removed: Iterable[dict] = (),
+        titles: int = 0,
+        genres: Iterable[str] = (),
+        removed_genres: Iterable[str] = ()
+    ) -> None:
+        """
+        Fold a finished write into the snapshot. `genres` follow the sign of
+        `titles` (a new title adds them, a deleted one takes them away) and are
+        added outright when no title came or went; `removed_genres` always count down.
+        """
+        inc = await self._entry_changes(media_type, list(added), list(removed))
+        if inc is None:
+            await self.mark_stale()
+            inc = {}
+
+        def bump(path: str, value: int) -> None:
+            inc[path] = inc.get(path, 0) + value
+
+        if titles:
+            bump(f"{media_type}.count", titles)
+        for genre in genres:
+            bump(f"{media_type}.genres.{_key(genre)}", -1 if titles < 0 else 1)
+        for genre in removed_genres:
+            bump(f"{media_type}.genres.{_key(genre)}", -1)
+
+        inc = {k: v for k, v in inc.items() if v}
+        if not inc:
+            return
+        try:
+            await self.collection.update_one(
+                {"_id": SNAPSHOT_ID},
+                {"$inc": inc, "$set": {"updated_at": datetime.utcnow()}}
+            )
+        except Exception as e:
+            LOGGER.error(f"Library stats update failed: {e}")
+
+    async def mark_stale(self) -> None:
+        try:
+            await self.collection.update_one({"_id": SNAPSHOT_ID}, {"$set": {"stale": True}})
+        except Exception as e:
+            LOGGER.error(f"Failed to mark library stats stale: {e}")
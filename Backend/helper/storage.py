@@ -0,0 +1,97 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from Backend import db
+from Backend.config import Telegram
+from Backend.logger import LOGGER
+
+
+# -------------------------------
+# Shard helpers for bot plugins
+# -------------------------------
+async def per_storage(func: Callable[[int, Any], Awaitable[Any]]) -> List[Any]:
+    """Run func(db_index, storage_db) on every storage database concurrently."""
+    return await asyncio.gather(*(
+        func(db_index, db.dbs[f"storage_{db_index}"]) for db_index in db.storage_indexes()
+    ))
+
+
+async def update_many_all(collection_name: str, filter_dict: dict, update: dict, **kwargs) -> int:
+    results = await per_storage(
+        lambda _, storage: storage[collection_name].update_many(filter_dict, update, **kwargs)
+    )
+    return sum(r.modified_count for r in results)
+
+
+async def aggregate_all(collection_name: str, pipeline: List[dict]) -> List[dict]:
+    results = await per_storage(
+        lambda _, storage: storage[collection_name].aggregate(pipeline).to_list(None)
+    )
+    return [doc for shard in results for doc in shard]
+
+
+async def storage_size() -> int:
+    stats = await per_storage(lambda _, storage: storage.command("dbstats"))
+    return sum(s.get("storageSize", 0) for s in stats)
+
+
+async def bulk_write_grouped(collection_name: str, ops_by_index: Dict[int, list]) -> int:
+    """Write {db_index: [ops]} with one unordered bulk_write per storage database."""
+    async def write(db_index, ops):
+        if not ops:
+            return 0
+        result = await db.dbs[f"storage_{db_index}"][collection_name].bulk_write(ops, ordered=False)
+        return result.modified_count + result.deleted_count
+
+    results = await asyncio.gather(*(write(i, ops) for i, ops in ops_by_index.items()))
+    return sum(results)
+
+
+async def iter_batches(
+    collection_name: str,
+    filter_dict: Optional[dict] = None,
+    projection: Optional[dict] = None,
+    batch_size: int = 500
+):
+    """Yield (db_index, [documents]) batches; a batch never spans two storage databases."""
+    batch, batch_index = [], None
+    async for db_index, document in db.iter_documents(collection_name, filter_dict, projection, batch_size):
+        if batch and (db_index != batch_index or len(batch) >= batch_size):
+            yield batch_index, batch
+            batch = []
+        batch_index = db_index
+        batch.append(document)
+    if batch:
+        yield batch_index, batch
+
+
+# -------------------------------
+# CPU-bound work
+# -------------------------------
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # spawn: forking a process that owns the event loop and client threads is unsafe
+        _process_pool = ProcessPoolExecutor(
+            max_workers=max(1, Telegram.CPU_WORKERS),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+async def run_cpu(func: Callable, *args) -> Any:
+    """Run a picklable top-level function in the shared process pool."""
+    return await asyncio.get_running_loop().run_in_executor(get_process_pool(), func, *args)
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+        LOGGER.info("CPU worker pool stopped.")
@@ -0,0 +1,269 @@
+import asyncio
+import heapq
+import ipaddress
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import Deque, Dict, List, Optional, Tuple
+
+from Backend.config import Telegram
+from Backend.helper.metrics import STREAM_QUEUE_SECONDS, STREAM_QUEUED
+from Backend.helper.ratelimit import TokenBucket
+from Backend.pyrofork.bot import multi_clients
+
+# GetFile queue classes; lower is served first
+PROBE, BULK = 0, 1
+KINDS = ("probe", "bulk")
+
+
+def parse_proxies(value: str) -> Tuple[bool, List[ipaddress._BaseNetwork]]:
+    """TRUSTED_PROXIES: comma separated IPs / CIDRs, "*" trusts every peer."""
+    networks = []
+    trust_all = False
+    for item in (part.strip() for part in value.split(",")):
+        if item == "*":
+            trust_all = True
+        elif item:
+            networks.append(ipaddress.ip_network(item, strict=False))
+    return trust_all, networks
+
+
+TRUST_ALL, TRUSTED_NETWORKS = parse_proxies(Telegram.TRUSTED_PROXIES)
+
+
+def _trusted(address: Optional[str]) -> bool:
+    if not address:
+        return False
+    if TRUST_ALL:
+        return True
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_NETWORKS)
+
+
+def client_key(forwarded: Optional[str], peer: Optional[str]) -> str:
+    """
+    Who a /dl request is charged to. X-Forwarded-For is only believed when it
+    comes from a TRUSTED_PROXIES peer: hops are read from the right, past every
+    trusted proxy, and the first untrusted address is the client. Anyone else
+    could put any address there to dodge the per-client limits.
+    """
+    client = peer
+    if forwarded and _trusted(peer):
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        while hops and _trusted(client):
+            client = hops.pop()
+    return client or "unknown"
+
+
+class ClientShare:
+    """Scheduler state of one client, dropped once it has nothing running or queued."""
+
+    __slots__ = ("streams", "probes", "waiters", "bucket", "finish")
+
+    def __init__(self, rate: float):
+        self.streams = 0
+        self.probes = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.bucket = TokenBucket(rate, burst=rate)
+        # virtual finish time of the client's last queued part
+        self.finish = 0.0
+
+    @property
+    def idle(self) -> bool:
+        return not (self.streams or self.probes or self.waiters)
+
+
+class Flow:
+    """One /dl response body as seen by the scheduler."""
+
+    __slots__ = ("scheduler", "key", "probe", "weight", "share")
+
+    def __init__(self, scheduler: "StreamScheduler", key: str, probe: bool, weight: float):
+        self.scheduler = scheduler
+        self.key = key
+        self.probe = probe
+        self.weight = weight
+        self.share: Optional[ClientShare] = None
+
+    @property
+    def kind(self) -> int:
+        return PROBE if self.probe else BULK
+
+    async def open(self) -> None:
+        await self.scheduler._admit(self)
+
+    def close(self) -> None:
+        if self.share is not None:
+            self.scheduler._leave(self)
+            self.share = None
+
+    def getfile(self):
+        return self.scheduler._getfile(self)
+
+    async def sent(self, size: int) -> None:
+        # probes are small and latency bound; only bulk reads are shaped
+        if not self.probe:
+            await self.share.bucket.acquire(size)
+
+
+class StreamScheduler:
+    """
+    Shares the stream clients fairly between the people watching.
+
+      * admission: at most `per_client` bulk streams per client run at once,
+        later ones wait in arrival order. Small range requests (player seeks,
+        header and index reads up to `probe_bytes`) have their own allowance
+        of the same size, so a viewer can seek while its main stream runs.
+      * GetFile slots: one pool of `slots_per_bot` x number of stream bots
+        parts in flight, shared by all bots (which bot serves a stream is
+        picked by load elsewhere; this does not cap a single bot). Parts
+        waiting for a slot are granted by start-time fair queuing over
+        clients, so sixteen parallel ranges from a download manager get the
+        same share as one Stremio viewer. Probe parts are granted before bulk.
+      * bandwidth: bulk streams of one client share `client_rate` bytes/s.
+    """
+
+    def __init__(self, per_client: int = 4, slots_per_bot: int = 8, client_rate: float = 0.0, probe_bytes: int = 2 * 1024 * 1024):
+        self.per_client = per_client
+        self.slots_per_bot = slots_per_bot
+        self.client_rate = client_rate
+        self.probe_bytes = probe_bytes
+        self.clients: Dict[str, ClientShare] = {}
+        self.busy = 0
+        self.vtime = 0.0
+        self._queue: List[Tuple[int, float, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    @property
+    def capacity(self) -> int:
+        if self.slots_per_bot <= 0:
+            return 1 << 30
+        return self.slots_per_bot * max(1, len(multi_clients))
+
+    def flow(self, key: str, length: int, weight: float = 1.0) -> Flow:
+        return Flow(self, key, length <= self.probe_bytes, weight)
+
+    # ---- Admission ----
+    async def _admit(self, flow: Flow) -> None:
+        share = self.clients.get(flow.key)
+        if share is None:
+            share = self.clients[flow.key] = ClientShare(self.client_rate)
+        flow.share = share
+
+        if self.per_client <= 0:
+            share.streams += 1
+            return
+        if flow.probe:
+            if share.probes < self.per_client:
+                share.probes += 1
+                return
+            flow.probe = False  # probe allowance used up; queue like any other stream
+        if share.streams < self.per_client and not share.waiters:
+            share.streams += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        share.waiters.append(waiter)
+        STREAM_QUEUED.inc(1, "admit")
+        started = perf_counter()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._leave(flow)  # granted as we were cancelled; pass the stream slot on
+            else:
+                share.waiters.remove(waiter)
+                self._forget(flow.key, share)
+            flow.share = None
+            raise
+        finally:
+            STREAM_QUEUED.dec(1, "admit")
+            STREAM_QUEUE_SECONDS.observe(perf_counter() - started, "admit", KINDS[flow.kind])
+
+    def _leave(self, flow: Flow) -> None:
+        share = flow.share
+        if flow.probe and self.per_client > 0:
+            share.probes -= 1
+        else:
+            while share.waiters:
+                waiter = share.waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)  # the slot moves to the next stream as is
+                    return
+            share.streams -= 1
+        self._forget(flow.key, share)
+
+    def _forget(self, key: str, share: ClientShare) -> None:
+        if share.idle and self.clients.get(key) is share:
+            del self.clients[key]
+
+    # ---- GetFile slots ----
+    @asynccontextmanager
+    async def _getfile(self, flow: Flow):
+        await self._acquire(flow)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, flow: Flow) -> None:
+        share = flow.share
+        start = max(self.vtime, share.finish)
+        share.finish = start + 1.0 / flow.weight
+        while self._queue and self._queue[0][3].done():
+            heapq.heappop(self._queue)  # left behind by cancelled waiters
+        if self.busy < self.capacity and not self._queue:
+            self.busy += 1
+            self.vtime = start
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (flow.kind, start, next(self._seq), waiter))
+        STREAM_QUEUED.inc(1, "getfile")
+        started = perf_counter()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            else:
+                waiter.cancel()  # skipped by _release
+            raise
+        finally:
+            STREAM_QUEUED.dec(1, "getfile")
+            STREAM_QUEUE_SECONDS.observe(perf_counter() - started, "getfile", KINDS[flow.kind])
+
+    def _release(self) -> None:
+        while self._queue:
+            _, start, _, waiter = heapq.heappop(self._queue)
+            if not waiter.done():
+                self.vtime = max(self.vtime, start)
+                waiter.set_result(None)
+                return
+        self.busy -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            "getfile": {"busy": self.busy, "capacity": self.capacity, "queued": len(self._queue)},
+            "clients": {
+                key: {
+                    "streams": share.streams,
+                    "probes": share.probes,
+                    "waiting": len(share.waiters),
+                    **({"throttled_s": round(share.bucket.waited, 2)} if self.client_rate > 0 else {}),
+                }
+                for key, share in self.clients.items()
+            },
+        }
+
+
+stream_scheduler = StreamScheduler(
+    per_client=Telegram.STREAM_PER_CLIENT,
+    slots_per_bot=Telegram.STREAM_GETFILE_SLOTS,
+    client_rate=Telegram.STREAM_CLIENT_RATE * 1024 * 1024,
+    probe_bytes=Telegram.STREAM_PROBE_BYTES,
+)
@@ -0,0 +1,234 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from Backend import db
+from Backend.helper.jobs import JobContext
+from Backend.helper.metadata import TRANSLATE_CACHE, TRANSLATE_LOCK, translate_text
+from Backend.logger import LOGGER
+
+
+COLLECTIONS = ("movie", "tv")
+
+MOVIE_FILTER = {"cevrildi": {"$ne": True}}
+# "seasons.episodes.cevrildi": {"$ne": True} would only match shows with no translated episode at all
+TV_FILTER = {"$or": [
+    {"cevrildi": {"$ne": True}},
+    {"seasons": {"$elemMatch": {"episodes": {"$elemMatch": {"cevrildi": {"$ne": True}}}}}},
+]}
+FILTERS = {"movie": MOVIE_FILTER, "tv": TV_FILTER}
+
+PROJECTIONS = {
+    "movie": {"description": 1, "title": 1, "cevrildi": 1},
+    "tv": {
+        "description": 1, "title": 1, "cevrildi": 1,
+        "seasons.season_number": 1,
+        "seasons.episodes.episode_number": 1,
+        "seasons.episodes.title": 1,
+        "seasons.episodes.overview": 1,
+        "seasons.episodes.cevrildi": 1,
+    },
+}
+
+EPISODE_COUNT_PIPELINE = [
+    {"$match": TV_FILTER},
+    {"$unwind": "$seasons"},
+    {"$unwind": "$seasons.episodes"},
+    {"$match": {"seasons.episodes.cevrildi": {"$ne": True}}},
+    {"$count": "n"},
+]
+
+
+def _has_text(value: Any) -> bool:
+    return bool(value) and bool(str(value).strip())
+
+
+class TranslationJob:
+    """
+    Translates untranslated descriptions and episode texts to Turkish.
+    Only documents/episodes without the cevrildi flag are read, texts go through
+    the shared TRANSLATE_CACHE, and only changed fields are written back.
+    Totals and a per-storage _id cursor are kept in the job checkpoint so an
+    interrupted run continues where it stopped.
+    """
+
+    def __init__(self, ctx: JobContext, batch_size: int = 50, workers: int = 4):
+        self.ctx = ctx
+        self.batch_size = batch_size
+        self.workers = workers
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        return self.ctx.checkpoint
+
+    # -------------------------------
+    # Persistent state
+    # -------------------------------
+    async def prepare(self) -> Dict[str, Any]:
+        """Count pending work on a fresh run; a resumed run keeps its checkpoint."""
+        if "total" in self.state:
+            return self.state
+
+        movies, episodes = await self.count_pending()
+        await self.ctx.save(
+            cursor={},
+            total={"movie": movies, "episode": episodes},
+            done={"movie": 0, "episode": 0},
+            errors=0,
+        )
+        return self.state
+
+    async def count_pending(self) -> Tuple[int, int]:
+        async def shard(db_index):
+            storage = db.dbs[f"storage_{db_index}"]
+            movies, episodes = await asyncio.gather(
+                storage["movie"].count_documents(MOVIE_FILTER),
+                storage["tv"].aggregate(EPISODE_COUNT_PIPELINE).to_list(None),
+            )
+            return movies, episodes[0]["n"] if episodes else 0
+
+        results = await asyncio.gather(*(shard(i) for i in db.storage_indexes()))
+        return sum(m for m, _ in results), sum(e for _, e in results)
+
+    # -------------------------------
+    # Translation
+    # -------------------------------
+    async def _translate_all(self, pool: ThreadPoolExecutor, texts: List[str]) -> Dict[str, Optional[str]]:
+        """Translations of texts; None for a text the translator failed on."""
+        loop = asyncio.get_running_loop()
+        with TRANSLATE_LOCK:
+            translated: Dict[str, Optional[str]] = {t: TRANSLATE_CACHE[t] for t in texts if t in TRANSLATE_CACHE}
+        pending = [t for t in dict.fromkeys(texts) if t not in translated]
+
+        async def translate(text):
+            async with self.ctx.slot():
+                try:
+                    translated[text] = await loop.run_in_executor(pool, translate_text, text)
+                except Exception as e:
+                    translated[text] = None
+                    LOGGER.warning(f"Translation failed: {e}")
+
+        # results are kept here, the bounded cache may already have dropped them
+        await asyncio.gather(*(translate(t) for t in pending))
+        return {t: translated.get(t) for t in texts}
+
+    @staticmethod
+    def _collect_texts(doc: dict) -> List[str]:
+        texts = []
+        if doc.get("cevrildi") is not True and _has_text(doc.get("description")):
+            texts.append(doc["description"])
+        for season in doc.get("seasons", []):
+            for ep in season.get("episodes", []):
+                if ep.get("cevrildi") is True:
+                    continue
+                texts.extend(ep[f] for f in ("title", "overview") if _has_text(ep.get(f)))
+        return texts
+
+    @staticmethod
+    def _build_update(doc: dict, tr: Dict[str, Optional[str]]) -> Tuple[Optional[UpdateOne], int, int]:
+        """
+        Return (update, translated_episode_count, failed_count) touching only
+        untranslated fields. A description or episode whose text did not
+        translate is left as it is, without cevrildi, so the next run retries it.
+        """
+        fields: Dict[str, Any] = {}
+        array_filters: List[dict] = []
+        episode_count = failed = 0
+
+        if doc.get("cevrildi") is not True:
+            description = doc.get("description")
+            if _has_text(description) and tr[description] is None:
+                failed += 1
+            else:
+                if _has_text(description):
+                    fields["description"] = tr[description]
+                fields["cevrildi"] = True
+
+        for s_idx, season in enumerate(doc.get("seasons", [])):
+            season_filter_added = False
+            for ep in season.get("episodes", []):
+                if ep.get("cevrildi") is True:
+                    continue
+                texts = {f: ep[f] for f in ("title", "overview") if _has_text(ep.get(f))}
+                if any(tr[text] is None for text in texts.values()):
+                    failed += 1
+                    continue
+                if not season_filter_added:
+                    array_filters.append({f"s{s_idx}.season_number": season.get("season_number")})
+                    season_filter_added = True
+                e_id = f"e{len(array_filters)}"
+                array_filters.append({f"{e_id}.episode_number": ep.get("episode_number")})
+                path = f"seasons.$[s{s_idx}].episodes.$[{e_id}]"
+                for f, text in texts.items():
+                    fields[f"{path}.{f}"] = tr[text]
+                fields[f"{path}.cevrildi"] = True
+                episode_count += 1
+
+        if not fields:
+            return None, 0, failed
+        return UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": fields},
+            array_filters=array_filters or None
+        ), episode_count, failed
+
+    # -------------------------------
+    # Runner
+    # -------------------------------
+    async def run(self, on_progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> None:
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            for collection_name in COLLECTIONS:
+                for db_index in db.storage_indexes():
+                    await self._run_storage(pool, collection_name, db_index, on_progress)
+        finally:
+            pool.shutdown(wait=False)
+
+    async def _run_storage(self, pool, collection_name, db_index, on_progress) -> None:
+        col = db.dbs[f"storage_{db_index}"][collection_name]
+        cursor_key = f"{collection_name}_{db_index}"
+
+        while True:
+            await self.ctx.pause_if_busy()
+            query = dict(FILTERS[collection_name])
+            last_id = self.state.get("cursor", {}).get(cursor_key)
+            if last_id is not None:
+                query = {"$and": [query, {"_id": {"$gt": last_id}}]}
+
+            docs = await col.find(query, PROJECTIONS[collection_name]).sort("_id", 1).limit(self.batch_size).to_list(None)
+            if not docs:
+                return
+
+            texts = [t for doc in docs for t in self._collect_texts(doc)]
+            tr = await self._translate_all(pool, texts)
+
+            ops, movies, episodes, failed = [], 0, 0, 0
+            for doc in docs:
+                op, ep_count, doc_failed = self._build_update(doc, tr)
+                failed += doc_failed
+                if op:
+                    ops.append(op)
+                    episodes += ep_count
+                    movies += collection_name == "movie"
+
+            errors = failed
+            if ops:
+                try:
+                    await col.bulk_write(ops, ordered=False)
+                except Exception as e:
+                    errors += len(ops)
+                    movies = episodes = 0
+                    LOGGER.error(f"Translation write failed in storage_{db_index}.{collection_name}: {e}")
+
+            done = self.state.get("done", {})
+            await self.ctx.save(**{
+                f"cursor.{cursor_key}": docs[-1]["_id"],
+                "done.movie": done.get("movie", 0) + movies,
+                "done.episode": done.get("episode", 0) + episodes,
+                "errors": self.state.get("errors", 0) + errors,
+            })
+
+            if on_progress:
+                await on_progress(self.state)
@@ -25,5 +25,34 @@ Helper = Client(
 )
 
 
+class WorkLoads(dict):
+    """
+    {client index: active streams} for the clients of this process.
+    With STREAM_WORKERS every process also mirrors its own slots into one
+    shared-memory array (slot = client index, -1 = unused), so load totals
+    and the dashboard see every worker.
+    """
+
+    shared = None
+
+    def attach(self, array) -> None:
+        self.shared = array
+        for key, value in self.items():
+            self._mirror(key, value)
+
+    def _mirror(self, key, value) -> None:
+        if self.shared is not None and isinstance(key, int) and 0 <= key < len(self.shared):
+            self.shared[key] = value
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self._mirror(key, value)
+
+    def all_loads(self) -> dict:
+        if self.shared is None:
+            return dict(self)
+        return {index: load for index, load in enumerate(self.shared[:]) if load >= 0}
+
+
 multi_clients = {}
-work_loads = {}
\ No newline at end of file
+work_loads = WorkLoads()
\ No newline at end of file
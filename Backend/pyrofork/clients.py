@@ -37,9 +37,15 @@ async def start_client(client_id, token):
         LOGGER.error(f"Failed to start Client - {client_id} Error: {e}", exc_info=True)
         return None
 
-async def initialize_clients():
-    multi_clients[0], work_loads[0] = StreamBot, 0
-    all_tokens = TokenParser.parse_from_env()
+async def initialize_clients(tokens=None, with_streambot=True):
+    """
+    Start the MULTI_TOKEN clients (or only `tokens` when this process owns a
+    subset of them). Streaming workers pass with_streambot=False: the control
+    bot stays in the main process.
+    """
+    if with_streambot:
+        multi_clients[0], work_loads[0] = StreamBot, 0
+    all_tokens = TokenParser.parse_from_env() if tokens is None else tokens
     if not all_tokens:
         LOGGER.info("No additional Bot Clients found, Using default client")
         return
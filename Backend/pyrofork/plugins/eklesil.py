@@ -1,68 +1,58 @@
-import os
 import re
-import aiohttp
-from datetime import timezone, datetime
-from dateutil.parser import parse as parse_date
+import asyncio
+from collections import defaultdict
 
 from pyrogram import Client, filters
 from pyrogram.types import Message
 
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteMany, UpdateMany
+from Backend import db
 from Backend.helper.custom_filter import CustomFilters
+from Backend.helper.modal import QualityDetail
+from Backend.helper.pyro import get_readable_file_size
+from Backend.helper.jobs import JobContext, job_manager
+from Backend.helper.link_checker import link_checker
 from Backend.helper.metadata import metadata
 from Backend.logger import LOGGER
 
-# ----------------- ENV -----------------
-DATABASE_RAW = os.getenv("DATABASE", "")
-db_urls = [u.strip() for u in DATABASE_RAW.split(",") if u.strip().startswith("mongodb")]
-MONGO_URL = db_urls[1]
-DB_NAME = "dbFyvio"
-
-# ----------------- MongoDB -----------------
-mongo = AsyncIOMotorClient(MONGO_URL)
-db = mongo[DB_NAME]
-movie_col = db["movie"]
-series_col = db["tv"]
-
 # ----------------- Helpers -----------------
+METADATA_CONCURRENCY = 8
+
 def pixeldrain_to_api(url: str) -> str:
     m = re.match(r"https?://pixeldrain\.com/u/([A-Za-z0-9]+)", url)
     if not m:
         return url
     return f"https://pixeldrain.com/api/file/{m.group(1)}"
 
-async def head(url, key):
-    try:
-        async with aiohttp.ClientSession() as s:
-            async with s.head(url, allow_redirects=True, timeout=20) as r:
-                return r.headers.get(key)
-    except:
-        return None
-
-async def filename_from_url(url):
-    try:
-        cd = await head(url, "Content-Disposition")
-        if cd:
-            m = re.search(r'filename="(.+?)"', cd)
-            if m:
-                return m.group(1)
-        return url.split("/")[-1]
-    except:
-        return url.split("/")[-1]
-
-async def filesize(url):
+async def _safe_edit(msg: Message, text: str):
     try:
-        size = await head(url, "Content-Length")
-        if not size:
-            return "YOK"
-        size = int(size)
-        for u in ["B", "KB", "MB", "GB"]:
-            if size < 1024:
-                return f"{size:.2f}{u}"
-            size /= 1024
-        return "YOK"
-    except:
-        return "YOK"
+        await msg.edit_text(text)
+    except Exception:
+        pass
+
+def fallback_meta(filename: str) -> dict:
+    return {
+        "media_type": "movie",
+        "tmdb_id": None,
+        "imdb_id": None,
+        "title": filename,
+        "genres": [],
+        "description": "",
+        "rate": 0,
+        "year": None,
+        "poster": "",
+        "backdrop": "",
+        "logo": "",
+        "cast": [],
+        "runtime": "",
+        "season_number": 1,
+        "episode_number": 1,
+        "episode_title": filename,
+        "episode_backdrop": "",
+        "episode_overview": "",
+        "episode_released": None,
+        "quality": "Unknown"
+    }
 
 # ----------ekle ----------
 @Client.on_message(filters.command("ekle") & filters.private & CustomFilters.owner)
@@ -75,190 +65,120 @@ async def ekle(client: Client, message: Message):
         parts = text.split(maxsplit=1)
         lines = [parts[1]] if len(parts) > 1 else []
 
-    if not lines:
+    items = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.split(maxsplit=1)
+        link = parts[0]
+        api_link = pixeldrain_to_api(link) if "pixeldrain.com" in link else link
+        items.append((line, link, api_link, parts[1] if len(parts) > 1 else None))
+
+    if not items:
         return await message.reply_text(
             "Kullanım:\n/ekle link\nveya\n/ekle link dosya adı"
         )
 
-    status = await message.reply_text("📥 Dizi/film ekleniyor...")
+    status = await message.reply_text(f"📥 {len(items)} link kontrol ediliyor...")
+
+    # ----------------- Tek HEAD isteği (paylaşılan bağlantı havuzu) -----------------
+    probes = await link_checker.probe_many(api_link for _, _, api_link, _ in items)
+
+    # ----------------- Metadata (eşzamanlı + önbellekli) -----------------
+    await _safe_edit(status, f"🧠 {len(items)} link için metadata alınıyor...")
+    semaphore = asyncio.Semaphore(METADATA_CONCURRENCY)
+    meta_tasks = {}
+
+    async def resolve(filename):
+        async with semaphore:
+            return await metadata(filename=filename, channel=message.chat.id, msg_id=message.id)
+
+    entries = []
+    for line, link, api_link, extra_info in items:
+        probe = probes.get(api_link)
+        meta_filename = extra_info or (probe and probe.filename) or link.split("/")[-1]
+        if meta_filename not in meta_tasks:
+            meta_tasks[meta_filename] = asyncio.ensure_future(resolve(meta_filename))
+        entries.append((line, api_link, meta_filename, probe))
 
-    movie_count = 0
-    series_count = 0
-    failed = []
+    await asyncio.gather(*meta_tasks.values(), return_exceptions=True)
+    for meta_filename, task in meta_tasks.items():
+        if task.exception() is not None:
+            LOGGER.error(f"Metadata failed for {meta_filename}", exc_info=task.exception())
+
+    # ----------------- Başlık bazında toplu yazma -----------------
+    bulk = []
     added_movies = []
     added_series = []
-
-    for line in lines:
-        line = line.strip()
-        if not line:
+    failed_lines = []
+    for line, api_link, meta_filename, probe in entries:
+        task = meta_tasks[meta_filename]
+        if task.exception() is not None:
+            # eşleşme bulunamadıysa yedek metadata kullanılır, hata ise satır hatalı sayılır
+            failed_lines.append(line)
             continue
-
-        parts = line.split(maxsplit=1)
-        link = parts[0]
-        extra_info = parts[1] if len(parts) > 1 else None
-
-        try:
-            api_link = pixeldrain_to_api(link) if "pixeldrain.com" in link else link
-
-            try:
-                size = await filesize(api_link)
-                cd_filename = await filename_from_url(api_link)
-                meta_filename = extra_info or cd_filename or link.split("/")[-1]
-            except:
-                size = "YOK"
-                meta_filename = extra_info or link.split("/")[-1]
-
-            meta = await metadata(
-                filename=meta_filename,
-                channel=message.chat.id,
-                msg_id=message.id
-            )
-
-            if not meta:
-                meta = {
-                    "media_type": "movie",
-                    "tmdb_id": None,
-                    "imdb_id": None,
-                    "title": meta_filename,
-                    "genres": [],
-                    "description": "",
-                    "rate": 0,
-                    "year": None,
-                    "poster": "",
-                    "backdrop": "",
-                    "logo": "",
-                    "cast": [],
-                    "runtime": 0,
-                    "season_number": 1,
-                    "episode_number": 1,
-                    "episode_title": meta_filename,
-                    "episode_backdrop": "",
-                    "episode_overview": "",
-                    "episode_released": None,
-                    "quality": "Unknown"
-                }
-
-            telegram_obj = {
-                "quality": meta.get("quality", "Unknown"),
-                "id": api_link,
-                "name": meta_filename,
-                "size": size
-            }
-
-            # ----------------- MOVIE -----------------
-            if meta["media_type"] == "movie":
-                doc = await movie_col.find_one({"tmdb_id": meta["tmdb_id"]})
-                if not doc:
-                    doc = {
-                        "tmdb_id": meta["tmdb_id"],
-                        "imdb_id": meta["imdb_id"],
-                        "db_index": 1,
-                        "title": meta["title"],
-                        "genres": meta["genres"],
-                        "description": meta["description"],
-                        "rating": meta["rate"],
-                        "release_year": meta["year"],
-                        "poster": meta["poster"],
-                        "backdrop": meta["backdrop"],
-                        "logo": meta["logo"],
-                        "cast": meta["cast"],
-                        "runtime": meta["runtime"],
-                        "media_type": "movie",
-                        "updated_on": str(datetime.utcnow()),
-                        "telegram": [telegram_obj]
-                    }
-                    await movie_col.insert_one(doc)
-                else:
-                    # Aynı quality veya id farketmeksizin her zaman ekle
-                    doc["telegram"].append(telegram_obj)
-                    doc["updated_on"] = str(datetime.utcnow())
-                    await movie_col.replace_one({"_id": doc["_id"]}, doc)
-                movie_count += 1
-                added_movies.append(meta["title"])
-
-            # ----------------- TV -----------------
-            else:
-                doc = await series_col.find_one({"tmdb_id": meta["tmdb_id"]})
-                episode_obj = {
-                    "episode_number": meta["episode_number"],
-                    "title": meta["episode_title"],
-                    "episode_backdrop": meta["episode_backdrop"],
-                    "overview": meta["episode_overview"],
-                    "released": meta["episode_released"],
-                    "telegram": [telegram_obj]
-                }
-                if not doc:
-                    doc = {
-                        "tmdb_id": meta["tmdb_id"],
-                        "imdb_id": meta["imdb_id"],
-                        "db_index": 1,
-                        "title": meta["title"],
-                        "genres": meta["genres"],
-                        "description": meta["description"],
-                        "rating": meta["rate"],
-                        "release_year": meta["year"],
-                        "poster": meta["poster"],
-                        "backdrop": meta["backdrop"],
-                        "logo": meta["logo"],
-                        "cast": meta["cast"],
-                        "runtime": meta["runtime"],
-                        "media_type": "tv",
-                        "updated_on": str(datetime.utcnow()),
-                        "seasons": [{
-                            "season_number": meta["season_number"],
-                            "episodes": [episode_obj]
-                        }]
-                    }
-                    await series_col.insert_one(doc)
-                else:
-                    season = next((s for s in doc["seasons"] if s["season_number"] == meta["season_number"]), None)
-                    if not season:
-                        season = {"season_number": meta["season_number"], "episodes": []}
-                        doc["seasons"].append(season)
-
-                    ep = next((e for e in season["episodes"] if e["episode_number"] == meta["episode_number"]), None)
-                    if not ep:
-                        season["episodes"].append(episode_obj)
-                    else:
-                        # Aynı bölüm için her zaman yeni telegram objesi ekle
-                        ep["telegram"].append(telegram_obj)
-
-                    doc["updated_on"] = str(datetime.utcnow())
-                    await series_col.replace_one({"_id": doc["_id"]}, doc)
-                series_count += 1
-                added_series.append(meta["title"])
-
-        except Exception as e:
-            LOGGER.exception(e)
-            failed.append(line)
+        meta = task.result() or fallback_meta(meta_filename)
+        size = get_readable_file_size(probe.size) if probe and probe.size else "YOK"
+
+        bulk.append((meta, QualityDetail(
+            quality=meta.get("quality", "Unknown"),
+            id=api_link,
+            name=meta_filename,
+            size=size
+        )))
+        (added_movies if meta["media_type"] == "movie" else added_series).append(meta["title"])
+
+    failed = len(failed_lines)
+    try:
+        counts = await db.insert_links(bulk) if bulk else {"movie": 0, "tv": 0, "failed": 0}
+        movie_count, series_count = counts["movie"], counts["tv"]
+        failed += counts["failed"]
+    except Exception as e:
+        LOGGER.exception(e)
+        movie_count, series_count = 0, 0
+        failed += len(bulk)
+        added_movies, added_series = [], []
 
     # ----------------- Mesaj formatı -----------------
-    if len(added_movies) + len(added_series) > 15:
-        result_text = f"✅ İşlem tamamlandı\n\n🎬 Film: {movie_count}\n📺 Dizi: {series_count}\n❌ Hatalı: {len(failed)}"
+    if len(added_movies) + len(added_series) + len(failed_lines) > 15:
+        result_text = f"✅ İşlem tamamlandı\n\n🎬 Film: {movie_count}\n📺 Dizi: {series_count}\n❌ Hatalı: {failed}"
     else:
         movies_text = "\n".join(f"🎬 {name}" for name in added_movies)
         series_text = "\n".join(f"📺 {name}" for name in added_series)
-        result_text = f"✅ İşlem tamamlandı\n\n{movies_text}\n{series_text}\n❌ Hatalı: {len(failed)}"
+        failed_text = "".join(f"\n⚠️ {line}" for line in failed_lines)
+        result_text = f"✅ İşlem tamamlandı\n\n{movies_text}\n{series_text}\n❌ Hatalı: {failed}{failed_text}"
 
     await status.edit_text(result_text)
     
 # ----------------- /SİL -----------------
 awaiting_confirmation = {}
 
+async def _shard_counts(db_index: int):
+    storage = db.dbs[f"storage_{db_index}"]
+    return await asyncio.gather(storage["movie"].count_documents({}), storage["tv"].count_documents({}))
+
+# Kullanım: /sil → yalnızca storage_1 (önceki kapsam) | /sil hepsi → tüm storage veritabanları
 @Client.on_message(filters.command("sil") & filters.private & CustomFilters.owner)
 async def sil(client: Client, message: Message):
     uid = message.from_user.id
+    all_shards = len(message.command) > 1 and message.command[1].lower() == "hepsi"
+    indexes = db.storage_indexes() if all_shards else [1]
 
-    movie_count = await movie_col.count_documents({})
-    tv_count = await series_col.count_documents({})
+    counts = dict(zip(indexes, await asyncio.gather(*(_shard_counts(i) for i in indexes))))
+    movie_count = sum(m for m, _ in counts.values())
+    tv_count = sum(t for _, t in counts.values())
 
     if movie_count == 0 and tv_count == 0:
         return await message.reply_text("ℹ️ Veritabanı zaten boş.")
 
-    awaiting_confirmation[uid] = True
+    awaiting_confirmation[uid] = indexes
 
+    shard_lines = "\n".join(f"🗄️ storage_{i}: {m} film | {t} dizi" for i, (m, t) in counts.items())
+    scope = f"{len(indexes)} STORAGE VERİTABANININ TAMAMI" if all_shards else "storage_1"
     await message.reply_text(
-        "⚠️ TÜM VERİLER SİLİNECEK ⚠️\n\n"
+        f"⚠️ {scope} SİLİNECEK ⚠️\n\n"
+        f"{shard_lines}\n\n"
         f"🎬 Filmler: {movie_count}\n"
         f"📺 Diziler: {tv_count}\n\n"
         "Onaylamak için **Evet** yaz.\n"
@@ -272,13 +192,16 @@ async def sil_onay(client: Client, message: Message):
     if uid not in awaiting_confirmation:
         return
 
-    awaiting_confirmation.pop(uid)
+    indexes = awaiting_confirmation.pop(uid)
 
     if message.text.lower() == "evet":
-        m = await movie_col.count_documents({})
-        t = await series_col.count_documents({})
-        await movie_col.delete_many({})
-        await series_col.delete_many({})
+        results = await asyncio.gather(*(
+            db.dbs[f"storage_{i}"][collection_name].delete_many({})
+            for i in indexes for collection_name in ("movie", "tv")
+        ))
+        m = sum(r.deleted_count for r in results[0::2])
+        t = sum(r.deleted_count for r in results[1::2])
+        await db.stats.mark_stale()
         await message.reply_text(
             f"✅ Silme tamamlandı\n🎬 {m} film\n📺 {t} dizi"
         )
@@ -286,108 +209,130 @@ async def sil_onay(client: Client, message: Message):
         await message.reply_text("❌ Silme iptal edildi.")
 
 # ------------------calismayanlinklerisil------------------
-@Client.on_message(filters.command("calismayanlinklerisil") & filters.private & CustomFilters.owner)
-async def calismayan_linkleri_sil(client: Client, message: Message):
+def _is_link(url) -> bool:
+    return isinstance(url, str) and url.startswith(("http://", "https://"))
 
-    status = await message.reply_text("🔍 Linkler kontrol ediliyor...")
-
-    async def link_calismiyor_mu(url: str) -> bool:
-        if not url.startswith(("http://", "https://")):
-            return False
-        try:
-            async with aiohttp.ClientSession() as s:
-                async with s.head(url, allow_redirects=True, timeout=20) as r:
-                    size = r.headers.get("Content-Length")
-                    if not size:
-                        return True
-                    return int(size) < (5 * 1024 * 1024)
-        except:
-            return True
+def _chunks(items, size=500):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
 
-    silinen_film = 0
-    silinen_dizi = 0
-    silinen_bolum = 0
-    silinen_link = 0
-
-    silinen_isimler = []
-
-    # ---------------- MOVIES ----------------
-    async for movie in movie_col.find({}):
-        telegramlar = movie.get("telegram", [])
-        yeni_telegram = []
-
-        for t in telegramlar:
-            if await link_calismiyor_mu(t.get("id", "")):
-                silinen_link += 1
-                silinen_isimler.append(f"🎬 {t.get('name')}")
-            else:
-                yeni_telegram.append(t)
-
-        if not yeni_telegram:
-            await movie_col.delete_one({"_id": movie["_id"]})
-            silinen_film += 1
-        elif len(yeni_telegram) != len(telegramlar):
-            await movie_col.update_one(
-                {"_id": movie["_id"]},
-                {"$set": {"telegram": yeni_telegram}}
-            )
-
-    # ---------------- TV ----------------
-    async for tv in series_col.find({}):
-        sezonlar = []
-        dizi_bos = True
+@job_manager.register("calismayanlinklerisil", "Çalışmayan link temizliği")
+async def calismayan_linkleri_sil_job(ctx: JobContext):
 
-        for season in tv.get("seasons", []):
-            bolumler = []
+    link_names = defaultdict(list)      # url -> silinecek isimler
+    link_docs = defaultdict(set)        # url -> (db_index, koleksiyon, _id); temizlik yalnızca bu belgelerde yapılır
+    episode_links = []                   # her bölümün link listesi (bölüm sayımı için)
+
+    # ---------------- LİNKLERİ TOPLA (tüm storage DB'ler) ----------------
+    async for db_index, movie in db.iter_documents("movie", {"telegram.id": {"$regex": "^https?://"}}, {"telegram.id": 1, "telegram.name": 1}):
+        for t in movie.get("telegram", []):
+            if _is_link(t.get("id")):
+                link_names[t["id"]].append(f"🎬 {t.get('name')}")
+                link_docs[t["id"]].add((db_index, "movie", movie["_id"]))
 
+    async for db_index, tv in db.iter_documents("tv", {"seasons.episodes.telegram.id": {"$regex": "^https?://"}}, {"seasons.episodes.telegram.id": 1, "seasons.episodes.telegram.name": 1}):
+        for season in tv.get("seasons", []):
             for ep in season.get("episodes", []):
-                telegramlar = ep.get("telegram", [])
-                yeni_telegram = []
-
-                for t in telegramlar:
-                    if await link_calismiyor_mu(t.get("id", "")):
-                        silinen_link += 1
-                        silinen_isimler.append(f"📺 {t.get('name')}")
-                    else:
-                        yeni_telegram.append(t)
-
-                if yeni_telegram:
-                    ep["telegram"] = yeni_telegram
-                    bolumler.append(ep)
-                    dizi_bos = False
-                else:
-                    silinen_bolum += 1
-
-            if bolumler:
-                season["episodes"] = bolumler
-                sezonlar.append(season)
-
-        if dizi_bos:
-            await series_col.delete_one({"_id": tv["_id"]})
-            silinen_dizi += 1
+                ids = [t.get("id") for t in ep.get("telegram", [])]
+                if any(_is_link(i) for i in ids):
+                    episode_links.append(ids)
+                for t in ep.get("telegram", []):
+                    if _is_link(t.get("id")):
+                        link_names[t["id"]].append(f"📺 {t.get('name')}")
+                        link_docs[t["id"]].add((db_index, "tv", tv["_id"]))
+
+    # ---------------- EŞZAMANLI KONTROL ----------------
+    # Parça parça kontrol edilir; parçalar arasında iptal ve yayın yükü kontrol edilir
+    urls = list(link_names)
+    toplam = len(urls)
+    results = {}
+
+    for chunk in _chunks(urls):
+        await ctx.pause_if_busy()
+        results.update(await link_checker.probe_many(chunk))
+        await ctx.report(
+            f"🔍 Linkler kontrol ediliyor...\n\n🔗 {len(results)} / {toplam}",
+            done=len(results), total=toplam
+        )
+
+    ctx.raise_if_cancelled()
+    dead = [url for url, probe in results.items() if probe.is_dead]
+    dead_set = set(dead)
+
+    silinen_isimler = [name for url in dead for name in link_names[url]]
+    silinen_link = len(silinen_isimler)
+    silinen_bolum = sum(1 for ids in episode_links if ids and all(i in dead_set for i in ids))
+    silinen_film = 0
+    silinen_dizi = 0
+
+    # ---------------- TOPLU YAZMA ----------------
+    # Yalnızca ölü link içeren belgelere dokunulur; boşalan film/bölüm/sezon temizliği
+    # de bu belgelerle sınırlıdır, aynı anda eklenen veya düzenlenen içerik etkilenmez.
+    touched = defaultdict(lambda: (set(), set()))   # (db_index, koleksiyon) -> (_id'ler, ölü linkler)
+    for url in dead:
+        for db_index, collection_name, doc_id in link_docs[url]:
+            ids, urls = touched[(db_index, collection_name)]
+            ids.add(doc_id)
+            urls.add(url)
+
+    for (db_index, collection_name), (ids, urls) in touched.items():
+        collection = db.dbs[f"storage_{db_index}"][collection_name]
+        ids, urls = list(ids), list(urls)
+
+        if collection_name == "movie":
+            ops = [
+                UpdateMany({"_id": {"$in": ids}, "telegram.id": {"$in": chunk}}, {"$pull": {"telegram": {"id": {"$in": chunk}}}})
+                for chunk in _chunks(urls)
+            ]
+            ops.append(DeleteMany({"_id": {"$in": ids}, "telegram": {"$size": 0}}))
+            res = await collection.bulk_write(ops, ordered=True)
+            silinen_film += res.deleted_count
         else:
-            await series_col.update_one(
-                {"_id": tv["_id"]},
-                {"$set": {"seasons": sezonlar}}
-            )
+            ops = [
+                UpdateMany(
+                    {"_id": {"$in": ids}, "seasons.episodes.telegram.id": {"$in": chunk}},
+                    {"$pull": {"seasons.$[].episodes.$[].telegram": {"id": {"$in": chunk}}}}
+                )
+                for chunk in _chunks(urls)
+            ]
+            ops += [
+                UpdateMany({"_id": {"$in": ids}, "seasons.episodes.telegram": {"$size": 0}}, {"$pull": {"seasons.$[].episodes": {"telegram": {"$size": 0}}}}),
+                UpdateMany({"_id": {"$in": ids}, "seasons.episodes": {"$size": 0}}, {"$pull": {"seasons": {"episodes": {"$size": 0}}}}),
+                DeleteMany({"_id": {"$in": ids}, "seasons": {"$size": 0}}),
+            ]
+            res = await collection.bulk_write(ops, ordered=True)
+            silinen_dizi += res.deleted_count
+
+    if dead:
+        await db.stats.mark_stale()
 
     # ---------------- SONUÇ ----------------
     header = (
         "✅ Temizlik tamamlandı\n\n"
+        f"🔍 Kontrol edilen link: {toplam}\n"
         f"🔗 Silinen link: {silinen_link}\n"
+        f"🎬 Silinen film: {silinen_film}\n"
+        f"📺 Silinen dizi: {silinen_dizi} | Bölüm: {silinen_bolum}\n"
     )
 
     if len(silinen_isimler) <= 15:
         detay = "\n".join(silinen_isimler)
-        await status.edit_text(header + detay)
+        await ctx.finish(header + detay)
     else:
         txt_path = "/tmp/silinen_linkler.txt"
         with open(txt_path, "w", encoding="utf-8") as f:
             f.write("\n".join(silinen_isimler))
 
-        await client.send_document(
-            chat_id=message.chat.id,
+        await ctx.client.send_document(
+            chat_id=ctx.chat_id,
             document=txt_path,
             caption=header + "\n📄 Silinen içerik listesi dosya olarak gönderildi."
         )
-        await status.delete()
+        await ctx.finish(header)
+
+
+@Client.on_message(filters.command("calismayanlinklerisil") & filters.private & CustomFilters.owner)
+async def calismayan_linkleri_sil(client: Client, message: Message):
+    job = await job_manager.start(client, "calismayanlinklerisil", message.chat.id, "🔍 Linkler toplanıyor...")
+    if not job:
+        await message.reply_text("⛔ Zaten devam eden bir link kontrolü var.")
@@ -1,14 +1,53 @@
 import time
 import asyncio
+from collections import defaultdict, deque
 from pyrogram import Client, filters
-from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from pymongo import UpdateOne
 
 from Backend import db
 from Backend.helper.custom_filter import CustomFilters
-from Backend.helper.metadata import fetch_tv_metadata, fetch_movie_metadata
+from Backend.helper.jobs import JobCancelled, JobContext, job_manager
+from Backend.helper.metadata import fetch_tv_metadata, fetch_movie_metadata, fetch_season_episodes
 from Backend.logger import LOGGER
 
-CANCEL_REQUESTED = False
+# -------------------------------
+# Tunables
+# -------------------------------
+RESOLVERS = 20          # metadata lookups kept in flight
+READ_AHEAD = RESOLVERS * 2
+WRITE_BATCH = 200       # ops per bulk_write
+FLUSH_INTERVAL = 2.0    # seconds before a partial batch is written
+
+API_MAP = {
+    "imdb_id": "imdb_id",
+    "tmdb_id": "tmdb_id",
+    "rate": "rating",
+    "cast": "cast",
+    "description": "description",
+    "genres": "genres",
+    "poster": "poster",
+    "backdrop": "backdrop",
+    "runtime": "runtime",
+    "logo": "logo"
+}
+
+EPISODE_FIELDS = {
+    "episode_overview": "overview",
+    "episode_released": "released",
+    "episode_backdrop": "episode_backdrop",
+}
+
+# only what the resolvers read; file entries and the rest of the document stay in the database
+LOOKUP_FIELDS = {"imdb_id": 1, "tmdb_id": 1, "title": 1, "release_year": 1}
+PROJECTIONS = {
+    "movie": LOOKUP_FIELDS,
+    "tv": {
+        **LOOKUP_FIELDS,
+        "seasons.season_number": 1,
+        "seasons.episodes.episode_number": 1,
+        **{f"seasons.episodes.{db_key}": 1 for db_key in EPISODE_FIELDS.values()},
+    },
+}
 
 # -------------------------------
 # Progress Bar Helper
@@ -31,410 +70,318 @@ def format_eta(seconds):
     return f"{sec}s"
 
 # -------------------------------
-# CANCEL BUTTON HANDLER
+# Metadata Helpers
 # -------------------------------
-@Client.on_callback_query(filters.regex("cancel_fix"))
-async def cancel_fix(_, query):
-    global CANCEL_REQUESTED
-    CANCEL_REQUESTED = True
-    await query.message.edit_text("❌ Metadata fixing has been cancelled by the user.")
-    await query.answer("Cancelled")
+def all_fields_present(meta: dict) -> bool:
+    if not meta:
+        return False
+
+    if not (meta.get("poster") or meta.get("backdrop")):
+        return False
+
+    has_desc = meta.get("description") or meta.get("genres") or meta.get("cast")
+    if not has_desc:
+        return False
+
+    if meta.get("rate") in [0, None]:
+        return False
+
+    if meta.get("runtime") in [0, None]:
+        return False
+
+    return True
+
+def episode_incomplete(ep: dict) -> bool:
+    return not (ep.get("overview") and ep.get("released") and ep.get("episode_backdrop"))
+
+class CompletionTracker:
+    """
+    Documents finish out of order; the checkpoint cursor only moves past an _id
+    once every document read before it has been written.
+    """
+
+    def __init__(self):
+        self.order = deque()
+        self.finished = set()
+
+    def read(self, doc_id):
+        self.order.append(doc_id)
+
+    def finish(self, doc_id):
+        self.finished.add(doc_id)
+
+    def advance(self):
+        last = None
+        while self.order and self.order[0] in self.finished:
+            last = self.order.popleft()
+            self.finished.discard(last)
+        return last
 
 # -------------------------------
-# MAIN COMMAND (REWRITTEN - Balanced)
+# MAIN JOB (pipelined: reader -> resolvers -> bulk writer)
 # -------------------------------
-@Client.on_message(filters.command("fixmetadata") & filters.private & CustomFilters.owner, group=10)
-async def fix_metadata_handler(_, message):
-    global CANCEL_REQUESTED
-    CANCEL_REQUESTED = False
-
+@job_manager.register("fixmetadata", "Metadata fixing", resumable=True)
+async def fix_metadata_job(ctx: JobContext):
     # -------------------------
-    # Gather totals quickly (non-blocking)
+    # Totals; a resumed run keeps its checkpoint
     # -------------------------
-    total_movies = 0
-    total_tv = 0
-    for i in range(1, db.current_db_index + 1):
-        key = f"storage_{i}"
-        total_movies += await db.dbs[key]["movie"].count_documents({})
-        total_tv += await db.dbs[key]["tv"].count_documents({})
-
-    TOTAL = total_movies + total_tv
-    DONE = 0
+    if "total" not in ctx.checkpoint:
+        counts = await asyncio.gather(*(
+            db.dbs[f"storage_{i}"][col].count_documents({})
+            for i in db.storage_indexes() for col in ("movie", "tv")
+        ))
+        await ctx.save(total=sum(counts), done=0, cursor={})
+
+    TOTAL = ctx.checkpoint["total"]
+    DONE = ctx.checkpoint.get("done", 0)
+    FAILED = ctx.checkpoint.get("failed", 0)
+    run_done = 0
     start_time = time.time()
 
-    status = await message.reply_text(
-        "⏳ Initializing metadata fixing...",
-        reply_markup=InlineKeyboardMarkup([
-            [InlineKeyboardButton("❌ Cancel", callback_data="cancel_fix")]
-        ])
+    await ctx.report(
+        "⏳ Resuming metadata fixing..." if ctx.resumed else "⏳ Initializing metadata fixing...",
+        done=DONE, total=TOTAL, force=True
     )
 
-    # -------------------------
-    # Tunables
-    # -------------------------
-    CONCURRENCY = 20                              
-    TASK_BATCH = CONCURRENCY * 2                  
-    PROGRESS_INTERVAL = 5.0                       
-
-    semaphore = asyncio.Semaphore(CONCURRENCY)
+    read_queue = asyncio.Queue(maxsize=READ_AHEAD)
+    write_queue = asyncio.Queue()
+    trackers = defaultdict(CompletionTracker)
     meta_cache = {}
-    last_progress_edit = start_time
 
-    async def cached_fetch_movie(title, year, default_id, encoded_string=None, quality=None):
-        if default_id:
-            k = ("movie", str(default_id))
-        else:
-            k = ("movie", f"title::{title or ''}::year::{year or ''}")
+    def docs_per_sec():
+        elapsed = time.time() - start_time
+        return run_done / elapsed if elapsed > 0 else 0.0
 
-        if k in meta_cache:
-            return meta_cache[k]
+    def progress_text(title):
+        return (
+            f"{title}\n{progress_bar(DONE, TOTAL)}\n"
+            f"⚡ Speed: {docs_per_sec():.1f} docs/s\n"
+            f"⏱ Elapsed: {format_eta(time.time() - start_time)}"
+        )
 
-        async with semaphore:
+    # -------------------------
+    # Cached lookups (shared job budget + per-API token buckets in metadata.py)
+    # -------------------------
+    async def cached(key, factory):
+        if key in meta_cache:
+            return meta_cache[key]
+        async with ctx.slot():
             try:
-                meta = await fetch_movie_metadata(title=title, encoded_string=encoded_string, year=year, quality=quality, default_id=default_id)
+                meta = await factory()
             except Exception as e:
-                LOGGER.exception(f"fetch_movie_metadata error for {title} ({default_id}): {e}")
-                meta = None
-
-        meta_cache[k] = meta
+                LOGGER.exception(f"Metadata lookup failed for {key}: {e}")
+                return None
+        # misses are not kept: a lookup that failed for a moment is retried by the next document
+        # (metadata.py already caches real not-founds for METADATA_NEGATIVE_TTL)
+        if meta is not None:
+            meta_cache[key] = meta
         return meta
 
-    async def cached_fetch_tv(title, season, episode, year, default_id, encoded_string=None, quality=None):
-        if default_id:
-            k = ("tv", str(default_id), int(season), int(episode))
+    def fetch_movie(title, year, default_id):
+        key = ("movie", str(default_id) if default_id else f"title::{title or ''}::year::{year or ''}")
+        return cached(key, lambda: fetch_movie_metadata(title, None, year, None, default_id))
+
+    def fetch_show(title, year, default_id):
+        key = ("tv", str(default_id) if default_id else f"title::{title or ''}::year::{year or ''}")
+        return cached(key, lambda: fetch_tv_metadata(title, 1, 1, None, year, None, default_id))
+
+    def fetch_season(imdb_id, tmdb_id, season):
+        key = ("season", imdb_id or tmdb_id, season)
+        return cached(key, lambda: fetch_season_episodes(imdb_id, tmdb_id, season))
+
+    async def resolve_pair(fetch, doc):
+        """Primary lookup by the stored id, secondary by the other id if fields are still missing."""
+        imdb_id, tmdb_id = doc.get("imdb_id"), doc.get("tmdb_id")
+        title, year = doc.get("title"), doc.get("release_year")
+
+        if imdb_id:
+            primary = await fetch(title, year, imdb_id)
+            other = tmdb_id or (primary or {}).get("tmdb_id")
+        elif tmdb_id:
+            primary = await fetch(title, year, tmdb_id)
+            other = (primary or {}).get("imdb_id")
         else:
-            k = ("tv", f"title::{title or ''}::year::{year or ''}", int(season), int(episode))
-
-        if k in meta_cache:
-            return meta_cache[k]
-
-        async with semaphore:
-            try:
-                meta = await fetch_tv_metadata(title=title, season=season, episode=episode,
-                                               encoded_string=encoded_string, year=year, quality=quality, default_id=default_id)
-            except Exception as e:
-                LOGGER.exception(f"fetch_tv_metadata error for {title} S{season}E{episode} ({default_id}): {e}")
-                meta = None
+            primary = await fetch(title, year, None)
+            other = (primary or {}).get("imdb_id") or (primary or {}).get("tmdb_id")
+
+        secondary = None
+        if other and not all_fields_present(primary):
+            secondary = await fetch(title, year, other)
+        return primary, secondary
+
+    def merge_fields(metas):
+        fields = {}
+        for meta in metas:
+            if not meta:
+                continue
+            for api_key, db_key in API_MAP.items():
+                new_val = meta.get(api_key)
+                if new_val is not None:
+                    fields[db_key] = new_val
+        return fields
 
-        meta_cache[k] = meta
-        return meta
-
-
-    async def _safe_update_movie(collection, movie_doc):
-        nonlocal DONE, last_progress_edit
-
-        if CANCEL_REQUESTED:
-            return
-        try:
-            doc_id = movie_doc.get("_id")
-            imdb_id = movie_doc.get("imdb_id")
-            tmdb_id = movie_doc.get("tmdb_id")
-            title = movie_doc.get("title")
-            year = movie_doc.get("release_year")
-
-            meta_primary = None
-            meta_secondary = None
-
-            if imdb_id:
-                meta_primary = await cached_fetch_movie(title, year, imdb_id)
-                fetched_tmdb = meta_primary.get("tmdb_id") if meta_primary else None
-                if (tmdb_id or fetched_tmdb) and (not all_fields_present(meta_primary)):
-                    meta_secondary = await cached_fetch_movie(title, year, (tmdb_id or fetched_tmdb))
-            elif tmdb_id:
-                meta_primary = await cached_fetch_movie(title, year, tmdb_id)
-                fetched_imdb = meta_primary.get("imdb_id") if meta_primary else None
-                if fetched_imdb and (not all_fields_present(meta_primary)):
-                    meta_secondary = await cached_fetch_movie(title, year, fetched_imdb)
-            else:
-                meta_primary = await cached_fetch_movie(title, year, None)
-                if meta_primary:
-                    fetched_imdb = meta_primary.get("imdb_id")
-                    fetched_tmdb = meta_primary.get("tmdb_id")
-                    if fetched_imdb and (not all_fields_present(meta_primary)):
-                        meta_secondary = await cached_fetch_movie(title, year, fetched_imdb)
-                    elif fetched_tmdb and (not all_fields_present(meta_primary)):
-                        meta_secondary = await cached_fetch_movie(title, year, fetched_tmdb)
-
-            update_query = {}
-            current = dict(movie_doc)
-
-            api_map = {
-                "imdb_id": "imdb_id",
-                "tmdb_id": "tmdb_id",
-                "rate": "rating",
-                "cast": "cast",
-                "description": "description",
-                "genres": "genres",
-                "poster": "poster",
-                "backdrop": "backdrop",
-                "runtime": "runtime",
-                "logo": "logo"
-            }
-
-            for meta in (meta_primary, meta_secondary):
-                if not meta:
+    # -------------------------
+    # Resolvers: one document -> at most one UpdateOne
+    # -------------------------
+    async def resolve_movie(doc):
+        fields = merge_fields(await resolve_pair(fetch_movie, doc))
+        return UpdateOne({"_id": doc["_id"]}, {"$set": fields}) if fields else None
+
+    async def resolve_tv(doc):
+        fields = merge_fields(await resolve_pair(fetch_show, doc))
+        imdb_id = fields.get("imdb_id") or doc.get("imdb_id")
+        tmdb_id = fields.get("tmdb_id") or doc.get("tmdb_id")
+        array_filters = []
+
+        if imdb_id or tmdb_id:
+            for s_idx, season in enumerate(doc.get("seasons", [])):
+                incomplete = [ep for ep in season.get("episodes", []) if episode_incomplete(ep)]
+                if not incomplete:
                     continue
-                for api_key, db_key in api_map.items():
-                    new_val = meta.get(api_key)
-                    if new_val is None:
-                        continue
 
-                    if db_key == "rating":
-                        is_empty = (not current.get(db_key)) or current.get(db_key) == 0
-                    else:
-                        is_empty = not current.get(db_key)
-                    # # If want to add missing data
-                    # if is_empty and new_val:
-                    #     update_query[db_key] = new_val
-                    #     current[db_key] = new_val
-                    # # If want to add complete data
-                    if new_val is not None:
-                        update_query[db_key] = new_val
-                        current[db_key] = new_val
-
-
-            if update_query:
-                filter_q = {"_id": doc_id} if doc_id else {"imdb_id": imdb_id}
-                try:
-                    await collection.update_one(filter_q, {"$set": update_query})
-                except Exception as e:
-                    LOGGER.exception(f"DB update failed for movie {title}: {e}")
-
-            DONE += 1
-
-            now = time.time()
-            if now - last_progress_edit > PROGRESS_INTERVAL:
-                last_progress_edit = now
-                try:
-                    await status.edit_text(
-                        f"⏳ Fixing metadata...\n{progress_bar(DONE, TOTAL)}\n⏱ Elapsed: {format_eta(now - start_time)}"
-                    )
-                except Exception:
-                    pass
-
-        except Exception as e:
-            LOGGER.exception(f"Error updating movie {movie_doc.get('title')}: {e}")
-            DONE += 1
-
-    async def _safe_update_tv(collection, tv_doc):
-        nonlocal DONE, last_progress_edit
-
-        if CANCEL_REQUESTED:
-            return
-
-        try:
-            doc_id = tv_doc.get("_id")
-            imdb_id = tv_doc.get("imdb_id")
-            tmdb_id = tv_doc.get("tmdb_id")
-            title = tv_doc.get("title")
-            year = tv_doc.get("release_year")
-
-            meta_primary = None
-            meta_secondary = None
-
-            if imdb_id:
-                meta_primary = await cached_fetch_tv(title, 1, 1, year, imdb_id)
-                fetched_tmdb = meta_primary.get("tmdb_id") if meta_primary else None
-                if (tmdb_id or fetched_tmdb) and (not all_fields_present(meta_primary)):
-                    meta_secondary = await cached_fetch_tv(title, 1, 1, year, (tmdb_id or fetched_tmdb))
-            elif tmdb_id:
-                meta_primary = await cached_fetch_tv(title, 1, 1, year, tmdb_id)
-                fetched_imdb = meta_primary.get("imdb_id") if meta_primary else None
-                if fetched_imdb and (not all_fields_present(meta_primary)):
-                    meta_secondary = await cached_fetch_tv(title, 1, 1, year, fetched_imdb)
-            else:
-                meta_primary = await cached_fetch_tv(title, 1, 1, year, None)
-                if meta_primary:
-                    fetched_imdb = meta_primary.get("imdb_id")
-                    fetched_tmdb = meta_primary.get("tmdb_id")
-                    if fetched_imdb and (not all_fields_present(meta_primary)):
-                        meta_secondary = await cached_fetch_tv(title, 1, 1, year, fetched_imdb)
-                    elif fetched_tmdb and (not all_fields_present(meta_primary)):
-                        meta_secondary = await cached_fetch_tv(title, 1, 1, year, fetched_tmdb)
-
-            update_query = {}
-            current = dict(tv_doc)
-            api_map = {
-                "imdb_id": "imdb_id",
-                "tmdb_id": "tmdb_id",
-                "rate": "rating",
-                "cast": "cast",
-                "description": "description",
-                "genres": "genres",
-                "poster": "poster",
-                "backdrop": "backdrop",
-                "runtime": "runtime",
-                "logo": "logo"
-            }
-
-            for meta in (meta_primary, meta_secondary):
-                if not meta:
-                    continue
-                for api_key, db_key in api_map.items():
-                    new_val = meta.get(api_key)
-                    if new_val is None:
+                # one request per season instead of one per episode
+                episodes = await fetch_season(imdb_id, tmdb_id, season.get("season_number")) or {}
+                season_filter = {f"s{s_idx}.season_number": season.get("season_number")}
+                for ep in incomplete:
+                    meta = episodes.get(ep.get("episode_number"))
+                    if not meta:
                         continue
-                    if db_key == "rating":
-                        is_empty = (not current.get(db_key)) or current.get(db_key) == 0
-                    else:
-                        is_empty = not current.get(db_key)
-                    # # If want to add missing data
-                    # if is_empty and new_val:
-                    #     update_query[db_key] = new_val
-                    #     current[db_key] = new_val
-                    # # If want to add complete data
-                    if new_val is not None:
-                        update_query[db_key] = new_val
-                        current[db_key] = new_val
-
-
-            if update_query:
-                filter_q = {"_id": doc_id} if doc_id else {"imdb_id": imdb_id}
-                try:
-                    await collection.update_one(filter_q, {"$set": update_query})
-                except Exception as e:
-                    LOGGER.exception(f"DB update failed for TV {title}: {e}")
-
-            final_imdb = current.get("imdb_id")
-            if not final_imdb:
-                DONE += 1
-                return
+                    e_id = f"e{len(array_filters)}"
+                    path = f"seasons.$[s{s_idx}].episodes.$[{e_id}]"
+                    ep_fields = {
+                        f"{path}.{db_key}": meta[api_key]
+                        for api_key, db_key in EPISODE_FIELDS.items() if meta.get(api_key)
+                    }
+                    if not ep_fields:
+                        continue
+                    if season_filter:
+                        array_filters.append(season_filter)
+                        season_filter = None
+                    array_filters.append({f"{e_id}.episode_number": ep.get("episode_number")})
+                    fields.update(ep_fields)
 
-            ep_tasks = []
-            for season in tv_doc.get("seasons", []):
-                s_num = season.get("season_number")
-                for ep in season.get("episodes", []):
-                    e_num = ep.get("episode_number")
+        if not fields:
+            return None
+        return UpdateOne({"_id": doc["_id"]}, {"$set": fields}, array_filters=array_filters or None)
 
-                    # skip if episode appears complete
-                    if ep.get("overview") and ep.get("released") and ep.get("episode_backdrop"):
-                        continue
+    RESOLVE = {"movie": resolve_movie, "tv": resolve_tv}
 
-                    async def ep_task(sn=s_num, en=e_num):
-                        try:
-                            meta = await cached_fetch_tv(title, sn, en, year, final_imdb)
-                            if not meta:
-                                return
-
-                            ep_update = {}
-                            if meta.get("episode_overview"):
-                                ep_update["seasons.$[s].episodes.$[e].overview"] = meta["episode_overview"]
-                            if meta.get("episode_released"):
-                                ep_update["seasons.$[s].episodes.$[e].released"] = meta["episode_released"]
-                            if meta.get("episode_backdrop"):
-                                ep_update["seasons.$[s].episodes.$[e].episode_backdrop"] = meta["episode_backdrop"]
-
-                            if ep_update:
-                                filt = {"_id": doc_id} if doc_id else {"imdb_id": final_imdb}
-                                await collection.update_one(
-                                    filt,
-                                    {"$set": ep_update},
-                                    array_filters=[
-                                        {"s.season_number": sn},
-                                        {"e.episode_number": en}
-                                    ]
-                                )
-                        except Exception as e:
-                            LOGGER.exception(f"Error updating episode {title} S{sn}E{en}: {e}")
-
-                    ep_tasks.append(ep_task())
-
-            for i in range(0, len(ep_tasks), TASK_BATCH):
-                if CANCEL_REQUESTED:
-                    break
-                batch = ep_tasks[i:i+TASK_BATCH]
-                running = [asyncio.create_task(t) for t in batch]
-                await asyncio.gather(*running, return_exceptions=True)
-
-            DONE += 1
-
-            now = time.time()
-            if now - last_progress_edit > PROGRESS_INTERVAL:
-                last_progress_edit = now
-                try:
-                    await status.edit_text(
-                        f"⏳ Fixing metadata...\n{progress_bar(DONE, TOTAL)}\n⏱ Elapsed: {format_eta(now - start_time)}"
-                    )
-                except Exception:
-                    pass
-
-        except Exception as e:
-            LOGGER.exception(f"Error updating TV show {tv_doc.get('title')}: {e}")
-            DONE += 1
-
-    def all_fields_present(meta: dict) -> bool:
-        if not meta:
-            return False
-
-        if not (meta.get("poster") or meta.get("backdrop")):
-            return False
-
-        has_desc = meta.get("description") or meta.get("genres") or meta.get("cast")
-        if not has_desc:
-            return False
-
-        if meta.get("rate") in [0, None]:
-            return False
-
-        if meta.get("runtime") in [0, None]:
-            return False
-
-        return True
-
-
-
-    async def update_movies():
-        tasks = []
-        for i in range(1, db.current_db_index + 1):
-            if CANCEL_REQUESTED:
-                break
-            collection = db.dbs[f"storage_{i}"]["movie"]
-            cursor = collection.find({})
-            async for movie in cursor:
-                if CANCEL_REQUESTED:
-                    break
-                tasks.append(_safe_update_movie(collection, movie))
-                if len(tasks) >= TASK_BATCH:
-                    await asyncio.gather(*tasks, return_exceptions=True)
-                    tasks = []
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
-
-    async def update_tv_shows():
-        tasks = []
-        for i in range(1, db.current_db_index + 1):
-            if CANCEL_REQUESTED:
-                break
-            collection = db.dbs[f"storage_{i}"]["tv"]
-            cursor = collection.find({})
-            async for tv in cursor:
-                if CANCEL_REQUESTED:
-                    break
-                tasks.append(_safe_update_tv(collection, tv))
-                if len(tasks) >= TASK_BATCH:
-                    await asyncio.gather(*tasks, return_exceptions=True)
-                    tasks = []
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+    # -------------------------
+    # Stages
+    # -------------------------
+    async def reader():
+        for col_name in ("movie", "tv"):
+            for db_index in db.storage_indexes():
+                key = (col_name, db_index)
+                query = {}
+                last_id = ctx.checkpoint.get("cursor", {}).get(f"{col_name}_{db_index}")
+                if last_id is not None:
+                    query = {"_id": {"$gt": last_id}}
+
+                async for doc in db.dbs[f"storage_{db_index}"][col_name].find(query, PROJECTIONS[col_name]).sort("_id", 1):
+                    await ctx.pause_if_busy()
+                    trackers[key].read(doc["_id"])
+                    await read_queue.put((key, doc))
+
+    async def resolver():
+        while True:
+            item = await read_queue.get()
+            if item is None:
+                return
+            key, doc = item
+            # after a cancel the queue is only drained; skipped docs never reach the checkpoint
+            if ctx.cancelled:
+                continue
+            op = None
+            try:
+                op = await RESOLVE[key[0]](doc)
+            except JobCancelled:
+                continue
+            except Exception as e:
+                LOGGER.exception(f"Error resolving {key[0]} {doc.get('title')}: {e}")
+            await write_queue.put((key, doc["_id"], op))
+
+    async def flush(pending, finished):
+        nonlocal DONE, FAILED, run_done
+        failed_keys = set()
+        for (col_name, db_index), ops in pending.items():
+            if not ops:
+                continue
+            try:
+                await db.dbs[f"storage_{db_index}"][col_name].bulk_write(ops, ordered=False)
+            except Exception as e:
+                failed_keys.add((col_name, db_index))
+                LOGGER.exception(f"Bulk write failed for storage_{db_index}.{col_name}: {e}")
+
+        # documents of a failed write stay unfinished: the cursor stops before them and a resume redoes them
+        written = [(key, doc_id) for key, doc_id in finished if key not in failed_keys]
+        cursors = {}
+        for key, doc_id in written:
+            trackers[key].finish(doc_id)
+        for key in {key for key, _ in written}:
+            last = trackers[key].advance()
+            if last is not None:
+                cursors[f"cursor.{key[0]}_{key[1]}"] = last
+
+        DONE += len(written)
+        FAILED += len(finished) - len(written)
+        run_done += len(written)
+        await ctx.save(done=DONE, failed=FAILED, **cursors)
+        await ctx.report(progress_text("⏳ Fixing metadata..."), done=DONE, total=TOTAL)
+
+    async def writer():
+        pending, finished = defaultdict(list), []
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = await asyncio.wait_for(write_queue.get(), timeout=FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                item = False
 
+            if item is None:
+                if finished:
+                    await flush(pending, finished)
+                return
+            if item:
+                key, doc_id, op = item
+                if op:
+                    pending[key].append(op)
+                finished.append((key, doc_id))
+
+            batch = sum(len(ops) for ops in pending.values())
+            if finished and (batch >= WRITE_BATCH or time.monotonic() - last_flush >= FLUSH_INTERVAL):
+                await flush(pending, finished)
+                pending, finished = defaultdict(list), []
+                last_flush = time.monotonic()
+
+    resolvers = [asyncio.create_task(resolver()) for _ in range(RESOLVERS)]
+    writer_task = asyncio.create_task(writer())
     try:
-        await asyncio.gather(update_movies(), update_tv_shows())
-    except Exception as e:
-        LOGGER.exception(f"Error in fix_metadata run: {e}")
-
-    if CANCEL_REQUESTED:
-        try:
-            await status.edit_text("❌ Metadata fixing cancelled by user.")
-        except Exception:
-            pass
-        return
-
-    elapsed = time.time() - start_time
-    try:
-        await status.edit_text(
-            f"🎉 **Metadata Fix Completed!**\n"
-            f"{progress_bar(DONE, TOTAL)}\n"
-            f"⏱ Time Taken: {format_eta(elapsed)}"
-        )
-    except Exception:
-        pass
+        await reader()
+        for _ in resolvers:
+            await read_queue.put(None)
+        await asyncio.gather(*resolvers)
+        await write_queue.put(None)
+        await writer_task
+    finally:
+        for task in resolvers + [writer_task]:
+            if not task.done():
+                task.cancel()
+
+    ctx.raise_if_cancelled()
+    await ctx.finish(
+        f"🎉 **Metadata Fix Completed!**\n"
+        f"{progress_bar(DONE, TOTAL)}\n"
+        f"❌ Failed: {FAILED}\n"
+        f"⚡ Speed: {docs_per_sec():.1f} docs/s\n"
+        f"⏱ Time Taken: {format_eta(time.time() - start_time)}"
+    )
+
+# -------------------------------
+# MAIN COMMAND
+# -------------------------------
+@Client.on_message(filters.command("fixmetadata") & filters.private & CustomFilters.owner, group=10)
+async def fix_metadata_handler(client, message):
+    job = await job_manager.start(client, "fixmetadata", message.chat.id, "⏳ Initializing metadata fixing...")
+    if not job:
+        await message.reply_text("⛔ Metadata fixing is already running.")
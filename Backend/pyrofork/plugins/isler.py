@@ -0,0 +1,41 @@
+from pyrogram import Client, filters
+from pyrogram.types import Message, CallbackQuery
+from Backend.helper.custom_filter import CustomFilters
+from Backend.helper.jobs import CANCEL_PREFIX, job_manager
+
+STATUS_ICONS = {
+    "running": "⏳",
+    "done": "✅",
+    "cancelled": "⛔",
+    "failed": "❌",
+    "interrupted": "⚠️",
+}
+
+# ---------------- /isler KOMUTU ----------------
+@Client.on_message(filters.command("isler") & filters.private & CustomFilters.owner)
+async def list_jobs(client: Client, message: Message):
+    jobs = await job_manager.list(limit=10)
+    if not jobs:
+        await message.reply_text("ℹ️ Kayıtlı iş yok.")
+        return
+
+    lines = []
+    for job in jobs:
+        progress = job.get("progress") or {}
+        done, total = progress.get("done"), progress.get("total")
+        ilerleme = f" | {done}/{total}" if total else ""
+        lines.append(
+            f"{STATUS_ICONS.get(job['status'], '•')} {job['kind']} | {job['status']}{ilerleme}\n"
+            f"   ID: {job['_id']} | {job['started_at'].strftime('%d.%m.%Y %H:%M')} UTC"
+        )
+
+    await message.reply_text("⌬ İşler\n\n" + "\n".join(lines))
+
+# ---------------- İPTAL BUTONU ----------------
+@Client.on_callback_query(filters.regex(f"^{CANCEL_PREFIX}") & CustomFilters.owner)
+async def cancel_job(client: Client, query: CallbackQuery):
+    job_id = query.data[len(CANCEL_PREFIX):]
+    if job_manager.cancel(job_id):
+        await query.answer("Durdurma talimatı alındı.")
+    else:
+        await query.answer("Bu iş artık çalışmıyor.", show_alert=True)
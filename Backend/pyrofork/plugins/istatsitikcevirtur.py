@@ -1,48 +1,30 @@
-import asyncio
 import time
-from concurrent.futures import ThreadPoolExecutor
-from pymongo import MongoClient, UpdateOne
+from pymongo import UpdateOne, DeleteOne
 from collections import defaultdict
-import psutil
 from pyrogram import Client, filters, enums
-from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
-from deep_translator import GoogleTranslator
+from pyrogram.types import Message
 import os
 
-# ---------------- CONFIG ----------------
-OWNER_ID = int(os.getenv("OWNER_ID", 12345))
-stop_event = asyncio.Event()
-DOWNLOAD_DIR = "/"
+from Backend import db
+from Backend.helper.storage import (
+    bulk_write_grouped, iter_batches, storage_size, update_many_all
+)
+from Backend.helper.media_workers import genre_updates, platform_updates, strip_link_updates
+from Backend.helper.dedup import apply_removals, find_library_duplicates
+from Backend.helper.jobs import JobContext, job_manager
+from Backend.helper.lazy import lazy_import
+from Backend.helper.loop_monitor import loop_monitor
+from Backend.helper.translator import TranslationJob
 
-# ---------------- DATABASE ----------------
-db_raw = os.getenv("DATABASE", "")
-if not db_raw:
-    raise Exception("DATABASE ortam değişkeni bulunamadı!")
+psutil = lazy_import("psutil")
 
-db_urls = [u.strip() for u in db_raw.split(",") if u.strip()]
-MONGO_URL = db_urls[1] if len(db_urls) > 1 else db_urls[0]
-
-client_db = MongoClient(MONGO_URL)
-db_name = client_db.list_database_names()[0]
-db = client_db[db_name]
-movie_col = db["movie"]
-series_col = db["tv"]
+# ---------------- CONFIG ----------------
+OWNER_ID = int(os.getenv("OWNER_ID", 12345))
+STORAGE_LIMIT_MB = 512  # storage veritabanı başına
 
 bot_start_time = time.time()
 
 # ---------------- UTILS ----------------
-def translate_text_safe(text, cache):
-    if not text or str(text).strip() == "":
-        return ""
-    if text in cache:
-        return cache[text]
-    try:
-        tr = GoogleTranslator(source='en', target='tr').translate(text)
-    except:
-        tr = text
-    cache[text] = tr
-    return tr
-
 def progress_bar(current, total, bar_length=12):
     if total == 0:
         return "[⬡" + "⬡"*(bar_length-1) + "] 0.00%"
@@ -59,224 +41,68 @@ def format_time_custom(total_seconds):
     m, s = divmod(rem, 60)
     return f"{h}s{m}d{s:02}s"
 
-async def handle_stop(callback_query: CallbackQuery):
-    stop_event.set()
-    try:
-        await callback_query.message.edit_text(
-            "⛔ İşlem **iptal edildi**!",
-            parse_mode=enums.ParseMode.MARKDOWN
-        )
-        await callback_query.answer("Durdurma talimatı alındı.")
-    except:
-        pass
-
-# ---------------- GLOBAL FLAGS ----------------
-is_running = False
-stop_event = asyncio.Event()
-
-# ---------------- TRANSLATE WORKER ----------------
-def translate_batch_worker(batch_docs):
-    """
-    Batch olarak gelen belgeleri çevirir.
-    Her doc {'_id': ..., 'title': ..., 'description': ..., 'seasons': [...]} yapısında olmalıdır.
-    """
-    CACHE = {}
-    results = []
-    errors = []
-
-    for doc in batch_docs:
-        _id = doc.get("_id")
-        upd = {}
-        title_main = doc.get("title") or doc.get("name") or "İsim yok"
-
-        try:
-            # Film description çevirisi
-            if "description" in doc and doc["description"]:
-                upd["description"] = translate_text_safe(doc["description"], CACHE)
-
-            # Dizi sezonları ve bölümleri
-            seasons = doc.get("seasons")
-            if seasons:
-                for s in seasons:
-                    for ep in s.get("episodes", []):
-                        if not ep.get("cevrildi", False):
-                            if ep.get("title"):
-                                ep["title"] = translate_text_safe(ep["title"], CACHE)
-                            if ep.get("overview"):
-                                ep["overview"] = translate_text_safe(ep["overview"], CACHE)
-                            ep["cevrildi"] = True
-                upd["seasons"] = seasons
-
-            upd["cevrildi"] = True
-            results.append((_id, upd))
-        except Exception as e:
-            errors.append(f"ID: {_id} | Film/Dizi: {title_main} | Hata: {str(e)}")
-
-    return results, errors
-
-
 # ---------------- /cevir ----------------
-@Client.on_message(filters.command("cevir") & filters.private & filters.user(OWNER_ID))
-async def cevir(client: Client, message: Message):
-    global stop_event, is_running
-
-    if is_running:
-        await message.reply_text("⛔ Zaten devam eden bir işlem var.")
-        return
-
-    is_running = True
-    stop_event.clear()
-
-    start_msg = await message.reply_text(
-        "🇹🇷 Türkçe çeviri hazırlanıyor...\nİlerleme tek mesajda gösterilecektir.",
-        parse_mode=enums.ParseMode.MARKDOWN,
-        reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("❌ İptal Et", callback_data="stop")]]),
+def format_translation_progress(state, elapsed, title):
+    total, done = state["total"], state["done"]
+    total_all = total["movie"] + total["episode"]
+    done_all = done["movie"] + done["episode"]
+
+    eta_str = "hesaplanıyor"
+    if done_all > 0:
+        eta_str = format_time_custom(elapsed / done_all * max(total_all - done_all, 0))
+
+    return (
+        f"{title}\n\n"
+        f"Toplam: {total_all} (Film {total['movie']} | Bölüm {total['episode']})\n"
+        f"Çevrilen: Film {done['movie']} | Bölüm {done['episode']}\n"
+        f"Kalan: Film {max(total['movie'] - done['movie'], 0)} | Bölüm {max(total['episode'] - done['episode'], 0)}\n"
+        f"Hatalı: {state.get('errors', 0)}\n"
+        f"{progress_bar(done_all, total_all)}\n\n"
+        f"Süre: `{format_time_custom(elapsed)}` (`{eta_str}`)\n\n"
+        f"┟ CPU → {psutil.cpu_percent(interval=None)}%\n"
+        f"┖ RAM → {psutil.virtual_memory().percent}%"
     )
 
+@job_manager.register("cevir", "Çeviri", resumable=True)
+async def translation_job(ctx: JobContext):
+    job = TranslationJob(ctx)
+    state = await job.prepare()
     start_time = time.time()
+    title = "🇹🇷 Türkçe çeviri yapılıyor."
+
+    def totals(state):
+        total, done = state["total"], state["done"]
+        return done["movie"] + done["episode"], total["movie"] + total["episode"]
+
+    async def on_progress(state):
+        done, total = totals(state)
+        await ctx.report(
+            format_translation_progress(state, time.time() - start_time, title),
+            done=done, total=total,
+            parse_mode=enums.ParseMode.MARKDOWN,
+        )
 
-    # ---------------- TOPLAM HESAPLAMA ----------------
-    movies_to_translate = movie_col.count_documents({})
-    episodes_to_translate = 0
-    for doc in series_col.find({}, {"seasons.episodes": 1}):
-        for season in doc.get("seasons", []):
-            episodes_to_translate += len(season.get("episodes", []))
-
-    total_to_translate = movies_to_translate + episodes_to_translate
-    translated_movies = 0
-    translated_episodes = 0
-    error_count = 0
-
-    collections = [
-        {"col": movie_col, "type": "film", "translated": 0, "errors_list": []},
-        {"col": series_col, "type": "episode", "translated": 0, "errors_list": []},
-    ]
-
-    batch_size = 50
-    workers = 4
-    pool = ThreadPoolExecutor(max_workers=workers)
-    loop = asyncio.get_event_loop()
-    last_update = time.time()
-    update_interval = 10
-
-    try:
-        for c in collections:
-            col = c["col"]
-            docs_cursor = col.find({}, {"_id": 1})
-            ids = [d["_id"] for d in docs_cursor]
-            idx = 0
-
-            while idx < len(ids):
-                if stop_event.is_set():
-                    break
-
-                batch_ids = ids[idx: idx + batch_size]
-                batch_docs = list(col.find({"_id": {"$in": batch_ids}}))
-
-                # Worker çağrısı
-                results, errors = await loop.run_in_executor(pool, translate_batch_worker, batch_docs)
-
-                for _id, upd in results:
-                    try:
-                        col.update_one({"_id": _id}, {"$set": upd})
-                        if c["type"] == "film":
-                            translated_movies += 1
-                        else:
-                            seasons = upd.get("seasons", [])
-                            ep_count = sum(len(s.get("episodes", [])) for s in seasons)
-                            translated_episodes += ep_count
-                    except:
-                        errors.append(f"ID: {_id} | DB Güncelleme Hatası")
-
-                error_count += len(errors)
-                c["errors_list"].extend(errors)
-                idx += len(batch_ids)
-
-                # ---------------- CPU / RAM ----------------
-                cpu = psutil.cpu_percent(interval=None)
-                ram = psutil.virtual_memory().percent
-
-                # ---------------- SÜRE HESAPLAMA ----------------
-                elapsed = int(time.time() - start_time)
-                h, rem = divmod(elapsed, 3600)
-                m, s = divmod(rem, 60)
-                elapsed_str = f"{h}s{m}d{s}s"
-
-                remaining = (movies_to_translate - translated_movies) + (episodes_to_translate - translated_episodes)
-                eta_str = "hesaplanıyor"
-                if translated_movies + translated_episodes > 0:
-                    avg = elapsed / (translated_movies + translated_episodes)
-                    eta_sec = int(avg * remaining)
-                    eh, er = divmod(eta_sec, 3600)
-                    em, es = divmod(er, 60)
-                    eta_str = f"{eh}s{em}d{es}s"
-
-                if time.time() - last_update >= update_interval or idx >= len(ids):
-                    last_update = time.time()
-                    try:
-                        await start_msg.edit_text(
-                            (
-                                f"🇹🇷 Türkçe çeviri yapılıyor.\n\n"
-                                f"Toplam: {total_to_translate} (Film {movies_to_translate} | Bölüm {episodes_to_translate})\n"
-                                f"Çevrilen: Film {translated_movies} | Bölüm {translated_episodes}\n"
-                                f"Kalan: Film {movies_to_translate - translated_movies} | Bölüm {episodes_to_translate - translated_episodes}\n"
-                                f"Hatalı: {error_count}\n"
-                                f"{progress_bar(translated_movies + translated_episodes, total_to_translate)}\n\n"
-                                f"Süre: `{elapsed_str}` (`{eta_str}`)\n\n"
-                                f"┟ CPU → {cpu}%\n"
-                                f"┖ RAM → {ram}%"
-                            ),
-                            parse_mode=enums.ParseMode.MARKDOWN,
-                            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("❌ İptal Et", callback_data="stop")]]),
-                        )
-                    except:
-                        pass
-    finally:
-        pool.shutdown(wait=False)
-        is_running = False
-
-    # ---------------- FINAL ÖZET ----------------
-    total_duration = int(time.time() - start_time)
-    h, rem = divmod(total_duration, 3600)
-    m, s = divmod(rem, 60)
-    duration_str = f"{h}s{m}d{s}s"
+    done, total = totals(state)
+    await ctx.report(
+        format_translation_progress(state, 0, "♻️ Çeviri kaldığı yerden devam ediyor." if ctx.resumed else title),
+        done=done, total=total, force=True,
+        parse_mode=enums.ParseMode.MARKDOWN,
+    )
 
-    cpu = psutil.cpu_percent(interval=1)
-    ram = psutil.virtual_memory().percent
+    await job.run(on_progress)
 
-    await start_msg.edit_text(
-        (
-            "📊 **Genel Özet**\n\n"
-            f"Toplam: {total_to_translate} (Film {movies_to_translate} | Bölüm {episodes_to_translate})\n"
-            f"Çevrilen: Film {translated_movies} | Bölüm {translated_episodes}\n"
-            f"Kalan: Film {movies_to_translate - translated_movies} | Bölüm {episodes_to_translate - translated_episodes}\n"
-            f"Hatalı: {error_count}\n"
-            f"Süre: {duration_str}\n\n"
-            f"CPU: {cpu}% | RAM: {ram}%"
-        ),
+    await ctx.finish(
+        format_translation_progress(job.state, time.time() - start_time, "📊 **Genel Özet**"),
         parse_mode=enums.ParseMode.MARKDOWN
     )
 
-    # -------- HATA DOSYASI --------
-    hata_icerigi = []
-    for c in collections:
-        if c["errors_list"]:
-            hata_icerigi.append(f"*** {c['col'].name} Hataları ***")
-            hata_icerigi.extend(c["errors_list"])
-            hata_icerigi.append("")
 
-    if hata_icerigi:
-        log_path = "cevirhatalari.txt"
-        with open(log_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(hata_icerigi))
-        try:
-            await client.send_document(
-                chat_id=OWNER_ID,
-                document=log_path,
-                caption="⛔ Çeviri sırasında hatalar oluştu"
-            )
-        except:
-            pass
+@Client.on_message(filters.command("cevir") & filters.private & filters.user(OWNER_ID))
+async def cevir(client: Client, message: Message):
+    # Uzun süren iş arka planda çalışır, yeniden başlatmada kaldığı yerden devam eder
+    job = await job_manager.start(client, "cevir", message.chat.id, "🇹🇷 Çeviri hazırlanıyor...")
+    if not job:
+        await message.reply_text("⛔ Zaten devam eden bir işlem var.")
 
 
 # ---------------- /cevirekle ----------------
@@ -285,25 +111,17 @@ async def cevirekle(client: Client, message: Message):
     status = await message.reply_text("🔄 'cevrildi' alanları ekleniyor...")
     total_updated = 0
 
-    for col in (movie_col, series_col):
+    for col in ("movie", "tv"):
         # Üst seviye belgeler
-        docs_cursor = col.find({"cevrildi": {"$ne": True}}, {"_id": 1})
-        bulk_ops = [UpdateOne({"_id": doc["_id"]}, {"$set": {"cevrildi": True}}) for doc in docs_cursor]
+        total_updated += await update_many_all(col, {"cevrildi": {"$ne": True}}, {"$set": {"cevrildi": True}})
 
         # Dizi bölümleri için
-        if col == series_col:
-            docs_cursor = col.find({"seasons.episodes.cevrildi": {"$ne": True}}, {"_id": 1})
-            for doc in docs_cursor:
-                bulk_ops.append(
-                    UpdateOne(
-                        {"_id": doc["_id"]},
-                        {"$set": {"seasons.$[].episodes.$[].cevrildi": True}}
-                    )
-                )
-
-        if bulk_ops:
-            res = col.bulk_write(bulk_ops)
-            total_updated += res.modified_count
+        if col == "tv":
+            total_updated += await update_many_all(
+                col,
+                {"seasons.episodes.cevrildi": {"$ne": True}},
+                {"$set": {"seasons.$[].episodes.$[].cevrildi": True}}
+            )
 
     await status.edit_text(f"✅ 'cevrildi' alanları eklendi.\nToplam güncellenen kayıt: {total_updated}")
 
@@ -312,25 +130,17 @@ async def cevirkaldir(client: Client, message: Message):
     status = await message.reply_text("🔄 'cevrildi' alanları kaldırılıyor...")
     total_updated = 0
 
-    for col in (movie_col, series_col):
+    for col in ("movie", "tv"):
         # Üst seviye belgeler
-        docs_cursor = col.find({"cevrildi": True}, {"_id": 1})
-        bulk_ops = [UpdateOne({"_id": doc["_id"]}, {"$unset": {"cevrildi": ""}}) for doc in docs_cursor]
+        total_updated += await update_many_all(col, {"cevrildi": True}, {"$unset": {"cevrildi": ""}})
 
         # Dizi bölümleri için
-        if col == series_col:
-            docs_cursor = col.find({"seasons.episodes.cevrildi": True}, {"_id": 1})
-            for doc in docs_cursor:
-                bulk_ops.append(
-                    UpdateOne(
-                        {"_id": doc["_id"]},
-                        {"$unset": {"seasons.$[].episodes.$[].cevrildi": ""}}
-                    )
-                )
-
-        if bulk_ops:
-            res = col.bulk_write(bulk_ops)
-            total_updated += res.modified_count
+        if col == "tv":
+            total_updated += await update_many_all(
+                col,
+                {"seasons.episodes.cevrildi": True},
+                {"$unset": {"seasons.$[].episodes.$[].cevrildi": ""}}
+            )
 
     await status.edit_text(f"✅ 'cevrildi' alanları kaldırıldı.\nToplam güncellenen kayıt: {total_updated}")
 
@@ -338,39 +148,15 @@ async def cevirkaldir(client: Client, message: Message):
 @Client.on_message(filters.command("tur") & filters.private & filters.user(OWNER_ID))
 async def tur_komutu(client: Client, message: Message):
     start_msg = await message.reply_text("🔄 Tür güncellemesi başlatıldı…")
-
-    genre_map = {
-        "Action": "Aksiyon", "Film-Noir": "Kara Film", "Game-Show": "Oyun Gösterisi", "Short": "Kısa",
-        "Sci-Fi": "Bilim Kurgu", "Sport": "Spor", "Adventure": "Macera", "Animation": "Animasyon",
-        "Biography": "Biyografi", "Comedy": "Komedi", "Crime": "Suç", "Documentary": "Belgesel",
-        "Drama": "Dram", "Family": "Aile", "News": "Haberler", "Fantasy": "Fantastik",
-        "History": "Tarih", "Horror": "Korku", "Music": "Müzik", "Musical": "Müzikal",
-        "Mystery": "Gizem", "Romance": "Romantik", "Science Fiction": "Bilim Kurgu",
-        "TV Movie": "TV Filmi", "Thriller": "Gerilim", "War": "Savaş", "Western": "Vahşi Batı",
-        "Action & Adventure": "Aksiyon ve Macera", "Kids": "Çocuklar", "Reality": "Gerçeklik",
-        "Reality-TV": "Gerçeklik", "Sci-Fi & Fantasy": "Bilim Kurgu ve Fantazi", "Soap": "Pembe Dizi",
-        "War & Politics": "Savaş ve Politika", "Bilim-Kurgu": "Bilim Kurgu",
-        "Aksiyon & Macera": "Aksiyon ve Macera", "Savaş & Politik": "Savaş ve Politika",
-        "Bilim Kurgu & Fantazi": "Bilim Kurgu ve Fantazi", "Talk": "Talk-Show"
-    }
-
-    collections = [(movie_col, "Filmler"), (series_col, "Diziler")]
     total_fixed = 0
 
-    for col, name in collections:
-        docs_cursor = col.find({}, {"_id": 1, "genres": 1})
-        bulk_ops = []
-
-        for doc in docs_cursor:
-            doc_id = doc["_id"]
-            genres = doc.get("genres", [])
-            new_genres = [genre_map.get(g, g) for g in genres]
-            if new_genres != genres:
-                bulk_ops.append(UpdateOne({"_id": doc_id}, {"$set": {"genres": new_genres}}))
-                total_fixed += 1
-
-        if bulk_ops:
-            col.bulk_write(bulk_ops)
+    for col in ("movie", "tv"):
+        async for db_index, docs in iter_batches(col, {"genres.0": {"$exists": True}}, {"_id": 1, "genres": 1}):
+            updates = genre_updates(docs)
+            ops = [UpdateOne({"_id": _id}, {"$set": {"genres": genres}}) for _id, genres in updates]
+            if ops:
+                await bulk_write_grouped(col, {db_index: ops})
+                total_fixed += len(ops)
 
     await start_msg.edit_text(f"✅ Tür güncellemesi tamamlandı.\nToplam değiştirilen kayıt: {total_fixed}")
 
@@ -378,49 +164,19 @@ async def tur_komutu(client: Client, message: Message):
 @Client.on_message(filters.command("platformekle") & filters.private & filters.user(OWNER_ID))
 async def platform_ekle(client: Client, message: Message):
     start_msg = await message.reply_text("🔄 Platform ekleme başlatıldı…")
-
-    platform_map = {
-        "MAX": "Max", "Hbomax": "Max", "TABİİ": "Tabii", "NF": "Netflix", "DSNP": "Disney",
-        "Tod": "Tod", "Blutv": "Max", "Tv+": "Tv+", "Exxen": "Exxen",
-        "Gain": "Gain", "HBO": "Max", "Tabii": "Tabii", "AMZN": "Amazon",
-    }
-
-    collections = [(movie_col, "Filmler"), (series_col, "Diziler")]
     total_fixed = 0
 
-    for col, name in collections:
-        docs_cursor = col.find({}, {"_id": 1, "telegram": 1, "seasons": 1})
-        bulk_ops = []
-
-        for doc in docs_cursor:
-            doc_id = doc["_id"]
-            platforms = doc.get("platform", [])
-            updated = False
-
-            # Telegram alanı üzerinden platform ekle
-            for t in doc.get("telegram", []):
-                name_field = t.get("name", "").lower()
-                for key, val in platform_map.items():
-                    if key.lower() in name_field and val not in platforms:
-                        platforms.append(val)
-                        updated = True
-
-            # Sezonlardaki telegram kontrolleri
-            for season in doc.get("seasons", []):
-                for ep in season.get("episodes", []):
-                    for t in ep.get("telegram", []):
-                        name_field = t.get("name", "").lower()
-                        for key, val in platform_map.items():
-                            if key.lower() in name_field and val not in platforms:
-                                platforms.append(val)
-                                updated = True
-
-            if updated:
-                bulk_ops.append(UpdateOne({"_id": doc_id}, {"$set": {"platform": platforms}}))
-                total_fixed += 1
-
-        if bulk_ops:
-            col.bulk_write(bulk_ops)
+    projection = {
+        "_id": 1, "platform": 1,
+        "telegram.name": 1, "seasons.episodes.telegram.name": 1
+    }
+    for col in ("movie", "tv"):
+        async for db_index, docs in iter_batches(col, None, projection):
+            updates = platform_updates(docs)
+            ops = [UpdateOne({"_id": _id}, {"$set": {"platform": platforms}}) for _id, platforms in updates]
+            if ops:
+                await bulk_write_grouped(col, {db_index: ops})
+                total_fixed += len(ops)
 
     await start_msg.edit_text(f"✅ Platform ekleme tamamlandı.\nToplam değiştirilen kayıt: {total_fixed}")
 
@@ -430,65 +186,25 @@ async def platform_sil(client: Client, message: Message):
     start_msg = await message.reply_text("🔄 Platform kayıtları siliniyor…")
     total_fixed = 0
 
-    collections = [movie_col, series_col]
-
-    for col in collections:
-        docs_cursor = col.find({"platform": {"$exists": True}}, {"_id": 1})
-        bulk_ops = []
-
-        for doc in docs_cursor:
-            doc_id = doc["_id"]
-            bulk_ops.append(UpdateOne({"_id": doc_id}, {"$unset": {"platform": ""}}))
-            total_fixed += 1
-
-        if bulk_ops:
-            col.bulk_write(bulk_ops)
+    for col in ("movie", "tv"):
+        total_fixed += await update_many_all(col, {"platform": {"$exists": True}}, {"$unset": {"platform": ""}})
 
     await start_msg.edit_text(f"✅ Platform kayıtları silindi.\nToplam değiştirilen kayıt: {total_fixed}")
 
 # ---------------- /ISTATISTIK ----------------
 @Client.on_message(filters.command("istatistik") & filters.private & filters.user(OWNER_ID))
 async def istatistik(client: Client, message: Message):
-    total_movies = movie_col.count_documents({})
-    total_series = series_col.count_documents({})
-
-    def count_links_qualities(collection, is_series=False):
-        link_set = set()
-        telegram_set = set()
-        quality_count = defaultdict(lambda: {"Link": 0, "Telegram": 0})
-
-        if is_series:
-            for doc in collection.find({}, {"seasons.episodes.telegram": 1}):
-                for season in doc.get("seasons", []):
-                    for ep in season.get("episodes", []):
-                        for t in ep.get("telegram", []):
-                            _id = t.get("id", "")
-                            q = t.get("quality", "Unknown")
-                            if _id.startswith("http://") or _id.startswith("https://"):
-                                if _id not in link_set:
-                                    link_set.add(_id)
-                                    quality_count[q]["Link"] += 1
-                            else:
-                                if _id not in telegram_set:
-                                    telegram_set.add(_id)
-                                    quality_count[q]["Telegram"] += 1
-        else:
-            for doc in collection.find({}, {"telegram": 1}):
-                for t in doc.get("telegram", []):
-                    _id = t.get("id", "")
-                    q = t.get("quality", "Unknown")
-                    if _id.startswith("http://") or _id.startswith("https://"):
-                        if _id not in link_set:
-                            link_set.add(_id)
-                            quality_count[q]["Link"] += 1
-                    else:
-                        if _id not in telegram_set:
-                            telegram_set.add(_id)
-                            quality_count[q]["Telegram"] += 1
-        return len(link_set), len(telegram_set), dict(quality_count)
-
-    movie_link, movie_tg, movie_quality_counts = count_links_qualities(movie_col)
-    series_link, series_tg, series_quality_counts = count_links_qualities(series_col, is_series=True)
+    refresh = len(message.command) > 1 and message.command[1].lower() == "yenile"
+    if refresh:
+        await message.reply_text("🔄 İstatistikler yeniden hesaplanıyor...")
+
+    # Anlık görüntü tracking.stats içinde tutulur, ekleme/silme ile güncellenir
+    stats = await db.stats.get(refresh=refresh)
+    movie_stats, series_stats = stats["movie"], stats["tv"]
+
+    total_movies, total_series = movie_stats["count"], series_stats["count"]
+    movie_link, movie_tg, movie_quality_counts = movie_stats["links"], movie_stats["telegram"], movie_stats["quality"]
+    series_link, series_tg, series_quality_counts = series_stats["links"], series_stats["telegram"], series_stats["quality"]
 
     def format_quality_stats(q_dict):
         order = ["2160p", "1920p", "1440p", "1080p", "720p", "576p", "480p"]
@@ -499,9 +215,10 @@ async def istatistik(client: Client, message: Message):
         return "\n".join(
             f"   ┠ {q} → Link: {c['Link']} | Telegram: {c['Telegram']}"
             for q, c in sorted_items
+            if c.get("Link") or c.get("Telegram")
         )
 
-    cpu = psutil.cpu_percent(interval=1)
+    cpu = psutil.cpu_percent(interval=None)
     ram = psutil.virtual_memory().percent
     disk = psutil.disk_usage("/")
     free_disk_gb = round(disk.free / (1024**3), 2)
@@ -521,21 +238,24 @@ async def istatistik(client: Client, message: Message):
         uptime_str = f"{minutes}d{seconds}s"
     # -----------------------------------------------------
 
-    stats = db.command("dbstats")
-    storage_mb = round(stats.get("storageSize", 0) / (1024 * 1024), 2)
-    storage_percent = round((storage_mb / 512) * 100, 1)
+    storage_count = len(db.storage_indexes()) or 1
+    storage_mb = round(await storage_size() / (1024 * 1024), 2)
+    storage_percent = round((storage_mb / (STORAGE_LIMIT_MB * storage_count)) * 100, 1)
 
     genre_stats = defaultdict(lambda: {"film": 0, "dizi": 0})
-    for d in movie_col.aggregate([{"$unwind": "$genres"}, {"$group": {"_id": "$genres", "count": {"$sum": 1}}}]):
-        genre_stats[d["_id"]]["film"] = d["count"]
-    for d in series_col.aggregate([{"$unwind": "$genres"}, {"$group": {"_id": "$genres", "count": {"$sum": 1}}}]):
-        genre_stats[d["_id"]]["dizi"] = d["count"]
+    for g, n in movie_stats["genres"].items():
+        genre_stats[g]["film"] = n
+    for g, n in series_stats["genres"].items():
+        genre_stats[g]["dizi"] = n
 
     genre_text = "\n".join(
         f"{g:<14} | Film: {c['film']:<4} | Dizi: {c['dizi']:<4}"
         for g, c in sorted(genre_stats.items())
+        if c['film'] or c['dizi']
     )
 
+    lag = loop_monitor.snapshot()
+
     text = (
         f"⌬ <b>İstatistik</b>\n\n"
         f"┠ Filmler : {total_movies}\n"
@@ -549,145 +269,45 @@ async def istatistik(client: Client, message: Message):
         f"┖ Depolama: {storage_mb} MB (%{storage_percent})\n\n"
         f"<b>Tür Dağılımı</b>\n<pre>{genre_text}</pre>\n\n"
         f"┟ CPU → {cpu}% | Boş → {free_disk_gb}GB [{free_percent}%]\n"
-        f"┖ RAM → {ram}% | Süre → {uptime_str}"
+        f"┠ RAM → {ram}% | Süre → {uptime_str}\n"
+        f"┠ Döngü gecikmesi → {lag['last_ms']} ms (ort. {lag['avg_ms']} | maks. {lag['max_ms']})\n"
+        f"┖ Güncelleme → {stats['updated_at'].strftime('%d.%m.%Y %H:%M')} UTC"
     )
 
     await message.reply_text(text, parse_mode=enums.ParseMode.HTML)
 
-# ---------------- CALLBACK QUERY ----------------
-@Client.on_callback_query()
-async def _cb(client: Client, query: CallbackQuery):
-    if query.data=="stop":
-        await handle_stop(query)
 # ---------- benzerleri sil ----------
-@Client.on_message(filters.command("aynivideolarisil") & filters.private & filters.user(OWNER_ID))
-async def benzerleri_sil(client: Client, message: Message):
-    status = await message.reply_text("🔍 Arşiv taranıyor...")
+def format_duplicate(removed, kept):
+    konum = ""
+    if removed["collection"] == "tv":
+        konum = f"Sezon: {removed.get('season_number')} | Bölüm: {removed.get('episode_number')}\n"
+    return (
+        f"[Koleksiyon] {removed['collection']} | storage_{removed['db_index']}\n"
+        f"ID: {removed.get('tmdb_id') or removed.get('imdb_id')}\n"
+        f"Başlık: {removed.get('title')}\n"
+        f"{konum}"
+        f"Name: {removed.get('name')}\n"
+        f"Size: {removed.get('size')}\n"
+        f"id: {removed.get('id')}\n"
+        f"Korunan: {kept.get('title')} | storage_{kept['db_index']} | {kept.get('name')}\n"
+        f"{'-'*50}"
+    )
 
-    total_docs = 0
-    total_removed = 0
-    log_lines = []
-
-    collections = [
-        (movie_col, "movie"),
-        (series_col, "tv")
-    ]
-
-    for col, col_name in collections:
-        cursor = col.find({}, {"telegram": 1, "seasons": 1, "title": 1, "tmdb_id": 1, "imdb_id": 1})
-
-        for doc in cursor:
-            doc_updated = False
-
-            # ---------- FILM ----------
-            if col_name == "movie" and "telegram" in doc:
-                telegram = doc.get("telegram", [])
-                grouped = {}
-
-                for idx, t in enumerate(telegram):
-                    key = (t.get("name"), t.get("size"))
-                    if key not in grouped:
-                        grouped[key] = []
-                    grouped[key].append((idx, t))
-
-                new_telegram = []
-
-                for (name, size), items in grouped.items():
-                    non_http_items = []
-                    for i, t in items:
-                        tid = str(t.get("id", "")).lower()
-                        if not (tid.startswith("http://") or tid.startswith("https://")):
-                            non_http_items.append((i, t))
-
-                    if non_http_items:
-                        keep_i, keep_t = max(non_http_items, key=lambda x: x[0])
-                    else:
-                        keep_i, keep_t = max(items, key=lambda x: x[0])
-
-                    new_telegram.append(keep_t)
-
-                    for i, t in items:
-                        if t is not keep_t:
-                            total_removed += 1
-                            doc_updated = True
-                            log_lines.append(
-                                f"[Koleksiyon] movie\n"
-                                f"ID: {doc.get('tmdb_id')}\n"
-                                f"Başlık: {doc.get('title')}\n"
-                                f"Name: {t.get('name')}\n"
-                                f"Size: {t.get('size')}\n"
-                                f"id: {t.get('id')}\n"
-                                f"{'-'*50}"
-                            )
-
-                if doc_updated:
-                    col.update_one(
-                        {"_id": doc["_id"]},
-                        {"$set": {"telegram": new_telegram}}
-                    )
-                    total_docs += 1
-
-            # ---------- DİZİ / BÖLÜM ----------
-            if col_name == "tv":
-                seasons = doc.get("seasons", [])
-
-                for season in seasons:
-                    season_no = season.get("season_number")
-                    episodes = season.get("episodes", [])
-
-                    for ep in episodes:
-                        if "telegram" not in ep:
-                            continue
-
-                        telegram = ep.get("telegram", [])
-                        grouped = {}
-
-                        for idx, t in enumerate(telegram):
-                            key = (t.get("name"), t.get("size"))
-                            if key not in grouped:
-                                grouped[key] = []
-                            grouped[key].append((idx, t))
-
-                        new_telegram = []
-
-                        for (name, size), items in grouped.items():
-                            non_http_items = []
-                            for i, t in items:
-                                tid = str(t.get("id", "")).lower()
-                                if not (tid.startswith("http://") or tid.startswith("https://")):
-                                    non_http_items.append((i, t))
-
-                            if non_http_items:
-                                keep_i, keep_t = max(non_http_items, key=lambda x: x[0])
-                            else:
-                                keep_i, keep_t = max(items, key=lambda x: x[0])
-
-                            new_telegram.append(keep_t)
-
-                            for i, t in items:
-                                if t is not keep_t:
-                                    total_removed += 1
-                                    doc_updated = True
-                                    log_lines.append(
-                                        f"[Koleksiyon] tv\n"
-                                        f"ID: {doc.get('imdb_id')}\n"
-                                        f"Dizi: {doc.get('title')}\n"
-                                        f"Sezon: {season_no} | Bölüm: {ep.get('episode_number')}\n"
-                                        f"Name: {t.get('name')}\n"
-                                        f"Size: {t.get('size')}\n"
-                                        f"id: {t.get('id')}\n"
-                                        f"{'-'*50}"
-                                    )
-
-                        if doc_updated:
-                            ep["telegram"] = new_telegram
-
-                if doc_updated:
-                    col.update_one(
-                        {"_id": doc["_id"]},
-                        {"$set": {"seasons": seasons}}
-                    )
-                    total_docs += 1
+@job_manager.register("aynivideolarisil", "Aynı video temizliği")
+async def duplicate_job(ctx: JobContext):
+    test_mode = ctx.params.get("test", False)
+
+    # Tüm storage veritabanlarındaki kayıtlar file_unique_id / link / isim+boyut ile eşleştirilir
+    pairs = await find_library_duplicates(ctx.client, ctx)
+    log_lines = [format_duplicate(removed, kept) for removed, kept in pairs]
+    ctx.raise_if_cancelled()
+
+    total_docs = total_deleted = 0
+    if pairs and not test_mode:
+        await ctx.report(f"🗑️ {len(pairs)} video siliniyor...", done=0, total=len(pairs), force=True)
+        await ctx.pause_if_busy()
+        total_docs, total_deleted = await apply_removals(pairs)
+        ctx.progress["done"] = len(pairs)
 
     # ---------- LOG DOSYASI ----------
     if log_lines:
@@ -695,19 +315,35 @@ async def benzerleri_sil(client: Client, message: Message):
         with open(log_path, "w", encoding="utf-8") as f:
             f.write("\n".join(log_lines))
 
-        await client.send_document(
-            chat_id=OWNER_ID,
+        await ctx.client.send_document(
+            chat_id=ctx.chat_id,
             document=log_path,
-            caption="🗑️ Silinen videolar"
+            caption="📝 Silinecek videolar (test)" if test_mode else "🗑️ Silinen videolar"
         )
 
-    await status.edit_text(
+    if test_mode:
+        await ctx.finish(f"📝 Test tamamlandı\n\n🗑️ Silinecek videolar: {len(pairs)}")
+        return
+
+    await ctx.finish(
         f"✅ İşlem tamamlandı\n\n"
         f"📄 Etkilenen kayıt: {total_docs}\n"
-        f"🗑️ Silinen videolar: {total_removed}"
+        f"🗑️ Silinen videolar: {len(pairs)}\n"
+        f"📭 Boşalıp silinen kayıt: {total_deleted}"
     )
 
 
+# Kullanım: /aynivideolarisil [test]
+@Client.on_message(filters.command("aynivideolarisil") & filters.private & filters.user(OWNER_ID))
+async def benzerleri_sil(client: Client, message: Message):
+    test_mode = len(message.command) > 1 and message.command[1].lower() == "test"
+    job = await job_manager.start(
+        client, "aynivideolarisil", message.chat.id, "🔍 Arşiv taranıyor...", params={"test": test_mode}
+    )
+    if not job:
+        await message.reply_text("⛔ Zaten devam eden bir işlem var.")
+
+
 # ---------- linkleri sil ----------
 @Client.on_message(filters.command("linklerisil") & filters.private & filters.user(OWNER_ID))
 async def linklerisil(client: Client, message: Message):
@@ -715,49 +351,22 @@ async def linklerisil(client: Client, message: Message):
     total_removed = 0
     total_docs = 0
 
-    def is_valid_id(tid):
-        return not (str(tid).startswith("http://") or str(tid).startswith("https://"))
-
-    # ---------- FILMLER ----------
-    for doc in movie_col.find({}, {"_id": 1, "telegram": 1, "title": 1, "tmdb_id":1}):
-        telegram = doc.get("telegram", [])
-        new_telegram = [t for t in telegram if is_valid_id(t.get("id", ""))]
-        removed_count = len(telegram) - len(new_telegram)
-        if removed_count > 0:
-            total_removed += removed_count
-            if new_telegram:
-                movie_col.update_one({"_id": doc["_id"]}, {"$set": {"telegram": new_telegram}})
-            else:
-                movie_col.delete_one({"_id": doc["_id"]})
-            total_docs += 1
-
-    # ---------- DİZİLER ----------
-    for doc in series_col.find({}, {"_id": 1, "seasons": 1, "title":1, "imdb_id":1}):
-        seasons = doc.get("seasons", [])
-        doc_updated = False
-        for season in seasons:
-            episodes = season.get("episodes", [])
-            new_episodes = []
-            for ep in episodes:
-                telegram = ep.get("telegram", [])
-                new_telegram = [t for t in telegram if is_valid_id(t.get("id", ""))]
-                removed_count = len(telegram) - len(new_telegram)
-                if removed_count > 0:
-                    total_removed += removed_count
-                if new_telegram:
-                    ep["telegram"] = new_telegram
-                    new_episodes.append(ep)
-                else:
-                    doc_updated = True  # bölüm silindi
-            season["episodes"] = new_episodes
-        # Sezonlar güncellendikten sonra hiçbir bölüm kalmamışsa dizi silinecek
-        remaining_eps = sum(len(s.get("episodes", [])) for s in seasons)
-        if remaining_eps > 0:
-            series_col.update_one({"_id": doc["_id"]}, {"$set": {"seasons": seasons}})
-            if doc_updated:
-                total_docs += 1
-        else:
-            series_col.delete_one({"_id": doc["_id"]})
-            total_docs += 1
+    projections = {
+        "movie": {"_id": 1, "telegram": 1},
+        "tv": {"_id": 1, "seasons": 1},
+    }
+
+    for col_name, projection in projections.items():
+        async for db_index, docs in iter_batches(col_name, None, projection):
+            updates, deletes, removed = strip_link_updates(docs, col_name)
+            ops = [UpdateOne({"_id": _id}, {"$set": {field: value}}) for _id, field, value in updates]
+            ops.extend(DeleteOne({"_id": _id}) for _id in deletes)
+            if ops:
+                await bulk_write_grouped(col_name, {db_index: ops})
+            total_docs += len(ops)
+            total_removed += removed
+
+    if total_docs:
+        await db.stats.mark_stale()
 
     await status.edit_text(f"✅ İşlem tamamlandı\n\n📄 Etkilenen kayıt: {total_docs}\n🗑️ Silinen tekrar: {total_removed}")
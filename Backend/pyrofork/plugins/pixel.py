@@ -1,6 +1,4 @@
-import os
-import base64
-import requests
+import io
 import asyncio
 from time import time
 
@@ -8,15 +6,13 @@ from pyrogram import Client, filters
 from pyrogram.types import Message
 from pyrogram.errors import FloodWait
 
-from dotenv import load_dotenv
 from Backend.helper.custom_filter import CustomFilters
+from Backend.helper.jobs import JobContext, job_manager
+from Backend.helper.pixeldrain import pixeldrain, sync_pixeldrain
+from Backend.logger import LOGGER
 
 # ===================== CONFIG =====================
 
-load_dotenv()
-
-PIXELDRAIN_API_KEY = os.getenv("PIXELDRAIN")
-API_BASE = "https://pixeldrain.com/api"
 UPDATE_INTERVAL = 15
 
 # ===================== SAFE TELEGRAM =====================
@@ -37,13 +33,6 @@ async def safe_edit(message: Message, text: str):
 
 # ===================== UTIL =====================
 
-def get_headers():
-    auth = base64.b64encode(f":{PIXELDRAIN_API_KEY}".encode()).decode()
-    return {
-        "Authorization": f"Basic {auth}",
-        "User-Agent": "PyrogramBot"
-    }
-
 def human_size(size):
     for unit in ["B", "KB", "MB", "GB", "TB"]:
         if size < 1024:
@@ -84,40 +73,10 @@ def format_file_list(files):
         for i, f in enumerate(files)
     )
 
-# ===================== PIXELDRAIN API =====================
-
-def fetch_all_files_safe(max_pages=100):
-    page = 1
-    files = {}
-
-    while page <= max_pages:
-        r = requests.get(
-            f"{API_BASE}/user/files?page={page}",
-            headers=get_headers(),
-            timeout=15
-        )
-        if r.status_code != 200:
-            break
-
-        data = r.json().get("files", [])
-        if not data:
-            break
-
-        for f in data:
-            if f.get("id"):
-                files[f["id"]] = f
-
-        page += 1
-
-    return list(files.values())
-
 # ===================== /PIXELDRAINSIL =====================
 
-@Client.on_message(filters.command("pixeldrainsil") & filters.private & CustomFilters.owner)
-async def pixeldrain_delete_all(client: Client, message: Message):
-    status = await safe_reply(message, "🗑️ PixelDrain silme başlatılıyor...")
-
-    stop_event = asyncio.Event()
+@job_manager.register("pixeldrainsil", "PixelDrain silme")
+async def pixeldrain_delete_job(ctx: JobContext):
     start_time = time()
 
     deleted = 0
@@ -126,7 +85,7 @@ async def pixeldrain_delete_all(client: Client, message: Message):
 
     def progress_text():
         elapsed = int(time() - start_time)
-        eta = int((total - deleted) / (deleted / elapsed)) if deleted > 0 else -1
+        eta = int((total - deleted) / (deleted / elapsed)) if deleted > 0 and elapsed > 0 else -1
         return (
             "🔄 **PixelDrain Silme Durumu**\n\n"
             f"⏱️ Geçen Süre  : {format_duration(elapsed)}\n"
@@ -135,41 +94,35 @@ async def pixeldrain_delete_all(client: Client, message: Message):
             f"⏳ Kalan Süre  : {format_duration(eta)}"
         )
 
-    updater = asyncio.create_task(
-        auto_update_status(status, progress_text, stop_event)
-    )
-
     try:
-        files = await asyncio.to_thread(fetch_all_files_safe)
+        files = await pixeldrain.list_files()
         total = len(files)
 
         if total == 0:
-            stop_event.set()
-            updater.cancel()
-            await safe_edit(status, "ℹ️ Silinecek dosya yok.")
+            await ctx.finish("ℹ️ Silinecek dosya yok.")
             return
 
-        for f in files:
-            await asyncio.to_thread(
-                requests.delete,
-                f"{API_BASE}/file/{f['id']}",
-                headers=get_headers(),
-                timeout=10
-            )
-            deleted += 1
-            deleted_files.append({
-                "name": f.get("name", "isimsiz"),
-                "size": f.get("size", 0)
-            })
-            await asyncio.sleep(0.3)
+        await ctx.report(progress_text(), done=0, total=total, force=True)
+
+        async def delete(f):
+            nonlocal deleted
+            # eşzamanlılık istemci havuzuyla, hız işler arası ortak bütçeyle sınırlanır
+            async with ctx.slot():
+                ok = await pixeldrain.delete_file(f["id"])
+            if ok:
+                deleted += 1
+                deleted_files.append({
+                    "name": f.get("name", "isimsiz"),
+                    "size": f.get("size", 0)
+                })
+            await ctx.report(progress_text(), done=deleted)
+
+        await asyncio.gather(*(delete(f) for f in files))
 
-        stop_event.set()
-        updater.cancel()
         elapsed = int(time() - start_time)
 
         if len(deleted_files) <= 10:
-            await safe_edit(
-                status,
+            await ctx.finish(
                 "🧹 **PixelDrain Silme Özeti**\n\n"
                 f"📁 Silinen Dosya : {deleted}\n"
                 f"⏱️ Geçen Süre   : {format_duration(elapsed)}\n\n"
@@ -177,27 +130,30 @@ async def pixeldrain_delete_all(client: Client, message: Message):
                 format_file_list(deleted_files)
             )
         else:
-            path = "silinen_dosyalar.txt"
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(format_file_list(deleted_files))
+            document = io.BytesIO(format_file_list(deleted_files).encode("utf-8"))
+            document.name = "silinen_dosyalar.txt"
 
-            await client.send_document(
-                message.chat.id,
-                path,
+            await ctx.client.send_document(
+                ctx.chat_id,
+                document,
                 caption=(
                     "🧹 **PixelDrain Silme Özeti**\n\n"
                     f"📁 Silinen Dosya : {deleted}\n"
                     f"⏱️ Geçen Süre   : {format_duration(elapsed)}"
                 )
             )
-            await status.delete()
-            os.remove(path)
+            await ctx.finish(f"🧹 PixelDrain silme tamamlandı: {deleted} dosya.")
 
     except Exception as e:
-        stop_event.set()
-        updater.cancel()
-        await safe_edit(status, "❌ Silme sırasında hata oluştu.")
-        print("PixelDrain delete error:", e)
+        # iş yöneticisi işi "failed" olarak kaydeder ve hatayı bildirir
+        raise RuntimeError(f"{deleted} / {total} silindi: {e}") from e
+
+
+@Client.on_message(filters.command("pixeldrainsil") & filters.private & CustomFilters.owner)
+async def pixeldrain_delete_all(client: Client, message: Message):
+    job = await job_manager.start(client, "pixeldrainsil", message.chat.id, "🗑️ PixelDrain silme başlatılıyor...")
+    if not job:
+        await safe_reply(message, "⛔ Zaten devam eden bir silme işlemi var.")
 
 # ===================== /PIXELDRAIN =====================
 
@@ -217,7 +173,7 @@ async def pixeldrain_list(client: Client, message: Message):
     )
 
     try:
-        files = await asyncio.to_thread(fetch_all_files_safe)
+        files = await pixeldrain.list_files()
         elapsed = int(time() - start_time)
 
         file_data = [
@@ -240,13 +196,12 @@ async def pixeldrain_list(client: Client, message: Message):
                 format_file_list(file_data)
             )
         else:
-            path = "dosyalar.txt"
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(format_file_list(file_data))
+            document = io.BytesIO(format_file_list(file_data).encode("utf-8"))
+            document.name = "dosyalar.txt"
 
             await client.send_document(
                 message.chat.id,
-                path,
+                document,
                 caption=(
                     "📊 **PixelDrain Özeti**\n\n"
                     f"📁 Dosya Sayısı : {len(file_data)}\n"
@@ -255,10 +210,61 @@ async def pixeldrain_list(client: Client, message: Message):
                 )
             )
             await status.delete()
-            os.remove(path)
 
     except Exception as e:
         stop_event.set()
         updater.cancel()
         await safe_edit(status, "❌ Listeleme sırasında hata oluştu.")
-        print("PixelDrain list error:", e)
+        LOGGER.error(f"PixelDrain list error: {e}")
+
+# ===================== /PIXELDRAINSYNC =====================
+# Kullanım: /pixeldrainsync [sil]
+# PixelDrain dosyalarını veritabanındaki linklerle karşılaştırır;
+# "sil" verilirse hiçbir kayıtta kullanılmayan dosyalar silinir.
+
+@job_manager.register("pixeldrainsync", "PixelDrain eşitleme")
+async def pixeldrain_sync_job(ctx: JobContext):
+    start_time = time()
+    report = await sync_pixeldrain()
+    ctx.raise_if_cancelled()
+
+    removed = []
+    if ctx.params.get("delete") and report.orphans:
+        await ctx.report(f"🗑️ {len(report.orphans)} sahipsiz dosya siliniyor...", total=len(report.orphans), force=True)
+        removed, _ = await pixeldrain.delete_many(
+            (f["id"] for f in report.orphans),
+            on_progress=lambda done, _: ctx.progress.update(done=done),
+            token=ctx
+        )
+
+    summary = (
+        "🔄 **PixelDrain Eşitleme Özeti**\n\n"
+        f"📁 Toplam Dosya     : {report.total}\n"
+        f"🆕 Yeni Dosya       : {report.new}\n"
+        f"📤 Kaybolan Dosya   : {report.gone}\n"
+        f"🧩 Sahipsiz Dosya   : {len(report.orphans)}\n"
+        f"🔗 Kırık Link       : {len(report.missing)}\n"
+        + (f"🗑️ Silinen Dosya    : {len(removed)}\n" if ctx.params.get("delete") else "")
+        + f"⏱️ Geçen Süre      : {format_duration(int(time() - start_time))}"
+    )
+
+    lines = [f"[Sahipsiz] {f.get('name', 'isimsiz')} ({human_size(f.get('size', 0))}) | {f['id']}" for f in report.orphans]
+    lines += [f"[Kırık] {m.get('title')} | {m.get('name')} | {m['id']}" for m in report.missing]
+    if not lines:
+        await ctx.finish(summary)
+        return
+
+    document = io.BytesIO("\n".join(lines).encode("utf-8"))
+    document.name = "pixeldrain_esitleme.txt"
+    await ctx.client.send_document(ctx.chat_id, document, caption=summary)
+    await ctx.finish(summary)
+
+
+@Client.on_message(filters.command("pixeldrainsync") & filters.private & CustomFilters.owner)
+async def pixeldrain_sync(client: Client, message: Message):
+    delete = len(message.command) > 1 and message.command[1].lower() == "sil"
+    job = await job_manager.start(
+        client, "pixeldrainsync", message.chat.id, "🔄 PixelDrain eşitleniyor...", params={"delete": delete}
+    )
+    if not job:
+        await safe_reply(message, "⛔ Zaten devam eden bir eşitleme var.")
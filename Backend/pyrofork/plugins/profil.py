@@ -0,0 +1,50 @@
+import io
+from pyrogram import Client, filters
+from pyrogram.types import Message
+from Backend.helper.custom_filter import CustomFilters
+from Backend.helper.loop_monitor import format_stalls, loop_monitor, profile_loop
+
+MAX_SECONDS = 300
+
+# ---------------- /profile KOMUTU ----------------
+# /profile        → döngü gecikmesi ve son takılmaların yığınları
+# /profile 30     → 30 sn cProfile örneklemesi (.txt özet + .prof ham veri)
+@Client.on_message(filters.command("profile") & filters.private & CustomFilters.owner)
+async def profile_command(client: Client, message: Message):
+    args = message.command[1:]
+
+    if not args:
+        lag = loop_monitor.snapshot()
+        lines = [
+            "⌬ Olay Döngüsü",
+            f"┠ Gecikme → {lag['last_ms']} ms (ort. {lag['avg_ms']} | maks. {lag['max_ms']})",
+            f"┖ Takılma → {lag['stalls']}",
+        ]
+        if lag["offenders"]:
+            lines.append("\n⌬ En çok takılan yerler")
+            lines += [f"• {count}× {where}" for where, count in lag["offenders"]]
+        await message.reply_text("\n".join(lines))
+
+        if loop_monitor.stalls:
+            report = io.BytesIO(format_stalls(list(loop_monitor.stalls)).encode())
+            report.name = "takilmalar.txt"
+            await message.reply_document(report, caption="🧵 Son takılmaların yığın izleri")
+        return
+
+    if not args[0].isdigit():
+        await message.reply_text("Kullanım: /profile [saniye]")
+        return
+
+    seconds = min(max(int(args[0]), 1), MAX_SECONDS)
+    status = await message.reply_text(f"⏳ {seconds} sn boyunca profil çıkarılıyor...")
+
+    text, raw = await profile_loop(seconds)
+
+    summary = io.BytesIO(text.encode())
+    summary.name = "profil.txt"
+    await message.reply_document(summary, caption=f"📊 {seconds} sn cProfile özeti")
+
+    stats = io.BytesIO(raw)
+    stats.name = "profil.prof"
+    await message.reply_document(stats, caption="snakeviz / pstats ile açılabilir")
+    await status.delete()
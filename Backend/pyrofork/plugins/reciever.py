@@ -6,6 +6,8 @@ from Backend import db
 from Backend.config import Telegram
 from Backend.helper.pyro import clean_filename, get_readable_file_size, remove_urls
 from Backend.helper.metadata import metadata
+from Backend.helper.file_index import file_index
+from Backend.helper.metrics import INGEST_QUEUE, INGEST_SECONDS
 from pyrogram import filters, Client
 from pyrogram.types import Message
 from pyrogram.errors import FloodWait
@@ -14,14 +16,18 @@ from pyrogram.enums.parse_mode import ParseMode
 
 file_queue = Queue()
 db_lock = Lock()
+INGEST_QUEUE.set_function(file_queue.qsize)
 
 async def process_file():
     while True:
         metadata_info, channel, msg_id, size, title = await file_queue.get()
         async with db_lock:
-            updated_id = await db.insert_media(metadata_info, channel=channel, msg_id=msg_id, size=size, name=title)
+            with INGEST_SECONDS.time():
+                updated_id = await db.insert_media(metadata_info, channel=channel, msg_id=msg_id, size=size, name=title)
             if updated_id:
                 LOGGER.info(f"{metadata_info['media_type']} updated with ID: {updated_id}")
+                if Telegram.FILE_INDEX and Telegram.FILE_INDEX_AT_INGEST:
+                    create_task(file_index.index_message(int(f"-100{channel}"), msg_id))
             else:
                 LOGGER.info("Update failed due to validation errors.")
         file_queue.task_done()
@@ -1,33 +1,16 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message
 from Backend.helper.custom_filter import CustomFilters
-from pymongo import MongoClient
+from Backend.helper.backup import EXPORT_FORMATS, export_database, import_database
+from Backend.logger import LOGGER
 import os
-import json
 from time import time
 
 flood_wait = 30  # saniye
 last_command_time = {}  # kullanıcı_id : zaman
 
-# ---------------- SADECE ENV'DEN DATABASE AL ----------------
-DATABASE_URLS = os.getenv("DATABASE", "")
-db_urls = [u.strip() for u in DATABASE_URLS.split(",") if u.strip()]
-
-# ---------------- Koleksiyonları JSON'a Çekme ----------------
-def export_collections_to_json(url):
-    client = MongoClient(url)
-    db_name_list = client.list_database_names()
-    if not db_name_list:
-        return None
-
-    db = client[db_name_list[0]]
-
-    movie_data = list(db["movie"].find({}, {"_id": 0}))
-    tv_data = list(db["tv"].find({}, {"_id": 0}))
-
-    return {"movie": movie_data, "tv": tv_data}
-
 # ---------------- /vindir Komutu ----------------
+# Kullanım: /vindir [ndjson|gz|zst]
 @Client.on_message(filters.command("vindir") & filters.private & CustomFilters.owner)
 async def download_collections(client: Client, message: Message):
     user_id = message.from_user.id
@@ -39,27 +22,55 @@ async def download_collections(client: Client, message: Message):
         return
     last_command_time[user_id] = now
 
-    try:
-        if not db_urls or len(db_urls) < 2:
-            await message.reply_text("⚠️ İkinci veritabanı bulunamadı.")
-            return
-
-        combined_data = export_collections_to_json(db_urls[1])
-        if combined_data is None:
-            await message.reply_text("⚠️ Koleksiyonlar boş veya bulunamadı.")
-            return
+    fmt = message.command[1].lower() if len(message.command) > 1 else "ndjson"
+    if fmt not in EXPORT_FORMATS:
+        await message.reply_text(f"⚠️ Geçersiz format. Kullanım: /vindir [{'|'.join(EXPORT_FORMATS)}]")
+        return
 
-        file_path = "/tmp/dizi_ve_film_veritabanı.json"
+    file_path = f"/tmp/dizi_ve_film_veritabanı{EXPORT_FORMATS[fmt]}"
+    status = await message.reply_text("💾 Veritabanı dışa aktarılıyor...")
 
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(combined_data, f, ensure_ascii=False, indent=2, default=str)
+    try:
+        counts = await export_database(file_path, fmt)
+        if not any(counts.values()):
+            await status.edit_text("⚠️ Koleksiyonlar boş veya bulunamadı.")
+            return
 
         await client.send_document(
             chat_id=message.chat.id,
             document=file_path,
-            caption="📁 Film ve Dizi Koleksiyonları"
+            caption=f"📁 Film ve Dizi Koleksiyonları\n🎬 Film: {counts['movie']}\n📺 Dizi: {counts['tv']}"
         )
+        await status.delete()
 
     except Exception as e:
-        await message.reply_text(f"⚠️ Hata: {e}")
-        print("vindir hata:", e)
+        await status.edit_text(f"⚠️ Hata: {e}")
+        LOGGER.error(f"vindir hata: {e}")
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+# ---------------- /vyukle Komutu ----------------
+# /vindir ile alınan dosyaya yanıt olarak gönderilir.
+@Client.on_message(filters.command("vyukle") & filters.private & CustomFilters.owner)
+async def upload_collections(client: Client, message: Message):
+    reply = message.reply_to_message
+    if not reply or not reply.document:
+        await message.reply_text("⚠️ Geri yüklemek için /vindir dosyasına yanıt olarak /vyukle yazın.")
+        return
+
+    status = await message.reply_text("📥 Veritabanı geri yükleniyor...")
+    file_path = None
+
+    try:
+        file_path = await reply.download(file_name=f"/tmp/vyukle_{int(time())}")
+        counts = await import_database(file_path)
+        await status.edit_text(
+            f"✅ Geri yükleme tamamlandı\n🎬 Film: {counts['movie']}\n📺 Dizi: {counts['tv']}"
+        )
+    except Exception as e:
+        await status.edit_text(f"⚠️ Hata: {e}")
+        LOGGER.error(f"vyukle hata: {e}")
+    finally:
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
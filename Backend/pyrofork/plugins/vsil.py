@@ -1,14 +1,11 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message
 from Backend.helper.custom_filter import CustomFilters
-from pymongo import MongoClient
-import os, re
+from Backend import db
+import asyncio
+import re
 from time import time
 
-# ---------------- SADECE ENV'DEN DATABASE AL ----------------
-DATABASE_URLS = os.getenv("DATABASE", "")
-db_urls = [u.strip() for u in DATABASE_URLS.split(",") if u.strip()]
-
 
 # ------------------------------------------------------------------
 #  UNIVERSAL ID PARSE
@@ -41,145 +38,170 @@ def extract_id(raw):
 #  DELETE ENGINE
 # ------------------------------------------------------------------
 
-def process_delete(db, id_type, val, imdb_fallback=None, test=False,
-                   category="all", season=None, episodes=None):
-
-    deleted = []
-
-    def allow(cat):
-        return category == "all" or category == cat
-
-    # --------------- TMDB ----------------
-    if id_type == "tmdb":
-        tmdb_id = int(val)
-        movie_docs = list(db["movie"].find({"tmdb_id": tmdb_id})) if allow("movie") else []
-        tv_docs = list(db["tv"].find({"tmdb_id": tmdb_id})) if allow("tv") else []
-
-        if not movie_docs and not tv_docs and imdb_fallback:
-            return process_delete(db, "imdb", imdb_fallback, None,
-                                  test, category, season, episodes)
-
-        # MOVIE
-        for doc in movie_docs:
-            for t in doc.get("telegram", []):
-                deleted.append(t.get("name"))
-            if not test:
-                db["movie"].delete_one({"_id": doc["_id"]})
-
-        # TV
-        for doc in tv_docs:
-            if season:
-                for s in doc.get("seasons", []):
-                    if s.get("season_number") == season:
-                        remove_eps = []
-                        for ep in s.get("episodes", []):
-                            if episodes:
-                                if ep.get("episode_number") in episodes:
-                                    for t in ep.get("telegram", []):
-                                        deleted.append(t.get("name"))
-                                    if not test:
-                                        s["episodes"].remove(ep)
-                            else:
-                                for t in ep.get("telegram", []):
-                                    deleted.append(t.get("name"))
-                                if not test:
-                                    remove_eps.append(ep)
-
-                        for ep in remove_eps:
-                            s["episodes"].remove(ep)
-
-                if not test:
-                    doc_seasons = [s for s in doc.get("seasons", []) if s.get("episodes")]
-                    if not doc_seasons:
-                        db["tv"].delete_one({"_id": doc["_id"]})
-                    else:
-                        doc["seasons"] = doc_seasons
-                        db["tv"].replace_one({"_id": doc["_id"]}, doc)
-
-            else:
-                for s in doc.get("seasons", []):
-                    for e in s.get("episodes", []):
-                        for t in e.get("telegram", []):
-                            deleted.append(t.get("name"))
-                if not test:
-                    db["tv"].delete_one({"_id": doc["_id"]})
-
-        return deleted
-
-    # --------------- IMDb ----------------
-    if id_type == "imdb":
-        imdb_id = val
-
-        movie_docs = list(db["movie"].find({"imdb_id": imdb_id})) if allow("movie") else []
-        tv_docs = list(db["tv"].find({"imdb_id": imdb_id})) if allow("tv") else []
-
-        for doc in movie_docs:
-            for t in doc.get("telegram", []):
-                deleted.append(t.get("name"))
-            if not test:
-                db["movie"].delete_one({"_id": doc["_id"]})
-
-        for doc in tv_docs:
-            for s in doc.get("seasons", []):
-                for e in s.get("episodes", []):
-                    for t in e.get("telegram", []):
-                        deleted.append(t.get("name"))
-            if not test:
-                db["tv"].delete_one({"_id": doc["_id"]})
-
-        return deleted
-
-    # --------------- TELEGRAM / FILENAME ----------------
-    target = val
-
-    if allow("movie"):
-        for doc in list(db["movie"].find({})):
-            old = doc.get("telegram", [])
-            new = [t for t in old if t.get("id") != target and t.get("name") != target]
-            removed = [t.get("name") for t in old if t not in new]
-            deleted.extend(removed)
-            if removed and not test:
-                if not new:
-                    db["movie"].delete_one({"_id": doc["_id"]})
-                else:
-                    doc["telegram"] = new
-                    db["movie"].replace_one({"_id": doc["_id"]}, doc)
-
-    if allow("tv"):
-        for doc in list(db["tv"].find({})):
-            changed = False
-            remove_seasons = []
-
-            for s in doc.get("seasons", []):
-                if season and s.get("season_number") != season:
+def _names(entries):
+    return [t.get("name") for t in entries or []]
+
+
+def _episode_selected(ep, episodes):
+    return not episodes or ep.get("episode_number") in episodes
+
+
+async def _cleanup_tv(col, ids):
+    # Boşalan bölümler, sezonlar ve dizi kayıtları temizlenir
+    scope = {"_id": {"$in": ids}}
+    await col.update_many(scope, {"$pull": {"seasons.$[].episodes": {"telegram": {"$size": 0}}}})
+    await col.update_many(scope, {"$pull": {"seasons": {"episodes": {"$size": 0}}}})
+    await col.delete_many({**scope, "seasons": {"$size": 0}})
+
+
+async def _delete_movie_by_id(storage, query, test):
+    col = storage["movie"]
+    deleted, found = [], 0
+    async for doc in col.find(query, {"telegram.name": 1}):
+        found += 1
+        deleted.extend(_names(doc.get("telegram")))
+    if found and not test:
+        await col.delete_many(query)
+    return found, deleted
+
+
+async def _delete_tv_by_id(storage, query, test, season, episodes):
+    col = storage["tv"]
+    deleted, ids = [], []
+    projection = {"seasons.season_number": 1, "seasons.episodes.episode_number": 1,
+                  "seasons.episodes.telegram.name": 1}
+
+    async for doc in col.find(query, projection):
+        ids.append(doc["_id"])
+        for s in doc.get("seasons", []):
+            if season and s.get("season_number") != season:
+                continue
+            for ep in s.get("episodes", []):
+                if _episode_selected(ep, episodes):
+                    deleted.extend(_names(ep.get("telegram")))
+
+    if not ids or test:
+        return len(ids), deleted
+
+    if not season:
+        await col.delete_many({"_id": {"$in": ids}})
+    elif episodes:
+        await col.update_many(
+            {"_id": {"$in": ids}},
+            {"$pull": {"seasons.$[s].episodes": {"episode_number": {"$in": episodes}}}},
+            array_filters=[{"s.season_number": season}]
+        )
+        await _cleanup_tv(col, ids)
+    else:
+        await col.update_many({"_id": {"$in": ids}}, {"$pull": {"seasons": {"season_number": season}}})
+        await _cleanup_tv(col, ids)
+
+    return len(ids), deleted
+
+
+async def _delete_movie_by_file(storage, target, test):
+    col = storage["movie"]
+    query = {"$or": [{"telegram.id": target}, {"telegram.name": target}]}
+    deleted, ids = [], []
+
+    async for doc in col.find(query, {"telegram.id": 1, "telegram.name": 1}):
+        ids.append(doc["_id"])
+        deleted.extend(
+            t.get("name") for t in doc.get("telegram", [])
+            if t.get("id") == target or t.get("name") == target
+        )
+
+    if ids and not test:
+        scope = {"_id": {"$in": ids}}
+        await col.update_many(scope, {"$pull": {"telegram": {"$or": [{"id": target}, {"name": target}]}}})
+        await col.delete_many({**scope, "telegram": {"$size": 0}})
+
+    return len(ids), deleted
+
+
+async def _delete_tv_by_file(storage, target, test, season, episodes):
+    col = storage["tv"]
+    query = {"$or": [
+        {"seasons.episodes.telegram.id": target},
+        {"seasons.episodes.telegram.name": target}
+    ]}
+    projection = {"seasons.season_number": 1, "seasons.episodes.episode_number": 1,
+                  "seasons.episodes.telegram.id": 1, "seasons.episodes.telegram.name": 1}
+    deleted, ids = [], []
+
+    async for doc in col.find(query, projection):
+        matched = False
+        for s in doc.get("seasons", []):
+            if season and s.get("season_number") != season:
+                continue
+            for ep in s.get("episodes", []):
+                if not _episode_selected(ep, episodes):
                     continue
-
-                remove_eps = []
-                for ep in s.get("episodes", []):
-                    if episodes and ep.get("episode_number") not in episodes:
-                        continue
-                    for t in ep.get("telegram", []):
+                for t in ep.get("telegram", []):
+                    if t.get("id") == target or t.get("name") == target:
                         deleted.append(t.get("name"))
-                    if not test:
-                        remove_eps.append(ep)
-                        changed = True
+                        matched = True
+        if matched:
+            ids.append(doc["_id"])
+
+    if ids and not test:
+        season_path = "$[s]" if season else "$[]"
+        episode_path = "$[e]" if episodes else "$[]"
+        array_filters = []
+        if season:
+            array_filters.append({"s.season_number": season})
+        if episodes:
+            array_filters.append({"e.episode_number": {"$in": episodes}})
+
+        await col.update_many(
+            {"_id": {"$in": ids}},
+            {"$pull": {f"seasons.{season_path}.episodes.{episode_path}.telegram": {
+                "$or": [{"id": target}, {"name": target}]
+            }}},
+            array_filters=array_filters or None
+        )
+        await _cleanup_tv(col, ids)
+
+    return len(ids), deleted
+
+
+async def _delete_in_storage(storage, id_type, val, test, category, season, episodes):
+    tasks = []
+
+    if id_type in ("tmdb", "imdb"):
+        query = {"tmdb_id": int(val)} if id_type == "tmdb" else {"imdb_id": val}
+        if category in ("all", "movie"):
+            tasks.append(_delete_movie_by_id(storage, query, test))
+        if category in ("all", "tv"):
+            tasks.append(_delete_tv_by_id(storage, query, test, season, episodes))
+    else:
+        if category in ("all", "movie"):
+            tasks.append(_delete_movie_by_file(storage, val, test))
+        if category in ("all", "tv"):
+            tasks.append(_delete_tv_by_file(storage, val, test, season, episodes))
 
-                for e in remove_eps:
-                    s["episodes"].remove(e)
+    return await asyncio.gather(*tasks)
 
-                if not s["episodes"]:
-                    remove_seasons.append(s)
 
-            for s in remove_seasons:
-                doc["seasons"].remove(s)
+async def process_delete(id_type, val, imdb_fallback=None, test=False,
+                         category="all", season=None, episodes=None):
+    """
+    Tüm storage veritabanlarında paralel çalışır.
+    Yalnızca indeksli alanlar sorgulanır, kayıtlar hedefli $pull ile güncellenir.
+    """
+    results = await asyncio.gather(*(
+        _delete_in_storage(db.dbs[f"storage_{i}"], id_type, val, test, category, season, episodes)
+        for i in db.storage_indexes()
+    ))
 
-            if changed and not test:
-                if not doc["seasons"]:
-                    db["tv"].delete_one({"_id": doc["_id"]})
-                else:
-                    db["tv"].replace_one({"_id": doc["_id"]}, doc)
+    found = sum(count for shard in results for count, _ in shard)
+    if id_type == "tmdb" and not found and imdb_fallback:
+        return await process_delete("imdb", imdb_fallback, None, test, category, season, episodes)
 
-    return deleted
+    if found and not test:
+        await db.stats.mark_stale()
+
+    return [name for shard in results for _, names in shard for name in names]
 
 
 # ------------------------------------------------------------------
@@ -215,9 +237,6 @@ async def dizisil(client, message):
     if len(message.command) < 2:
         return await message.reply_text("Kullanım:\n/dizisil id\n/dizisil id s3\n/dizisil id s3e5e6")
 
-    mongo = MongoClient(db_urls[1])
-    db = mongo[mongo.list_database_names()[0]]
-
     idt, val, fb = extract_id(message.command[1])
 
     season = None
@@ -232,7 +251,7 @@ async def dizisil(client, message):
             if eps_raw:
                 episodes = [int(x[1:]) for x in re.findall(r"e\d+", eps_raw)]
 
-    data = process_delete(db, idt, val, fb, test=False,
+    data = await process_delete(idt, val, fb, test=False,
                           category="tv", season=season, episodes=episodes)
 
     await send_output(message, data, "dizisil", is_tv=True, is_test=False)
@@ -247,9 +266,6 @@ async def dizisiltest(client, message):
     if len(message.command) < 2:
         return await message.reply_text("Kullanım:\n/dizisiltest id\n/dizisiltest id s3\n/dizisiltest id s3e5e6")
 
-    mongo = MongoClient(db_urls[1])
-    db = mongo[mongo.list_database_names()[0]]
-
     idt, val, fb = extract_id(message.command[1])
 
     season = None
@@ -264,7 +280,7 @@ async def dizisiltest(client, message):
             if eps_raw:
                 episodes = [int(x[1:]) for x in re.findall(r"e\d+", eps_raw)]
 
-    data = process_delete(db, idt, val, fb, test=True,
+    data = await process_delete(idt, val, fb, test=True,
                           category="tv", season=season, episodes=episodes)
 
     await send_output(message, data, "dizisiltest", is_tv=True, is_test=True)
@@ -279,12 +295,9 @@ async def filmsil(client, message):
     if len(message.command) < 2:
         return await message.reply_text("Kullanım: /filmsil id")
 
-    mongo = MongoClient(db_urls[1])
-    db = mongo[mongo.list_database_names()[0]]
-
     idt, val, fb = extract_id(message.command[1])
 
-    data = process_delete(db, idt, val, fb, test=False, category="movie")
+    data = await process_delete(idt, val, fb, test=False, category="movie")
 
     await send_output(message, data, "filmsil", is_tv=False, is_test=False)
 
@@ -298,11 +311,8 @@ async def filmsiltest(client, message):
     if len(message.command) < 2:
         return await message.reply_text("Kullanım: /filmsiltest id")
 
-    mongo = MongoClient(db_urls[1])
-    db = mongo[mongo.list_database_names()[0]]
-
     idt, val, fb = extract_id(message.command[1])
 
-    data = process_delete(db, idt, val, fb, test=True, category="movie")
+    data = await process_delete(idt, val, fb, test=True, category="movie")
 
     await send_output(message, data, "filmsiltest", is_tv=False, is_test=True)
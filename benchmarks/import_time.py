@@ -0,0 +1,106 @@
+"""
+Cold-start import benchmark built on `python -X importtime`.
+
+Imports what the bot loads at startup (web app + every plugin module) in a
+fresh interpreter, then reports the slowest imports and checks two things:
+
+  * none of the lazily loaded dependencies (psutil, deep_translator, PTN,
+    themoviedb, aiohttp) got imported eagerly again;
+  * total import time stays within --budget milliseconds.
+
+Exit status is 1 when either check fails, so it can run in CI as a
+regression test. Needs the same environment as the bot (config.env with
+API_ID, DATABASE, ...):
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget 2500 --top 25
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLUGIN_DIR = os.path.join(ROOT, "Backend", "pyrofork", "plugins")
+
+# must stay out of a cold start; they load on first use through Backend.helper.lazy
+LAZY = ("psutil", "deep_translator", "PTN", "themoviedb", "aiohttp")
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def startup_modules() -> List[str]:
+    plugins = sorted(
+        f"Backend.pyrofork.plugins.{name[:-3]}"
+        for name in os.listdir(PLUGIN_DIR)
+        if name.endswith(".py") and not name.startswith("_")
+    )
+    return ["Backend.fastapi", *plugins]
+
+
+def run_importtime(modules: List[str]) -> str:
+    # plugin modules start tasks at import, so import them inside a running loop
+    code = (
+        "import asyncio, importlib\n"
+        "async def main():\n"
+        f"    for name in {modules!r}:\n"
+        "        importlib.import_module(name)\n"
+        "asyncio.run(main())\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        tail = "\n".join(line for line in proc.stderr.splitlines() if not line.startswith("import time:"))
+        raise SystemExit(f"import failed:\n{tail[-2000:]}")
+    return proc.stderr
+
+
+def parse(stderr: str) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Returns ({module: self_us}, {top-level module: cumulative_us})."""
+    self_us: Dict[str, int] = {}
+    top_level: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        m = LINE.match(line)
+        if not m:
+            continue
+        own, cumulative, indent, name = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4)
+        self_us[name] = own
+        if len(indent) <= 1:
+            top_level[name] = cumulative
+    return self_us, top_level
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=3000.0, help="max total import time in ms")
+    parser.add_argument("--top", type=int, default=20, help="how many imports to list")
+    args = parser.parse_args()
+
+    self_us, top_level = parse(run_importtime(startup_modules()))
+    total_ms = sum(top_level.values()) / 1000
+
+    print(f"{'cumulative ms':>14}  top-level import")
+    for name, us in sorted(top_level.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"{us / 1000:14.1f}  {name}")
+    print(f"\n{'self ms':>14}  module")
+    for name, us in sorted(self_us.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"{us / 1000:14.1f}  {name}")
+    print(f"\ntotal: {total_ms:.1f} ms across {len(self_us)} modules (budget {args.budget:.0f} ms)")
+
+    failed = False
+    eager = [name for name in LAZY if name in self_us]
+    if eager:
+        print(f"FAIL: imported at startup, should be lazy: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget:
+        print(f"FAIL: import time {total_ms:.1f} ms over budget {args.budget:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
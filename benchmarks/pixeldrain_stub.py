@@ -0,0 +1,125 @@
+"""
+Local PixelDrain API stub for exercising the async client without the real service.
+
+Serve only (point the bot at it with PIXELDRAIN_API_BASE=http://127.0.0.1:8765):
+
+    python benchmarks/pixeldrain_stub.py --files 500 --latency 0.2 --limit 4
+
+Drive the client against it and print timings / peak concurrency:
+
+    python benchmarks/pixeldrain_stub.py --drive --files 500 --limit 4
+
+Requests above --limit concurrent ones get 429 with Retry-After, so the
+client's backoff path is exercised as well.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_app(files: int, page_size: int, latency: float, limit: int) -> FastAPI:
+    app = FastAPI()
+    store = {f"f{i:06d}": {"id": f"f{i:06d}", "name": f"video_{i}.mkv", "size": 10_000_000 + i} for i in range(files)}
+    stats = {"requests": 0, "in_flight": 0, "max_in_flight": 0, "throttled": 0}
+
+    async def enter():
+        stats["requests"] += 1
+        if stats["in_flight"] >= limit:
+            stats["throttled"] += 1
+            return JSONResponse({"success": False, "value": "rate_limited"}, status_code=429, headers={"Retry-After": "1"})
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        await asyncio.sleep(latency)
+        return None
+
+    def leave():
+        stats["in_flight"] -= 1
+
+    @app.get("/user/files")
+    async def list_files(page: int = 1):
+        limited = await enter()
+        if limited:
+            return limited
+        try:
+            items = list(store.values())
+            return {"files": items[(page - 1) * page_size: page * page_size]}
+        finally:
+            leave()
+
+    @app.delete("/file/{file_id}")
+    async def delete_file(file_id: str):
+        limited = await enter()
+        if limited:
+            return limited
+        try:
+            if store.pop(file_id, None) is None:
+                return JSONResponse({"success": False, "value": "not_found"}, status_code=404)
+            return {"success": True}
+        finally:
+            leave()
+
+    @app.get("/_stats")
+    async def get_stats():
+        return {**stats, "files_left": len(store)}
+
+    return app
+
+
+async def drive(args) -> None:
+    from Backend.helper.http import http_pool
+    from Backend.helper.pixeldrain import PixelDrainClient
+
+    server = uvicorn.Server(uvicorn.Config(
+        build_app(args.files, args.page_size, args.latency, args.limit),
+        host="127.0.0.1", port=args.port, log_level="warning"
+    ))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    client = PixelDrainClient("stub", base_url=f"http://127.0.0.1:{args.port}", concurrency=args.concurrency)
+    try:
+        t0 = time.perf_counter()
+        files = await client.list_files()
+        t1 = time.perf_counter()
+        deleted, failed = await client.delete_many(f["id"] for f in files)
+        t2 = time.perf_counter()
+
+        r = await http_pool.get(f"http://127.0.0.1:{args.port}/_stats")
+        print(f"listed   {len(files)} files in {t1 - t0:.2f}s")
+        print(f"deleted  {len(deleted)} (failed {len(failed)}) in {t2 - t1:.2f}s "
+              f"-> {len(deleted) / max(t2 - t1, 1e-9):.1f} files/s")
+        print(f"server   {r.json()}")
+    finally:
+        await http_pool.close()
+        server.should_exit = True
+        await server_task
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    parser.add_argument("--limit", type=int, default=4, help="concurrent requests before 429")
+    parser.add_argument("--concurrency", type=int, default=4, help="client concurrency in --drive mode")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--drive", action="store_true")
+    args = parser.parse_args()
+
+    if args.drive:
+        asyncio.run(drive(args))
+    else:
+        uvicorn.run(build_app(args.files, args.page_size, args.latency, args.limit), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Allocation cost of the /dl chunk generator, measured with tracemalloc.
+
+Drives ByteStreamer.yield_file against an in-memory media session whose
+GetFile answers allocate a fresh 1 MiB bytes object per part, like Pyrogram's
+deserializer does, and compares it with the previous bytes-slicing generator
+(kept below as LegacyStreamer):
+
+  * allocated MiB per stream for a 64 KiB probe, a 2 MiB seek read and a
+    64 MiB sequential read (every part and chunk is kept alive while
+    counting, so nothing freed in between hides an allocation);
+  * peak traced memory with --streams concurrent sequential readers, where
+    a GetFile round trip takes longer than handing a chunk to the transport.
+
+Needs the same environment as the bot (config.env with API_ID, DATABASE, ...);
+nothing connects to Telegram:
+
+    python benchmarks/stream_alloc.py
+    python benchmarks/stream_alloc.py --streams 300
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyrogram import raw  # noqa: E402
+
+from Backend.helper.custom_dl import ByteStreamer  # noqa: E402
+from Backend.pyrofork.bot import work_loads  # noqa: E402
+
+CHUNK = 1024 * 1024
+MIB = 1024 * 1024
+FILE_ID = SimpleNamespace(dc_id=2)
+
+
+class MemorySession:
+    def __init__(self, latency: float, retain: bool):
+        self.latency = latency
+        self.retained = [] if retain else None
+
+    async def send(self, query):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        # new object per part, as the TL deserializer produces
+        r = raw.types.upload.File(type=raw.types.storage.FileUnknown(), mtime=0, bytes=b"\0" * query.limit)
+        if self.retained is not None:
+            self.retained.append(r)
+        return r
+
+
+class MemoryStreamer(ByteStreamer):
+    def __init__(self, latency: float = 0.0, retain: bool = False):
+        super().__init__(client=None)
+        self.session = MemorySession(latency, retain)
+
+    async def generate_media_session(self, client, file_id):
+        return self.session
+
+    @staticmethod
+    async def get_location(file_id):
+        return None
+
+
+class LegacyStreamer(MemoryStreamer):
+    """yield_file as it was before memoryview slicing."""
+
+    async def yield_file(self, file_id, index, offset, first_part_cut, last_part_cut, part_count, chunk_size):
+        work_loads[index] += 1
+        media_session = await self.generate_media_session(self.client, file_id)
+        location = await self.get_location(file_id)
+        current_part = 1
+        try:
+            r = await media_session.send(raw.functions.upload.GetFile(location=location, offset=offset, limit=chunk_size))
+            while True:
+                chunk = r.bytes
+                if not chunk:
+                    break
+                elif part_count == 1:
+                    yield chunk[first_part_cut:last_part_cut]
+                elif current_part == 1:
+                    yield chunk[first_part_cut:]
+                elif current_part == part_count:
+                    yield chunk[:last_part_cut]
+                else:
+                    yield chunk
+                current_part += 1
+                offset += chunk_size
+                if current_part > part_count:
+                    break
+                r = await media_session.send(raw.functions.upload.GetFile(location=location, offset=offset, limit=chunk_size))
+        finally:
+            work_loads[index] -= 1
+
+
+def plan(from_bytes: int, until_bytes: int) -> tuple:
+    # same arithmetic as stream_routes.plan_stream
+    offset = from_bytes - (from_bytes % CHUNK)
+    part_count = (until_bytes // CHUNK) - (offset // CHUNK) + 1
+    return FILE_ID, 0, offset, from_bytes - offset, (until_bytes % CHUNK) + 1, part_count, CHUNK
+
+
+SCENARIOS = {
+    "probe 64 KiB": (0, 64 * 1024 - 1),
+    "seek 2 MiB": (10 * CHUNK + 123_456, 12 * CHUNK + 123_455),
+    "sequential 64 MiB": (0, 64 * CHUNK - 1),
+}
+
+
+async def allocated_per_stream(streamer: ByteStreamer, from_bytes: int, until_bytes: int) -> float:
+    kept = []
+    base = tracemalloc.get_traced_memory()[0]
+    async for chunk in streamer.yield_file(*plan(from_bytes, until_bytes)):
+        kept.append(chunk)
+    assert sum(map(len, kept)) == until_bytes - from_bytes + 1
+    return (tracemalloc.get_traced_memory()[0] - base) / MIB
+
+
+async def concurrent_peak(streamer: ByteStreamer, streams: int, size_mib: int) -> float:
+    async def reader():
+        async for chunk in streamer.yield_file(*plan(0, size_mib * CHUNK - 1)):
+            await asyncio.sleep(0)  # hand the chunk to the transport
+            del chunk
+
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    await asyncio.gather(*(reader() for _ in range(streams)))
+    return (tracemalloc.get_traced_memory()[1] - base) / MIB
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=100, help="concurrent readers for the peak test")
+    parser.add_argument("--size", type=int, default=16, help="MiB per concurrent reader")
+    args = parser.parse_args()
+
+    work_loads[0] = 0
+    impls = {"before": LegacyStreamer, "after": MemoryStreamer}
+    tracemalloc.start()
+
+    print(f"{'allocated MiB per stream':<28}{'before':>10}{'after':>10}")
+    for name, (start, end) in SCENARIOS.items():
+        row = [await allocated_per_stream(impl(retain=True), start, end) for impl in impls.values()]
+        print(f"{name:<28}{row[0]:10.2f}{row[1]:10.2f}")
+
+    row = [await concurrent_peak(impl(latency=0.002), args.streams, args.size) for impl in impls.values()]
+    print(f"{f'peak MiB, {args.streams} streams':<28}{row[0]:10.1f}{row[1]:10.1f}")
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
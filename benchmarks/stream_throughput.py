@@ -0,0 +1,191 @@
+"""
+/dl throughput: lean ASGI fast path vs the FastAPI route.
+
+Runs the real web app twice in a child process, once with StreamApp in front
+(the default) and once as the bare FastAPI app (STREAM_FAST_PATH=false).
+Telegram is replaced by an in-memory source that yields 1 MiB chunks without
+waiting, so the numbers are the per-request and per-chunk cost of the HTTP
+layer alone. Two loads are driven from this process:
+
+  * full downloads of --size MiB with --concurrency parallel clients (MB/s);
+  * small range probes (bytes=0-65535), like players send when seeking (req/s).
+
+Needs the same environment as the bot (config.env with API_ID, DATABASE, ...);
+nothing connects to Mongo or Telegram:
+
+    python benchmarks/stream_throughput.py
+    python benchmarks/stream_throughput.py --size 256 --concurrency 16 --probes 5000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CHUNK = 1024 * 1024
+FILE_SIZE = 4 * 1024 * CHUNK
+
+
+# -------------------------------
+# Server side (child process)
+# -------------------------------
+class MemoryStreamer:
+    """Stands in for ByteStreamer; same yield_file slicing, no GetFile round trips."""
+
+    payload = bytes(CHUNK)
+
+    async def yield_file(self, file_id, index, offset, first_part_cut, last_part_cut, part_count, chunk_size, flow=None):
+        chunk = memoryview(self.payload)
+        for part in range(1, part_count + 1):
+            if part_count == 1:
+                yield chunk[first_part_cut:last_part_cut]
+            elif part == 1:
+                yield chunk[first_part_cut:]
+            elif part == part_count:
+                yield chunk[:last_part_cut]
+            else:
+                yield chunk
+
+
+async def memory_plan(chat_id, id, range_header="", secure_hash=None, client="unknown"):
+    from Backend.fastapi.routes.stream_routes import StreamPlan, parse_range_header
+
+    from_bytes, until_bytes = parse_range_header(range_header, FILE_SIZE)
+    offset = from_bytes - (from_bytes % CHUNK)
+    part_count = (until_bytes // CHUNK) - (offset // CHUNK) + 1
+    headers = {
+        "Content-Type": "video/x-matroska",
+        "Content-Length": str(until_bytes - from_bytes + 1),
+        "Content-Disposition": 'inline; filename="bench.mkv"',
+    }
+    status = 200
+    if range_header:
+        headers["Content-Range"] = f"bytes {from_bytes}-{until_bytes}/{FILE_SIZE}"
+        status = 206
+    return StreamPlan(
+        status, headers, MemoryStreamer(),
+        (None, 0, offset, from_bytes - offset, (until_bytes % CHUNK) + 1, part_count, CHUNK)
+    )
+
+
+def serve(mode: str, port: int) -> None:
+    import uvicorn
+    from Backend.fastapi.main import app
+    from Backend.fastapi.routes import stream_routes
+    from Backend.fastapi.stream_app import StreamApp
+    from Backend.helper.startup import readiness
+
+    stream_routes.plan_stream = memory_plan
+    asgi = StreamApp(app, plan=memory_plan) if mode == "fast" else app
+
+    async def main():
+        readiness.set("db")
+        readiness.set("telegram")
+        config = uvicorn.Config(asgi, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+        await uvicorn.Server(config).serve()
+
+    asyncio.run(main())
+
+
+# -------------------------------
+# Client side
+# -------------------------------
+async def wait_ready(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise SystemExit(f"server at {url} did not come up")
+
+
+async def downloads(url: str, size_mib: int, concurrency: int, rounds: int) -> float:
+    headers = {"Range": f"bytes=0-{size_mib * CHUNK - 1}"}
+    received = 0
+
+    async def one(client):
+        nonlocal received
+        async with client.stream("GET", url, headers=headers) as r:
+            async for data in r.aiter_raw(CHUNK):
+                received += len(data)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await asyncio.gather(*(one(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return received / elapsed / CHUNK
+
+
+async def probes(url: str, total: int, concurrency: int):
+    headers = {"Range": "bytes=0-65535", "Origin": "https://web.stremio.com"}
+    latencies = []
+    queue = iter(range(total))
+
+    async def worker(client):
+        for _ in queue:
+            start = time.perf_counter()
+            r = await client.get(url, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            assert r.status_code == 206, r.status_code
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return total / elapsed, statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.99) - 1] * 1000
+
+
+async def run(mode: str, port: int, args) -> dict:
+    from Backend.helper.encrypt import encode_string
+
+    proc = subprocess.Popen([sys.executable, __file__, "--serve", mode, "--port", str(port)], cwd=ROOT)
+    try:
+        id = await encode_string({"chat_id": 1, "msg_id": 1})
+        url = f"http://127.0.0.1:{port}/dl/{id}/bench.mkv"
+        await wait_ready(f"http://127.0.0.1:{port}/ready")
+        await probes(url, 200, args.concurrency)  # warm-up
+        mbps = await downloads(url, args.size, args.concurrency, args.rounds)
+        rps, p50, p99 = await probes(url, args.probes, args.concurrency)
+        return {"MB/s": mbps, "probe req/s": rps, "probe p50 ms": p50, "probe p99 ms": p99}
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=128, help="MiB per download")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--probes", type=int, default=3000, help="number of small range requests")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--serve", choices=("fast", "route"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    results = {mode: asyncio.run(run(mode, args.port, args)) for mode in ("route", "fast")}
+    print(f"{'':>14}{'route':>12}{'fast':>12}{'change':>10}")
+    for key in results["route"]:
+        before, after = results["route"][key], results["fast"][key]
+        print(f"{key:>14}{before:12.1f}{after:12.1f}{(after - before) / before * 100:+9.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Guards the lazy imports: importing Backend must not pull in any of the
+dependencies that load on first use through Backend.helper.lazy.
+
+Runs the import in a fresh interpreter, in the same environment the bot
+needs (its requirements and config.env with DATABASE, ...). A missing
+third-party package or missing config skips the test; any other import
+error fails it.
+
+    python -m unittest discover tests
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from import_time import LAZY, startup_modules  # noqa: E402
+
+MISSING_MODULE = re.compile(r"^ModuleNotFoundError: No module named '([\w.]+)'")
+# top-level modules of the pyproject dependencies (and what they pull in); a
+# missing one means the environment is incomplete, any other name is a bug
+DEPENDENCIES = {
+    "aiofiles", "fastapi", "starlette", "pydantic", "httpx", "itsdangerous", "jinja2",
+    "motor", "pymongo", "bson", "gridfs", "PTN", "pyrogram", "dotenv", "multipart",
+    "python_multipart", "pytz", "requests", "tgcrypto", "themoviedb", "aiohttp",
+    "uvicorn", "dateutil", "psutil", "deep_translator", "zstandard",
+}
+# raised by Database() when config.env does not list the databases
+MISSING_CONFIG = "At least 2 database URIs are required"
+
+
+def imported_after(modules):
+    """Import `modules` in a new interpreter; its stdout ends with the LAZY modules left in sys.modules."""
+    code = (
+        "import asyncio, importlib, json, sys\n"
+        "async def main():\n"
+        f"    for name in {modules!r}:\n"
+        "        importlib.import_module(name)\n"
+        "asyncio.run(main())\n"
+        f"print(json.dumps([name for name in {LAZY!r} if name in sys.modules]))\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    return proc.returncode, proc.stdout, proc.stderr
+
+
+def missing_environment(stderr):
+    """The reason to skip if the import failed for lack of a dependency or config, else None."""
+    lines = stderr.strip().splitlines()
+    last = lines[-1] if lines else ""
+    match = MISSING_MODULE.match(last)
+    if match and match.group(1).split(".")[0] in DEPENDENCIES:
+        return last
+    if MISSING_CONFIG in last:
+        return last
+    return None
+
+
+class LazyImportTest(unittest.TestCase):
+    def assertStaysLazy(self, modules):
+        returncode, stdout, stderr = imported_after(modules)
+        if returncode != 0:
+            reason = missing_environment(stderr)
+            if reason:
+                self.skipTest(f"cannot be imported here: {reason}")
+            self.fail(f"importing {modules} failed:\n{stderr}")
+        self.assertEqual(json.loads(stdout.strip().splitlines()[-1]), [])
+
+    def test_backend_import_stays_lazy(self):
+        self.assertStaysLazy(["Backend"])
+
+    def test_startup_modules_stay_lazy(self):
+        # the web app and every plugin, as loaded at startup
+        self.assertStaysLazy(startup_modules())
+
+
+if __name__ == "__main__":
+    unittest.main()